@@ -0,0 +1,55 @@
+### Headless batch analysis: streams a file of FEN/EPD positions through a pool of processes and writes one CSV row per position. ###
+#Usage:
+#   python src/analyse.py positions.epd                         Legal move count and status of each position, to stdout.
+#   python src/analyse.py positions.epd --depth 4 --workers 8 --output results.csv
+#                                                               Also the best move of a depth 4 search, with 8 processes.
+#   cat positions.fen | python src/analyse.py -                 Read the positions from stdin.
+#The columns are: fen, legal_moves, status (normal/check/checkmate/stalemate/invalid), best_move, score.
+#The progress is written to stderr, so the results can be piped.
+
+import argparse
+import csv
+import sys
+import time
+
+from game_logic.epd_pipeline import RESULT_FIELDS, read_positions, run_pipeline
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Streaming batch analysis of FEN/EPD positions with Catfish.")
+    parser.add_argument("input", help="file with one FEN or EPD position per line, \"-\" for stdin")
+    parser.add_argument("--output", default=None, help="CSV file to write (default: stdout)")
+    parser.add_argument("--depth", type=int, default=0, help="depth of the best move search, 0 for no search (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes (default: %(default)s)")
+    parser.add_argument("--chunk-size", type=int, default=256, help="positions sent to a worker at a time (default: %(default)s)")
+    parser.add_argument("--max-pending", type=int, default=None, help="chunks read ahead at most (default: 2 per worker)")
+    parser.add_argument("--hash", type=float, default=1, help="transposition table size of each search in MB (default: %(default)s)")
+    parser.add_argument("--progress", type=float, default=1.0, help="seconds between two progress reports (default: %(default)s)")
+    args = parser.parse_args()
+
+    input_file = sys.stdin if args.input == "-" else open(args.input)
+    output_file = sys.stdout if args.output is None else open(args.output, "w", newline="")
+    try:
+        writer = csv.writer(output_file)
+        writer.writerow(RESULT_FIELDS)
+        start = last_report = time.perf_counter()
+        count = 0
+        for result in run_pipeline(read_positions(input_file), args.depth, args.workers, args.chunk_size, args.max_pending, args.hash):
+            writer.writerow(result)
+            count += 1
+            now = time.perf_counter()
+            if now - last_report >= args.progress:
+                last_report = now
+                output_file.flush()
+                print(f"{count} positions, {count / (now - start):.0f} positions/s", file=sys.stderr)
+        seconds = time.perf_counter() - start
+        print(f"done: {count} positions in {seconds:.3f} s ({count / seconds if seconds > 0 else 0:.0f} positions/s)", file=sys.stderr)
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+
+if __name__ == "__main__":
+    main()
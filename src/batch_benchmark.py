@@ -0,0 +1,25 @@
+### Headless batch benchmark: compares the NumPy batch move counts and check flags with the scalar move generator. ###
+#Usage:
+#   python src/batch_benchmark.py                   10000 random positions.
+#   python src/batch_benchmark.py --positions 100000 --seed 1
+#NumPy must be installed (pip install numpy).
+
+import argparse
+import sys
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Batch (NumPy) against scalar move counting benchmark of Catfish.")
+    parser.add_argument("--positions", type=int, default=10000, help="number of random positions (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random positions (default: %(default)s)")
+    args = parser.parse_args()
+
+    try:
+        from game_logic.batch import benchmark_batch
+    except ImportError:
+        sys.exit("The batch functions need NumPy: pip install numpy")
+    benchmark_batch(args.positions, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+### Headless search benchmark: times how long the Lazy SMP search takes to reach a depth with different numbers of processes. ###
+#Usage:
+#   python src/benchmark.py                         Time to depth 5 on kiwipete with 1, 2, 4 and 8 processes.
+#   python src/benchmark.py --fen "<fen>" --depth 6 --workers 1 2 4
+
+import argparse
+
+from game_logic.perft import PERFT_POSITIONS
+from game_logic.lazy_smp import benchmark_time_to_depth
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time to depth benchmark of the Catfish parallel search.")
+    parser.add_argument("--fen", default=PERFT_POSITIONS[1]["fen"], help="position to search (default: kiwipete)")
+    parser.add_argument("--depth", type=int, default=5, help="depth to reach (default: %(default)s)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="numbers of processes to try (default: 1 2 4 8)")
+    parser.add_argument("--hash", type=float, default=16, help="size of the shared transposition table in MB (default: %(default)s)")
+    args = parser.parse_args()
+
+    benchmark_time_to_depth(args.fen, args.depth, tuple(args.workers), args.hash)
+
+
+if __name__ == "__main__":
+    main()
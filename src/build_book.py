@@ -0,0 +1,39 @@
+### Headless opening book builder: compiles the first moves of PGN games into a binary book for the UCI engine. ###
+#Usage:
+#   python src/build_book.py games.pgn book.bin                 Every move of the first 20 plies of each game.
+#   python src/build_book.py games.pgn book.bin --plies 16 --min-weight 3
+#                                                               Only moves played in at least 3 games.
+#Then load it in the engine with "setoption name Book value book.bin".
+
+import argparse
+import random
+import time
+
+from game_logic.opening_book import OpeningBook, build_book, benchmark_lookups
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Builds a Catfish opening book from PGN games.")
+    parser.add_argument("input", help="PGN file")
+    parser.add_argument("output", help="book file to write")
+    parser.add_argument("--plies", type=int, default=20, help="plies of each game put in the book (default: %(default)s)")
+    parser.add_argument("--min-weight", type=int, default=1, help="least number of games a move must be played in (default: %(default)s)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with open(args.input, encoding="utf-8", errors="replace") as f:
+        games, records = build_book(f, args.output, args.plies, args.min_weight)
+    print(f"{games} games, {records} records written to {args.output} in {time.perf_counter() - start:.3f} s")
+
+    #Check the book: time to open it and average lookup time, for positions in the book and random ones
+    start = time.perf_counter()
+    with OpeningBook(args.output) as book:
+        open_microseconds = (time.perf_counter() - start) * 1e6
+        generator = random.Random(0)
+        keys = [book.keys[generator.randrange(len(book))] for _ in range(min(len(book), 10000))]
+        keys += [generator.getrandbits(64) for _ in range(10000)]
+        print(f"open: {open_microseconds:.0f} us, lookup: {benchmark_lookups(book, keys):.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+### This file runs the legal move generation and the engine search away from the Pygame event loop, so the window never freezes. ###
+#Each job works on a copy of the game and posts its result as a BACKGROUND_RESULT event, read by the event loop like
+#any other event. A result is tagged with the hash of the position it was computed for: the event loop drops the
+#results of positions which are no longer on the board (after an undo for example).
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+import pygame as p
+
+from game_logic.game_state import Game
+from game_logic.move_generation import get_all_legal_moves
+from game_logic.search import Search
+from game_logic.transposition_table import TranspositionTable
+
+BACKGROUND_RESULT = p.USEREVENT + 1
+#Kinds of BACKGROUND_RESULT events
+LEGAL_MOVES = "legal_moves"
+ENGINE_MOVE = "engine_move"
+
+
+class BackgroundWorker:
+    """Runs legal move generations and engine searches in background threads.
+    Threads are used rather than processes: the jobs are short or can be stopped at any time, and a thread can share
+    the engine's transposition table between searches.
+
+    Args:
+        legal_move_generator (Callable[[Game], list[int]]): The function that finds the legal moves.
+        hash_size_mb (float): The size of the engine's transposition table in MB.
+    """
+    def __init__(self, legal_move_generator : Callable[[Game], list[int]] = get_all_legal_moves, hash_size_mb : float = 16):
+        self.legal_move_generator = legal_move_generator
+        #One thread each, so a long search never delays the legal moves of the next position
+        self.move_executor = ThreadPoolExecutor(max_workers=1)
+        self.search_executor = ThreadPoolExecutor(max_workers=1)
+        self.transposition_table = TranspositionTable(hash_size_mb)
+        self.search = None
+
+    def request_legal_moves(self, game : Game) -> None:
+        """Starts finding the legal moves of the current position. The result is posted as a LEGAL_MOVES event with
+        the attributes key (the hash of the position) and legal_moves.
+
+        Args:
+            game (Game): The game state. It is copied, so it can be changed right away.
+        """
+        self.move_executor.submit(self.run_legal_moves, game.copy())
+
+    def run_legal_moves(self, game : Game) -> None:
+        """Finds the legal moves and posts them (in the move thread).
+
+        Args:
+            game (Game): The copy of the game state.
+        """
+        legal_moves = self.legal_move_generator(game)
+        p.event.post(p.event.Event(BACKGROUND_RESULT, kind=LEGAL_MOVES, key=game.hash, legal_moves=legal_moves))
+
+    def request_engine_move(self, game : Game, max_time : float) -> None:
+        """Starts a search of the current position, stopping the previous one. The result is posted as an ENGINE_MOVE
+        event with the attributes search (the Search, to tell it from older ones), key (the hash of the position) and
+        info (the SearchInfo, None if no move was found).
+
+        Args:
+            game (Game): The game state. It is copied, so it can be changed right away.
+            max_time (float): Stop the search after this many seconds.
+        """
+        self.cancel_search()
+        self.search = Search(game.copy(), transposition_table=self.transposition_table)
+        self.search_executor.submit(self.run_search, self.search, max_time)
+
+    def run_search(self, search : Search, max_time : float) -> None:
+        """Runs a search and posts its result unless it was cancelled (in the search thread).
+
+        Args:
+            search (Search): The search, on a copy of the game state.
+            max_time (float): Stop the search after this many seconds.
+        """
+        if search.stopped:
+            return
+        info = search.search(max_time=max_time)
+        if not search.stopped:
+            p.event.post(p.event.Event(BACKGROUND_RESULT, kind=ENGINE_MOVE, search=search, key=search.game.hash, info=info))
+
+    def cancel_search(self) -> None:
+        """Stops the running search, if any, without waiting for it: its result is never posted.
+        The search checks the flag every thousand nodes or so, so the thread is free again almost at once.
+        """
+        if self.search is not None:
+            self.search.stopped = True
+            self.search = None
+
+    @property
+    def searching(self) -> bool:
+        """Whether a search was requested and neither finished nor cancelled.
+        """
+        return self.search is not None
+
+    def is_current(self, event : p.event.Event) -> bool:
+        """Checks if an ENGINE_MOVE event comes from the current search, and marks this search as finished if it does.
+
+        Args:
+            event (p.event.Event): The ENGINE_MOVE event.
+
+        Returns:
+            bool: If the result must be played, False if its search was cancelled or replaced.
+        """
+        if event.search is not self.search:
+            return False
+        self.search = None
+        return True
+
+    def shutdown(self) -> None:
+        """Stops the running jobs and the threads.
+        """
+        self.cancel_search()
+        self.move_executor.shutdown(wait=False, cancel_futures=True)
+        self.search_executor.shutdown(wait=False, cancel_futures=True)
@@ -2,6 +2,8 @@
 
 import pygame as p
 
+from game_logic.move import PIECE_TAGS
+
 #Useful constants
 WIDTH = HEIGHT = 700
 DIMENSION = 8 
@@ -31,29 +33,23 @@ def drawBoard(screen) -> None:
             p.draw.rect(screen, color, p.Rect(c*SQ_SIZE, r*SQ_SIZE, SQ_SIZE, SQ_SIZE))
 
 
-def draw_pieces(screen, bitboards : dict, white_to_move : bool) -> None: 
+def draw_pieces(screen, board : list, white_to_move : bool) -> None: 
     """Draws the pieces on a Pygame display. 
 
     Args:
         screen (Pygame display): The pygame display where to draw the pieces.
-        bitboaards (dict): The current chess game.
+        board (list): The piece index on each square of the current game, None if the square is empty.
         white_to_move (bool): Whose turn it is.
     """
-    for piece in PIECES:
-        bitboard = bitboards[piece]
-        #On what squares are the pieces
-        positions = []
-        for index in range(bitboard.bit_length()):
-            if (bitboard >> index) & 1:
-                i,j = divmod(int(index), 8)
-                positions.append((index, i, j))
-        #Drawing the pieces
+    for index, piece in enumerate(board):
+        if piece is None:
+            continue
+        i,j = divmod(index, 8)
+        #Drawing the piece
         if white_to_move:
-            for position in positions:
-                screen.blit(IMAGES[piece], p.Rect(position[2]*SQ_SIZE, (7-position[1])*SQ_SIZE, SQ_SIZE, SQ_SIZE))
+            screen.blit(IMAGES[PIECE_TAGS[piece]], p.Rect(j*SQ_SIZE, (7-i)*SQ_SIZE, SQ_SIZE, SQ_SIZE))
         else:
-            for position in positions:
-                screen.blit(IMAGES[piece], p.Rect((7-position[2])*SQ_SIZE, position[1]*SQ_SIZE, SQ_SIZE, SQ_SIZE))
+            screen.blit(IMAGES[PIECE_TAGS[piece]], p.Rect((7-j)*SQ_SIZE, i*SQ_SIZE, SQ_SIZE, SQ_SIZE))
 
 
 def highlightSquares(screen, white_to_move : bool, sqSelected : tuple[int, int], legal_moves : list) -> None:
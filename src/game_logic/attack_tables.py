@@ -0,0 +1,165 @@
+### This file builds the attack bitboards of every piece for every square once, when it is imported. ###
+
+#(i,j) coordinates of every square index, so generators don't have to call divmod
+SQUARE_COORDINATES = [divmod(square, 8) for square in range(64)]
+
+
+def build_attack_table(directions : tuple[tuple[int, int], ...]) -> list[int]:
+    """Builds the attack bitboard of a piece on every square for a set of one step directions.
+
+    Args:
+        directions (tuple[tuple[int, int], ...]): The (di,dj) steps the piece can make.
+
+    Returns:
+        list[int]: The attack bitboard for each square index.
+    """
+    table = []
+    for i, j in SQUARE_COORDINATES:
+        attacks = 0
+        for direction in directions:
+            ni, nj = i + direction[0], j + direction[1]
+            #Out of bounds?
+            if 0 <= ni <= 7 and 0 <= nj <= 7:
+                attacks |= 1 << (8*ni + nj)
+        table.append(attacks)
+    return table
+
+
+#(rank, file) steps of the knight and the king
+KNIGHT_DIRECTIONS = ((-2,-1), (-2,1), (-1, -2), (-1, 2), (1,-2),(1,2), (2,-1), (2,1))
+KING_DIRECTIONS = ((-1,1), (-1,0), (-1,-1), (0,-1), (1,-1), (1,0), (1,1), (0,1))
+KNIGHT_ATTACKS = build_attack_table(KNIGHT_DIRECTIONS)
+KING_ATTACKS = build_attack_table(KING_DIRECTIONS)
+#Squares attacked by a white/black pawn standing on each square (captures only, not pushes)
+WHITE_PAWN_ATTACKS = build_attack_table(((1,-1), (1,1)))
+BLACK_PAWN_ATTACKS = build_attack_table(((-1,-1), (-1,1)))
+
+
+#Sliding pieces: for every square, the attacks are stored for each occupancy of the relevant squares (the squares
+#on the piece's rays, without the last square of each ray since a piece there can't block anything).
+#The lookup is TABLE[square][occupancy & MASKS[square]], like a PEXT index but using the masked occupancy itself as the key.
+ROOK_DIRECTIONS = ((1,0), (-1,0), (0,1), (0,-1))
+BISHOP_DIRECTIONS = ((1,1), (1,-1), (-1,1), (-1,-1))
+
+
+def build_ray_table(i : int, j : int, direction : tuple[int, int]) -> list[tuple[int, int]]:
+    """Finds the attacks along one ray for every occupancy of its relevant squares.
+
+    Args:
+        i (int): The i coordinate of the sliding piece.
+        j (int): The j coordinate of the sliding piece.
+        direction (tuple[int, int]): The (di,dj) step of the ray.
+
+    Returns:
+        list[tuple[int, int]]: (occupancy, attacks) for each occupancy of the relevant squares of the ray.
+    """
+    ray_squares = []
+    ni, nj = i + direction[0], j + direction[1]
+    while 0 <= ni <= 7 and 0 <= nj <= 7:
+        ray_squares.append(8*ni + nj)
+        ni, nj = ni + direction[0], nj + direction[1]
+    relevant_squares = ray_squares[:-1]
+
+    ray_table = []
+    for subset in range(1 << len(relevant_squares)):
+        occupancy = 0
+        for k, square in enumerate(relevant_squares):
+            if (subset >> k) & 1:
+                occupancy |= 1 << square
+        #The ray stops at the first occupied square, which can be captured
+        attacks = 0
+        for square in ray_squares:
+            attacks |= 1 << square
+            if (occupancy >> square) & 1:
+                break
+        ray_table.append((occupancy, attacks))
+    return ray_table
+
+
+def build_sliding_tables(directions : tuple[tuple[int, int], ...]) -> tuple[list[int], list[dict[int, int]]]:
+    """Builds the occupancy masks and attack tables of a sliding piece.
+    The rays of a square are independent, so the table of a square is the product of the tables of its rays.
+
+    Args:
+        directions (tuple[tuple[int, int], ...]): The (di,dj) steps of the rays.
+
+    Returns:
+        tuple[list[int], list[dict[int, int]]]: The relevant occupancy mask of each square and, for each square,
+        the attacks for every masked occupancy.
+    """
+    masks, tables = [], []
+    for i, j in SQUARE_COORDINATES:
+        mask, table = 0, {0: 0}
+        for direction in directions:
+            ray_table = build_ray_table(i, j, direction)
+            table = {occupancy | ray_occupancy: attacks | ray_attacks
+                     for occupancy, attacks in table.items() for ray_occupancy, ray_attacks in ray_table}
+            mask |= ray_table[-1][0]
+        masks.append(mask)
+        tables.append(table)
+    return masks, tables
+
+
+ROOK_MASKS, ROOK_ATTACKS = build_sliding_tables(ROOK_DIRECTIONS)
+BISHOP_MASKS, BISHOP_ATTACKS = build_sliding_tables(BISHOP_DIRECTIONS)
+
+
+def get_rook_attacks(square : int, occupancy : int) -> int:
+    """Finds the squares attacked by a rook.
+
+    Args:
+        square (int): The square index of the rook.
+        occupancy (int): Bitboard of all the pieces on the board.
+
+    Returns:
+        int: The attack bitboard (including the first piece met on each ray).
+    """
+    return ROOK_ATTACKS[square][occupancy & ROOK_MASKS[square]]
+
+
+def get_bishop_attacks(square : int, occupancy : int) -> int:
+    """Finds the squares attacked by a bishop.
+
+    Args:
+        square (int): The square index of the bishop.
+        occupancy (int): Bitboard of all the pieces on the board.
+
+    Returns:
+        int: The attack bitboard (including the first piece met on each ray).
+    """
+    return BISHOP_ATTACKS[square][occupancy & BISHOP_MASKS[square]]
+
+
+def get_queen_attacks(square : int, occupancy : int) -> int:
+    """Finds the squares attacked by a queen, using the rook and bishop tables.
+
+    Args:
+        square (int): The square index of the queen.
+        occupancy (int): Bitboard of all the pieces on the board.
+
+    Returns:
+        int: The attack bitboard (including the first piece met on each ray).
+    """
+    return ROOK_ATTACKS[square][occupancy & ROOK_MASKS[square]] | BISHOP_ATTACKS[square][occupancy & BISHOP_MASKS[square]]
+
+
+def build_squares_between() -> list[list[int]]:
+    """Builds the bitboard of the squares strictly between two squares on the same rank, file or diagonal.
+
+    Returns:
+        list[list[int]]: SQUARES_BETWEEN[a][b], 0 if a and b aren't aligned or are next to each other.
+    """
+    squares_between = [[0] * 64 for _ in range(64)]
+    for a in range(64):
+        for b in range(64):
+            if a == b:
+                continue
+            #Attacks from both squares towards each other only meet between them
+            if get_rook_attacks(a, 0) & (1 << b):
+                squares_between[a][b] = get_rook_attacks(a, 1 << b) & get_rook_attacks(b, 1 << a)
+            elif get_bishop_attacks(a, 0) & (1 << b):
+                squares_between[a][b] = get_bishop_attacks(a, 1 << b) & get_bishop_attacks(b, 1 << a)
+    return squares_between
+
+
+SQUARES_BETWEEN = build_squares_between()
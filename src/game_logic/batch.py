@@ -0,0 +1,362 @@
+### This file computes attack maps, checks and move counts for many positions at once with NumPy, for dataset labelling. ###
+#Every function works on a whole batch: bitboards is an (N, 12) uint64 array with the piece bitboards of N positions
+#in the order of Game.bitboards (WP..BK). Instead of looping over the pieces of each position, every piece type is
+#moved at once by shifting its bitboards, and the sliding attacks are found with Kogge-Stone fills: a ray is filled
+#through the empty squares in 3 shifts of 1, 2 and 4 steps instead of 7 steps of one square.
+#NumPy is only needed by this file, the rest of Catfish runs without it.
+
+import random
+import time
+from itertools import chain
+
+import numpy as np
+
+from game_logic.game_state import Game, WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE
+from game_logic.move import WP, WN, WB, WR, WQ, WK, BP, BK
+from game_logic.attack_tables import ROOK_DIRECTIONS, BISHOP_DIRECTIONS, KNIGHT_DIRECTIONS, KING_DIRECTIONS
+from game_logic.move_generation import get_all_possible_moves, is_in_check
+from game_logic.legal_move_generation import get_all_legal_moves_masked
+from game_logic.perft import PERFT_POSITIONS
+
+RANK_3, RANK_6 = np.uint64(0xFF << 16), np.uint64(0xFF << 40)
+RANK_1, RANK_8 = np.uint64(0xFF), np.uint64(0xFF << 56)
+#Squares between the king and the rook which must be empty, and squares the king crosses which mustn't be attacked
+CASTLING_CONDITIONS = (
+    (WHITE_KINGSIDE, True, np.uint64((1 << 5) | (1 << 6)), np.uint64((1 << 4) | (1 << 5) | (1 << 6))),
+    (WHITE_QUEENSIDE, True, np.uint64((1 << 1) | (1 << 2) | (1 << 3)), np.uint64((1 << 2) | (1 << 3) | (1 << 4))),
+    (BLACK_KINGSIDE, False, np.uint64((1 << 61) | (1 << 62)), np.uint64((1 << 60) | (1 << 61) | (1 << 62))),
+    (BLACK_QUEENSIDE, False, np.uint64((1 << 57) | (1 << 58) | (1 << 59)), np.uint64((1 << 58) | (1 << 59) | (1 << 60))),
+)
+
+
+def build_file_wrap_mask(dj : int) -> np.uint64:
+    """Builds the mask of the squares a piece can reach when it moves dj files: the others wrapped around the board.
+
+    Args:
+        dj (int): The number of files moved, to the h-file if positive.
+
+    Returns:
+        np.uint64: The bitboard of the valid target squares.
+    """
+    mask = 0
+    for square in range(64):
+        if 0 <= (square & 7) - dj <= 7:
+            mask |= 1 << square
+    return np.uint64(mask)
+
+
+#Wrap mask of each file offset a shift can have (up to 4 files for the last Kogge-Stone step)
+WRAP_MASKS = {dj: build_file_wrap_mask(dj) for dj in range(-4, 5)}
+
+
+def shift(bitboards : np.ndarray, di : int, dj : int) -> np.ndarray:
+    """Moves every square of the bitboards di ranks and dj files, dropping the squares which leave the board.
+
+    Args:
+        bitboards (np.ndarray): The uint64 bitboards.
+        di (int): The number of ranks, to the 8th rank if positive.
+        dj (int): The number of files, to the h-file if positive.
+
+    Returns:
+        np.ndarray: The shifted bitboards.
+    """
+    step = 8*di + dj
+    shifted = bitboards << np.uint64(step) if step > 0 else bitboards >> np.uint64(-step)
+    return shifted & WRAP_MASKS[dj] if dj else shifted
+
+
+def get_ray_attacks(sliders : np.ndarray, empty : np.ndarray, direction : tuple[int, int]) -> np.ndarray:
+    """Finds the squares attacked in one direction by sliding pieces, with a Kogge-Stone occluded fill.
+    The ray of a piece stops on the first occupied square (attacked), so the rays of two pieces never overlap.
+
+    Args:
+        sliders (np.ndarray): The uint64 bitboards of the sliding pieces.
+        empty (np.ndarray): The uint64 bitboards of the empty squares.
+        direction (tuple[int, int]): The (di,dj) step of the ray.
+
+    Returns:
+        np.ndarray: The attacked squares.
+    """
+    di, dj = direction
+    #A square wrapped around the board can't be filled through
+    empty = empty & WRAP_MASKS[dj] if dj else empty
+    filled = sliders | (empty & shift(sliders, di, dj))
+    empty = empty & shift(empty, di, dj)
+    filled |= empty & shift(filled, 2*di, 2*dj)
+    empty = empty & shift(empty, 2*di, 2*dj)
+    filled |= empty & shift(filled, 4*di, 4*dj)
+    return shift(filled, di, dj)
+
+
+def popcount(bitboards : np.ndarray) -> np.ndarray:
+    """Counts the set squares of each bitboard.
+
+    Args:
+        bitboards (np.ndarray): The uint64 bitboards.
+
+    Returns:
+        np.ndarray: The number of set squares of each bitboard (int64).
+    """
+    if hasattr(np, "bitwise_count"): #NumPy 2.0+
+        return np.bitwise_count(bitboards).astype(np.int64)
+    #SWAR count: bits counted in pairs, then nibbles, then bytes summed by the multiplication
+    bitboards = bitboards - ((bitboards >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    bitboards = (bitboards & np.uint64(0x3333333333333333)) + ((bitboards >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    bitboards = (bitboards + (bitboards >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return ((bitboards * np.uint64(0x0101010101010101)) >> np.uint64(56)).astype(np.int64)
+
+
+def games_to_arrays(games : list[Game]) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Packs the positions of games into the arrays used by the batch functions.
+
+    Args:
+        games (list[Game]): The game states.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: The (N, 12) uint64 piece bitboards, the (N,) side to move
+        (True for white), the (N,) en passant squares (0 if none) and the (N,) castling rights.
+    """
+    #fromiter converts the ints one by one without building nested lists, several times faster than np.array here
+    count = len(games)
+    bitboards = np.fromiter(chain.from_iterable(game.bitboards[:12] for game in games), dtype=np.uint64, count=12 * count).reshape(count, 12)
+    white_to_move = np.fromiter((game.white_to_move for game in games), dtype=bool, count=count)
+    en_passant_squares = np.fromiter((game.en_passant_square for game in games), dtype=np.uint8, count=count)
+    castling_rights = np.fromiter((game.castling_rights for game in games), dtype=np.uint8, count=count)
+    return bitboards, white_to_move, en_passant_squares, castling_rights
+
+
+def get_occupancies(bitboards : np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Finds the squares occupied by each side.
+
+    Args:
+        bitboards (np.ndarray): The (N, 12) uint64 piece bitboards.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: The white pieces, the black pieces and all pieces.
+    """
+    white_pieces = np.bitwise_or.reduce(bitboards[:, WP:WK + 1], axis=1)
+    black_pieces = np.bitwise_or.reduce(bitboards[:, BP:BK + 1], axis=1)
+    return white_pieces, black_pieces, white_pieces | black_pieces
+
+
+def get_side_attacks(bitboards : np.ndarray, white : bool, empty : np.ndarray) -> np.ndarray:
+    """Finds the squares attacked by one side.
+
+    Args:
+        bitboards (np.ndarray): The (N, 12) uint64 piece bitboards.
+        white (bool): Are the attacks of white computed?
+        empty (np.ndarray): The uint64 bitboards of the empty squares.
+
+    Returns:
+        np.ndarray: The attacked squares of each position.
+    """
+    offset, forward = (0, 1) if white else (BP - WP, -1)
+    pawns, knights, king = bitboards[:, WP + offset], bitboards[:, WN + offset], bitboards[:, WK + offset]
+    queens = bitboards[:, WQ + offset]
+    rooks, bishops = bitboards[:, WR + offset] | queens, bitboards[:, WB + offset] | queens
+
+    attacks = shift(pawns, forward, -1) | shift(pawns, forward, 1)
+    for di, dj in KNIGHT_DIRECTIONS:
+        attacks |= shift(knights, di, dj)
+    for di, dj in KING_DIRECTIONS:
+        attacks |= shift(king, di, dj)
+    for direction in ROOK_DIRECTIONS:
+        attacks |= get_ray_attacks(rooks, empty, direction)
+    for direction in BISHOP_DIRECTIONS:
+        attacks |= get_ray_attacks(bishops, empty, direction)
+    return attacks
+
+
+def get_attack_maps(bitboards : np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Finds the squares attacked by each side in a batch of positions.
+
+    Args:
+        bitboards (np.ndarray): The (N, 12) uint64 piece bitboards.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The (N,) uint64 bitboards of the squares attacked by white and by black.
+    """
+    empty = ~get_occupancies(bitboards)[2]
+    return get_side_attacks(bitboards, True, empty), get_side_attacks(bitboards, False, empty)
+
+
+def get_in_check(bitboards : np.ndarray, white_to_move : np.ndarray) -> np.ndarray:
+    """Checks if the king of the side to move is attacked in a batch of positions.
+
+    Args:
+        bitboards (np.ndarray): The (N, 12) uint64 piece bitboards.
+        white_to_move (np.ndarray): The (N,) side to move, True for white.
+
+    Returns:
+        np.ndarray: The (N,) in check flags.
+    """
+    white_attacks, black_attacks = get_attack_maps(bitboards)
+    return np.where(white_to_move, bitboards[:, WK] & black_attacks, bitboards[:, BK] & white_attacks) != 0
+
+
+def count_side_moves(bitboards : np.ndarray, white : bool, occupancies : tuple[np.ndarray, np.ndarray, np.ndarray],
+                     ennemy_attacks : np.ndarray, en_passant : np.ndarray, castling_rights : np.ndarray) -> np.ndarray:
+    """Counts the pseudo-legal moves of one side, like len(get_all_possible_moves(...)) with this side to move.
+
+    Args:
+        bitboards (np.ndarray): The (N, 12) uint64 piece bitboards.
+        white (bool): Are the moves of white counted?
+        occupancies (tuple[np.ndarray, np.ndarray, np.ndarray]): The white pieces, the black pieces and all pieces.
+        ennemy_attacks (np.ndarray): The squares attacked by the other side, which the king can't castle through.
+        en_passant (np.ndarray): The uint64 bitboards of the en passant squares (0 if none).
+        castling_rights (np.ndarray): The (N,) castling rights.
+
+    Returns:
+        np.ndarray: The (N,) number of moves (int64).
+    """
+    white_pieces, black_pieces, all_pieces = occupancies
+    empty = ~all_pieces
+    if white:
+        offset, forward, ally_pieces, ennemy_pieces, double_push_rank, last_rank = 0, 1, white_pieces, black_pieces, RANK_3, RANK_8
+    else:
+        offset, forward, ally_pieces, ennemy_pieces, double_push_rank, last_rank = BP - WP, -1, black_pieces, white_pieces, RANK_6, RANK_1
+    targets = ~ally_pieces
+    pawns, knights, king = bitboards[:, WP + offset], bitboards[:, WN + offset], bitboards[:, WK + offset]
+    queens = bitboards[:, WQ + offset]
+    rooks, bishops = bitboards[:, WR + offset] | queens, bitboards[:, WB + offset] | queens
+
+    #Pawns: a move to the last rank is 4 promotions
+    single_pushes = shift(pawns, forward, 0) & empty
+    pawn_moves = single_pushes & ~last_rank
+    promotions = single_pushes & last_rank
+    count = popcount(shift(single_pushes & double_push_rank, forward, 0) & empty)
+    for dj in (-1, 1):
+        captures = shift(pawns, forward, dj)
+        count += popcount(captures & en_passant)
+        captures &= ennemy_pieces
+        count += popcount(captures & ~last_rank) + 4 * popcount(captures & last_rank)
+    count += popcount(pawn_moves) + 4 * popcount(promotions)
+
+    #Pieces: a shift moves every piece of a type at once, and each (piece, target) pair is one set square of one direction
+    for di, dj in KNIGHT_DIRECTIONS:
+        count += popcount(shift(knights, di, dj) & targets)
+    for di, dj in KING_DIRECTIONS:
+        count += popcount(shift(king, di, dj) & targets)
+    for direction in ROOK_DIRECTIONS:
+        count += popcount(get_ray_attacks(rooks, empty, direction) & targets)
+    for direction in BISHOP_DIRECTIONS:
+        count += popcount(get_ray_attacks(bishops, empty, direction) & targets)
+
+    #Castling, with the king on its initial square
+    king_square = np.uint64(1 << 4) if white else np.uint64(1 << 60)
+    for right, is_white, between, crossed in CASTLING_CONDITIONS:
+        if is_white == white:
+            count += (((castling_rights & right) != 0) & ((king & king_square) != 0)
+                      & ((all_pieces & between) == 0) & ((ennemy_attacks & crossed) == 0))
+    return count
+
+
+def count_pseudo_legal_moves(bitboards : np.ndarray, white_to_move : np.ndarray, en_passant_squares : np.ndarray|None = None,
+                             castling_rights : np.ndarray|None = None) -> np.ndarray:
+    """Counts the pseudo-legal moves of the side to move in a batch of positions, the same count as
+    len(get_all_possible_moves(...)): a promotion is 4 moves, and castling through an attacked square isn't counted.
+
+    Args:
+        bitboards (np.ndarray): The (N, 12) uint64 piece bitboards.
+        white_to_move (np.ndarray): The (N,) side to move, True for white.
+        en_passant_squares (np.ndarray | None): The (N,) en passant squares, 0 if none. No en passant if None.
+        castling_rights (np.ndarray | None): The (N,) castling rights. No castling if None.
+
+    Returns:
+        np.ndarray: The (N,) number of moves (int64).
+    """
+    return analyse_batch(bitboards, white_to_move, en_passant_squares, castling_rights)[3]
+
+
+def analyse_batch(bitboards : np.ndarray, white_to_move : np.ndarray, en_passant_squares : np.ndarray|None = None,
+                  castling_rights : np.ndarray|None = None) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Finds the attack maps, the check flags and the pseudo-legal move counts of a batch of positions, computing the
+    attack maps only once (the move counts need them for castling).
+
+    Args:
+        bitboards (np.ndarray): The (N, 12) uint64 piece bitboards.
+        white_to_move (np.ndarray): The (N,) side to move, True for white.
+        en_passant_squares (np.ndarray | None): The (N,) en passant squares, 0 if none. No en passant if None.
+        castling_rights (np.ndarray | None): The (N,) castling rights. No castling if None.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: The squares attacked by white, the squares attacked by
+        black, the in check flags and the number of moves (see count_pseudo_legal_moves).
+    """
+    occupancies = get_occupancies(bitboards)
+    empty = ~occupancies[2]
+    white_attacks, black_attacks = get_side_attacks(bitboards, True, empty), get_side_attacks(bitboards, False, empty)
+    in_check = np.where(white_to_move, bitboards[:, WK] & black_attacks, bitboards[:, BK] & white_attacks) != 0
+
+    if en_passant_squares is None:
+        en_passant = np.zeros(len(bitboards), dtype=np.uint64)
+    else:
+        en_passant_squares = np.asarray(en_passant_squares, dtype=np.uint64)
+        en_passant = np.where(en_passant_squares != 0, np.uint64(1) << en_passant_squares, np.uint64(0))
+    if castling_rights is None:
+        castling_rights = np.zeros(len(bitboards), dtype=np.uint8)
+
+    white_counts = count_side_moves(bitboards, True, occupancies, black_attacks, en_passant, castling_rights)
+    black_counts = count_side_moves(bitboards, False, occupancies, white_attacks, en_passant, castling_rights)
+    return white_attacks, black_attacks, in_check, np.where(white_to_move, white_counts, black_counts)
+
+
+def random_games(count : int, max_plies : int = 80, seed : int = 0) -> list[Game]:
+    """Builds positions for benchmarks by playing random games from the perft positions and keeping every position.
+
+    Args:
+        count (int): The number of positions.
+        max_plies (int): The longest random game.
+        seed (int): The seed of the random moves, so the positions are the same every run.
+
+    Returns:
+        list[Game]: The games, one per position.
+    """
+    generator = random.Random(seed)
+    games = []
+    while len(games) < count:
+        game = Game(generator.choice(PERFT_POSITIONS)["fen"])
+        for _ in range(max_plies):
+            moves = get_all_legal_moves_masked(game)
+            if not moves or len(games) == count:
+                break
+            game.make_move(generator.choice(moves))
+            games.append(game.copy())
+    return games
+
+
+def benchmark_batch(count : int = 10000, seed : int = 0) -> tuple[float, float]:
+    """Times the move counts and check flags of random positions with the batch functions (attack maps included)
+    and with the scalar generator (one get_all_possible_moves and is_in_check per Game), checks that they agree and
+    prints the speedup, with and without the time taken to pack the games into arrays.
+
+    Args:
+        count (int): The number of positions.
+        seed (int): The seed of the random positions.
+
+    Returns:
+        tuple[float, float]: The scalar and the batch time in seconds (packing excluded).
+
+    Raises:
+        RuntimeError: If the batch and the scalar results differ.
+    """
+    games = random_games(count, seed=seed)
+
+    start = time.perf_counter()
+    scalar_counts = [len(get_all_possible_moves(game.bitboards, game.en_passant_square, game.white_to_move, game.castling_rights)) for game in games]
+    scalar_checks = [is_in_check(game) for game in games]
+    scalar_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bitboards, white_to_move, en_passant_squares, castling_rights = games_to_arrays(games)
+    packing_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    _, _, batch_checks, batch_counts = analyse_batch(bitboards, white_to_move, en_passant_squares, castling_rights)
+    batch_seconds = time.perf_counter() - start
+
+    if batch_counts.tolist() != scalar_counts or batch_checks.tolist() != scalar_checks:
+        raise RuntimeError("The batch results differ from the scalar move generator")
+    print(f"{'path':>14} {'positions':>9} {'time (s)':>9} {'positions/s':>12} {'speedup':>8}")
+    for name, seconds in (("scalar", scalar_seconds), ("batch", batch_seconds), ("batch+packing", batch_seconds + packing_seconds)):
+        print(f"{name:>14} {count:>9} {seconds:>9.3f} {count / seconds:>12.0f} {scalar_seconds / seconds:>8.1f}")
+    return scalar_seconds, batch_seconds
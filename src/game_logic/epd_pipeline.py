@@ -0,0 +1,137 @@
+### This file implements a streaming pipeline analysing large files of positions (FEN or EPD lines) with a pool of processes. ###
+#The lines are read lazily and grouped in chunks, one chunk per task. At most max_pending chunks are in the pool at a
+#time: the next chunk is only read once the oldest one is done and handed to the caller, so the memory doesn't grow
+#with the file and the results come out in the order of the input.
+
+import multiprocessing
+from collections import deque
+from itertools import islice
+from typing import Iterable, Iterator
+
+from game_logic.game_state import Game
+from game_logic.move import move_to_uci
+from game_logic.move_generation import is_in_check
+from game_logic.legal_move_generation import get_all_legal_moves_masked
+from game_logic.search import Search
+from game_logic.transposition_table import TranspositionTable
+
+#Classification of a position
+NORMAL, CHECK, CHECKMATE, STALEMATE, INVALID = "normal", "check", "checkmate", "stalemate", "invalid"
+RESULT_FIELDS = ("fen", "legal_moves", "status", "best_move", "score")
+
+
+def read_positions(lines : Iterable[str]) -> Iterator[str]:
+    """Gives the positions of FEN or EPD lines one at a time, skipping blank lines and "#" comments.
+    The EPD operations after the 4 position fields (e.g. "bm Nf3;") are kept: Game ignores them.
+
+    Args:
+        lines (Iterable[str]): The lines, e.g. an open file.
+
+    Yields:
+        str: Each position line, without the surrounding whitespace.
+    """
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield line
+
+
+def analyse_position(fen : str, depth : int, hash_size_mb : float) -> tuple[str, int, str, str, int|None]:
+    """Counts the legal moves of a position, classifies it and finds its best move with a fixed-depth search.
+
+    Args:
+        fen (str): The position.
+        depth (int): The depth of the search, 0 for no search.
+        hash_size_mb (float): The size of the transposition table of the search in MB.
+
+    Returns:
+        tuple[str, int, str, str, int | None]: The position, the number of legal moves, the status (NORMAL, CHECK,
+        CHECKMATE, STALEMATE, or INVALID if Game rejects the FEN), the best move in UCI notation ("" if there is none
+        or no search) and its score in centipawns for the side to move (None if there is no search).
+    """
+    #Game only accepts positions the move generators can play (see Game.load_fen)
+    try:
+        game = Game(fen)
+    except ValueError:
+        return fen, 0, INVALID, "", None
+
+    legal_moves = get_all_legal_moves_masked(game)
+    in_check = is_in_check(game)
+    if not legal_moves:
+        return fen, 0, CHECKMATE if in_check else STALEMATE, "", None
+
+    best_move, score = "", None
+    if depth > 0:
+        #A new table for every position, so the result doesn't depend on which positions the worker analysed before
+        info = Search(game, transposition_table=TranspositionTable(hash_size_mb)).search(max_depth=depth)
+        best_move, score = move_to_uci(info.pv[0]), info.score
+    return fen, len(legal_moves), CHECK if in_check else NORMAL, best_move, score
+
+
+def analyse_chunk(task : tuple[list[str], int, float]) -> list[tuple[str, int, str, str, int|None]]:
+    """Analyses a chunk of positions (run in a worker process).
+
+    Args:
+        task (tuple[list[str], int, float]): The positions, the search depth and the size of the transposition table in MB.
+
+    Returns:
+        list[tuple[str, int, str, str, int | None]]: The result of each position (see analyse_position), in order.
+    """
+    positions, depth, hash_size_mb = task
+    return [analyse_position(fen, depth, hash_size_mb) for fen in positions]
+
+
+def iter_chunks(positions : Iterable[str], chunk_size : int) -> Iterator[list[str]]:
+    """Groups positions in lists, reading only one list ahead.
+
+    Args:
+        positions (Iterable[str]): The positions.
+        chunk_size (int): The number of positions per list (the last one can be shorter).
+
+    Yields:
+        list[str]: The next positions.
+    """
+    positions = iter(positions)
+    while True:
+        chunk = list(islice(positions, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_pipeline(positions : Iterable[str], depth : int = 0, workers : int = 1, chunk_size : int = 256, max_pending : int|None = None,
+                 hash_size_mb : float = 1) -> Iterator[tuple[str, int, str, str, int|None]]:
+    """Analyses a stream of positions, in this process if there is one worker, else in a pool of processes.
+
+    Args:
+        positions (Iterable[str]): The positions. They are read as the results are consumed.
+        depth (int): The depth of the search for the best move, 0 for no search.
+        workers (int): The number of worker processes.
+        chunk_size (int): The number of positions sent to a worker at a time.
+        max_pending (int | None): The largest number of chunks read but not yet consumed, 2 per worker if None.
+        hash_size_mb (float): The size of the transposition table of each search in MB.
+
+    Yields:
+        tuple[str, int, str, str, int | None]: The result of each position (see analyse_position), in the input order.
+
+    Raises:
+        ValueError: If the chunk size isn't positive.
+    """
+    if chunk_size < 1:
+        raise ValueError(f"The chunk size must be positive, got {chunk_size}")
+    chunks = iter_chunks(positions, chunk_size)
+    if workers <= 1:
+        for chunk in chunks:
+            yield from analyse_chunk((chunk, depth, hash_size_mb))
+        return
+
+    max_pending = max_pending or 2 * workers
+    with multiprocessing.Pool(workers) as pool:
+        #Oldest chunk first: its results are handed out before the ones of the chunks sent after it
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(analyse_chunk, ((chunk, depth, hash_size_mb),)))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().get()
+        while pending:
+            yield from pending.popleft().get()
@@ -0,0 +1,30 @@
+### This file implements the static evaluation of a position used by the search. ###
+
+from game_logic.game_state import Game
+from game_logic.move import WP, BP
+from game_logic.piece_square_tables import MAX_PHASE
+from game_logic.pawn_structure import PawnHashTable
+
+#Pawn structures change rarely during a search, so their evaluation is cached
+PAWN_HASH_TABLE = PawnHashTable()
+
+
+def evaluate(game : Game, pawn_hash_table : PawnHashTable = PAWN_HASH_TABLE) -> int:
+    """Evaluates a position from the material and piece-square totals kept by Game and the cached pawn structure score,
+    blending the middlegame and the endgame scores by the game phase (tapered evaluation).
+
+    Args:
+        game (Game): The game state.
+        pawn_hash_table (PawnHashTable): The cache of pawn structure evaluations.
+
+    Returns:
+        int: The score in centipawns, positive if the side to move is ahead.
+    """
+    pawn_entry = pawn_hash_table.get_entry(game.pawn_hash, game.bitboards[WP], game.bitboards[BP])
+    middlegame_score = game.middlegame_score + pawn_entry.middlegame_score
+    endgame_score = game.endgame_score + pawn_entry.endgame_score
+
+    #More pieces than at the start (promotions) still count as the middlegame
+    phase = min(game.phase, MAX_PHASE)
+    score = (middlegame_score * phase + endgame_score * (MAX_PHASE - phase)) // MAX_PHASE
+    return score if game.white_to_move else -score
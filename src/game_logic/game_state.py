@@ -1,297 +1,485 @@
 ### This file implements the Game class which is used to store information about the current chess game. ###
 
-from game_logic.move import Move
+from game_logic.move import (PIECE_INDICES, DOUBLE_PAWN_PUSH, EN_PASSANT, CASTLING,
+                             WP, WK, WR, BP, BK, BR)
+from game_logic.zobrist import PIECE_SQUARE_KEYS, CASTLING_KEYS, EN_PASSANT_KEYS, BLACK_TO_MOVE_KEY, compute_hash, compute_pawn_hash
+from game_logic.piece_square_tables import MIDDLEGAME_SCORES, ENDGAME_SCORES, PHASE_WEIGHTS, compute_scores
+
+STARTING_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+#Indices of the color and occupancy bitboards in Game.bitboards, after the twelve piece bitboards
+WHITE_PIECES, BLACK_PIECES, ALL_PIECES = 12, 13, 14
+#Index in Game.bitboards of every tag, for code that uses the tags ("wP", ..., "white", "black", "game")
+BITBOARD_INDICES = dict(PIECE_INDICES, white=WHITE_PIECES, black=BLACK_PIECES, game=ALL_PIECES)
+
+#Castling rights, stored as bits of Game.castling_rights
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+#Rights kept when a piece leaves or arrives on each square: moving the king or a rook, or capturing a rook, loses rights
+CASTLING_RIGHTS_MASKS = [15] * 64
+CASTLING_RIGHTS_MASKS[4] = 15 ^ (WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_RIGHTS_MASKS[7] = 15 ^ WHITE_KINGSIDE
+CASTLING_RIGHTS_MASKS[0] = 15 ^ WHITE_QUEENSIDE
+CASTLING_RIGHTS_MASKS[60] = 15 ^ (BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_RIGHTS_MASKS[63] = 15 ^ BLACK_KINGSIDE
+CASTLING_RIGHTS_MASKS[56] = 15 ^ BLACK_QUEENSIDE
+#The first and last ranks, where no pawn can stand
+BACK_RANKS = 0xFF | (0xFF << 56)
 
 class Game:
-    def __init__(self):
+    def __init__(self, fen : str = STARTING_FEN, debug : bool = False):
         #From white's perspective:
         #Bottom left square has index 0, bottom right square has index 7, top left square has index 56, top square has index 63.
         #+1 to a square's index when going right and +8 when going up.
-        self.bitboards = {"wP": 65280, "wN": 66, "wB": 36, "wR": 129, "wQ": 8, "wK": 16,
-                          "bP": 65280 << 40, "bN": 66 << 56, "bB": 36 << 56, "bR": 129 << 56, "bQ": 8 << 56, "bK": 16 << 56,
-                          "white": 65535, "black": 65535 << 48, "game": 65535 + (65535 << 48)}
+        #One bitboard per piece index (see PIECE_TAGS), then the white, black and game (all pieces) bitboards.
+        self.bitboards = [0] * 15
+        #Mailbox: the piece index on each square, None if the square is empty
+        self.board = [None] * 64
 
         #Whose turn it is
         self.white_to_move = True
 
-        #En passant info
-        self.en_passant_square = [(0,0)]
+        #En passant info: index of the square behind a pawn that just moved two squares, 0 if none
+        self.en_passant_square = 0
 
-        #Castling info
-        self.wk_can_kingside_castle = [True]
-        self.bk_can_kingside_castle = [True]
-        self.wk_can_queenside_castle = [True]
-        self.bk_can_queenside_castle = [True]
+        #Castling info: WHITE_KINGSIDE | WHITE_QUEENSIDE | BLACK_KINGSIDE | BLACK_QUEENSIDE if every castle is available
+        self.castling_rights = 15
 
-        #Other useful info
-        self.moves = []
-        self.captures = []
+        #Zobrist key of the position, updated by every move (see zobrist.py)
+        self.hash = 0
+        #Zobrist key of the pawns only, for the pawn structure cache
+        self.pawn_hash = 0
 
-    def update_color_and_game_bitboard(self) -> None:
-        """Updates self.bitboards["white"/"black"/"game"].
-        """
-        white_piece_tags = ["wP", "wN", "wB", "wR", "wQ", "wK"]
-        black_piece_tags = ["bP", "bN", "bB", "bR", "bQ", "bK"]
+        #Running totals of the evaluation (see piece_square_tables.py), updated by every move:
+        #material and piece-square scores from white's point of view for the middlegame and the endgame, and the game phase
+        self.middlegame_score = 0
+        self.endgame_score = 0
+        self.phase = 0
 
-        new_white_bitboard, new_black_bitboard = 0, 0
-        for piece_tags in zip(white_piece_tags, black_piece_tags):
-            new_white_bitboard += self.bitboards[piece_tags[0]]
-            new_black_bitboard += self.bitboards[piece_tags[1]]
+        #One record per move played: (move, castling rights before, en passant square before, captured piece, hash before,
+        #middlegame score before, endgame score before, phase before, pawn hash before)
+        self.history = []
 
-        self.bitboards["white"] = new_white_bitboard
-        self.bitboards["black"] = new_black_bitboard
-        self.bitboards["game"] = new_white_bitboard + new_black_bitboard 
+        #Debug mode: the hashes and the evaluation totals are recomputed from scratch after every move and undo
+        #and must match the incremental ones
+        self.debug = debug
 
+        self.load_fen(fen)
 
-    def make_regular_move(self, move : Move) -> None:
-        """Updates the game's attributes to make a regular move.
+    def load_fen(self, fen : str) -> None:
+        """Sets up the game from a FEN string. The move history is cleared.
 
         Args:
-            move (Move): The legal move that was played.
+            fen (str): The position in Forsyth-Edwards Notation. The move counters are optional.
+
+        Raises:
+            ValueError: If the FEN string is malformed, or describes a position the move generators can't play: not
+                exactly one king per side, a pawn on the first or last rank, the side not to move in check, or an
+                en passant square which isn't empty and behind a pawn that just moved two squares.
         """
-        #Updating the bitboard of the piece that is moved
-        init_index = move.init_square[0]*8 + move.init_square[1]
-        final_index = move.final_square[0]*8 + move.final_square[1]
-        mask = (1 << init_index) + (1 << final_index)
-        self.bitboards[move.piece_tag] ^= mask       
-
-        #Change the bitboard of a captured if the move is a capture
-        color_piece_tags = ["bP", "bN", "bB", "bR", "bQ", "bK"] if self.white_to_move else ["wP", "wN", "wB", "wR", "wQ", "wK"]
-        capture = None
-        for piece_tag in color_piece_tags:
-            if self.bitboards[piece_tag] & (1 << final_index):
-                self.bitboards[piece_tag] ^= (1 << final_index)
-                capture = piece_tag
-                break
-        self.captures.append(capture)
-
-        #Update white, black and game bitboard
+        #Imported here: move_generation imports this module
+        from game_logic.move_generation import is_square_attacked
+
+        fields = fen.split()
+        if len(fields) < 4:
+            raise ValueError(f"Invalid FEN (expected at least 4 fields): {fen!r}")
+        placement, turn, castling, en_passant = fields[:4]
+
+        #Piece placement, from the 8th rank down to the 1st rank
+        ranks = placement.split("/")
+        if len(ranks) != 8:
+            raise ValueError(f"Invalid FEN (expected 8 ranks): {fen!r}")
+        bitboards, board = [0] * 15, [None] * 64
+        for i, rank in zip(range(7, -1, -1), ranks):
+            j = 0
+            for char in rank:
+                if char.isdigit():
+                    j += int(char)
+                    continue
+                piece_tag = ("w" if char.isupper() else "b") + char.upper()
+                if piece_tag not in PIECE_INDICES or j > 7:
+                    raise ValueError(f"Invalid FEN (bad rank {rank!r}): {fen!r}")
+                bitboards[PIECE_INDICES[piece_tag]] |= 1 << (i*8 + j)
+                board[i*8 + j] = PIECE_INDICES[piece_tag]
+                j += 1
+            if j != 8:
+                raise ValueError(f"Invalid FEN (bad rank {rank!r}): {fen!r}")
+
+        if turn not in ("w", "b"):
+            raise ValueError(f"Invalid FEN (bad side to move {turn!r}): {fen!r}")
+        white_to_move = turn == "w"
+
+        if bitboards[WK].bit_count() != 1 or bitboards[BK].bit_count() != 1:
+            raise ValueError(f"Invalid FEN (expected one king per side): {fen!r}")
+        if (bitboards[WP] | bitboards[BP]) & BACK_RANKS:
+            raise ValueError(f"Invalid FEN (pawn on the first or last rank): {fen!r}")
+        #The side which just moved can't have left its king in check
+        ennemy_king = bitboards[BK] if white_to_move else bitboards[WK]
+        if is_square_attacked(bitboards, ennemy_king.bit_length() - 1, white_to_move, sum(bitboards[:WHITE_PIECES])):
+            raise ValueError(f"Invalid FEN (the side not to move is in check): {fen!r}")
+
+        if en_passant == "-":
+            en_passant_square = 0
+        else:
+            #The empty square behind an ennemy pawn that just moved two squares: on the 6th rank if white is to move, else on the 3rd
+            rank, ennemy_pawn, pawn_offset = ("6", BP, -8) if white_to_move else ("3", WP, 8)
+            if len(en_passant) != 2 or en_passant[0] not in "abcdefgh" or en_passant[1] != rank:
+                raise ValueError(f"Invalid FEN (bad en passant square {en_passant!r}): {fen!r}")
+            en_passant_square = (int(rank) - 1)*8 + ord(en_passant[0]) - ord("a")
+            if board[en_passant_square] is not None or board[en_passant_square + pawn_offset] != ennemy_pawn:
+                raise ValueError(f"Invalid FEN (no pawn to take en passant on {en_passant!r}): {fen!r}")
+
+        self.bitboards = bitboards
+        self.board = board
         self.update_color_and_game_bitboard()
+        self.white_to_move = white_to_move
+        self.en_passant_square = en_passant_square
+
+        #Only keep the rights whose king and rook are on their original squares
+        self.castling_rights = 0
+        for char, right, king, king_square, rook, rook_square in (("K", WHITE_KINGSIDE, WK, 4, WR, 7), ("Q", WHITE_QUEENSIDE, WK, 4, WR, 0),
+                                                                 ("k", BLACK_KINGSIDE, BK, 60, BR, 63), ("q", BLACK_QUEENSIDE, BK, 60, BR, 56)):
+            if char in castling and board[king_square] == king and board[rook_square] == rook:
+                self.castling_rights |= right
+
+        self.hash = compute_hash(self.bitboards, self.white_to_move, self.castling_rights, self.en_passant_square)
+        self.pawn_hash = compute_pawn_hash(self.bitboards)
+        self.middlegame_score, self.endgame_score, self.phase = compute_scores(self.bitboards)
+        self.history = []
+
+    @property
+    def moves(self) -> list[int]:
+        """The moves played since the position was set up, oldest first.
+        """
+        return [record[0] for record in self.history]
 
-        #Change en passant conditions
-        self.en_passant_square.append(move.en_passant_square)
+    def copy(self) -> "Game":
+        """Copies the game, so the copy can be searched or modified (in another thread for example) without changing this one.
 
-        #Update castling info
-        #Can't castle if we move a rook/king or if a rook is captured or if castling wasn't available before 
-        if self.wk_can_kingside_castle[-1] and (self.bitboards["wR"] & 128) and (self.bitboards["wK"] == 16):
-            self.wk_can_kingside_castle.append(True)
-        else:
-            self.wk_can_kingside_castle.append(False)
-        if self.wk_can_queenside_castle[-1] and (self.bitboards["wR"] & 1) and (self.bitboards["wK"] == 16):
-            self.wk_can_queenside_castle.append(True)
-        else:
-            self.wk_can_queenside_castle.append(False)
-        if self.bk_can_kingside_castle[-1] and (self.bitboards["bR"] & (128 << 56)) and (self.bitboards["bK"] == (16 << 56)):
-            self.bk_can_kingside_castle.append(True)
-        else:
-            self.bk_can_kingside_castle.append(False)
-        if self.bk_can_queenside_castle[-1] and (self.bitboards["bR"] & (1 << 56)) and (self.bitboards["bK"] == (16 << 56)):
-            self.bk_can_queenside_castle.append(True)
-        else:
-            self.bk_can_queenside_castle.append(False)
+        Returns:
+            Game: An independent game with the same position and history.
+        """
+        game = Game.__new__(Game)
+        game.__dict__.update(self.__dict__)
+        game.bitboards = list(self.bitboards)
+        game.board = list(self.board)
+        game.history = list(self.history)
+        return game
 
-        #Change turn
-        self.white_to_move = not self.white_to_move
+    def get_bitboard(self, tag : str) -> int:
+        """Gives a bitboard from its tag, for code that still uses the tags.
+
+        Args:
+            tag (str): A piece tag ("wP", "bK", ...) or "white", "black" or "game".
+
+        Returns:
+            int: The bitboard.
+        """
+        return self.bitboards[BITBOARD_INDICES[tag]]
+
+    def update_color_and_game_bitboard(self) -> None:
+        """Recomputes the white, black and game bitboards from the piece bitboards when the position is set up.
+        Moves update them incrementally.
+        """
+        self.bitboards[WHITE_PIECES] = sum(self.bitboards[WP:BP])
+        self.bitboards[BLACK_PIECES] = sum(self.bitboards[BP:WHITE_PIECES])
+        self.bitboards[ALL_PIECES] = self.bitboards[WHITE_PIECES] + self.bitboards[BLACK_PIECES]
+
+    def check_incremental_state(self) -> None:
+        """Checks the incrementally updated hashes and evaluation totals against values computed from scratch (debug mode).
+
+        Raises:
+            AssertionError: If they differ.
+        """
+        expected = compute_hash(self.bitboards, self.white_to_move, self.castling_rights, self.en_passant_square)
+        assert self.hash == expected, f"Incremental hash {self.hash:016x} != recomputed hash {expected:016x} after {self.moves}"
+        expected = compute_pawn_hash(self.bitboards)
+        assert self.pawn_hash == expected, f"Incremental pawn hash {self.pawn_hash:016x} != recomputed pawn hash {expected:016x} after {self.moves}"
+        scores = (self.middlegame_score, self.endgame_score, self.phase)
+        expected = compute_scores(self.bitboards)
+        assert scores == expected, f"Incremental scores {scores} != recomputed scores {expected} after {self.moves}"
 
 
-    def make_en_passant_move(self, move : Move) -> None:
-        """Updates the game's attributes to make an en passant move.
+    def make_regular_move(self, move : int) -> int|None:
+        """Moves the pieces of a regular move.
 
         Args:
-            move (Move): The legal move that was played.
+            move (int): The legal move that was played.
+
+        Returns:
+            int | None: The piece index of the captured piece if any.
         """
-        #Updating the bitboard of the piece that is moved
-        init_index = move.init_square[0]*8 + move.init_square[1]
-        final_index = move.final_square[0]*8 + move.final_square[1]
-        mask = (1 << init_index) + (1 << final_index)
-        self.bitboards[move.piece_tag] ^= mask
-
-        #Change the bitboard of the captured piece 
-        ennemy_piece_tag = "bP" if self.white_to_move else "wP"     
-        index_en_passant_square = self.en_passant_square[-1][0]*8 + self.en_passant_square[-1][1]  
-        self.bitboards[ennemy_piece_tag] ^= (1 << index_en_passant_square)
-        self.captures.append(ennemy_piece_tag)
-
-        #Update white, black and game bitboard
-        self.update_color_and_game_bitboard()
+        bitboards, board = self.bitboards, self.board
+        #Updating the bitboards of the piece that is moved
+        init_index, final_index = move & 63, (move >> 6) & 63
+        piece = (move >> 12) & 15
+        mask = (1 << init_index) | (1 << final_index)
+        bitboards[piece] ^= mask
+        if self.white_to_move:
+            ally_color, ennemy_color = WHITE_PIECES, BLACK_PIECES
+        else:
+            ally_color, ennemy_color = BLACK_PIECES, WHITE_PIECES
+        bitboards[ally_color] ^= mask
 
-        #Reset en passant square
-        self.en_passant_square.append((0,0))
+        #Change the bitboards of a captured piece if the move is a capture, the mailbox tells which one
+        capture = board[final_index]
+        if capture is not None:
+            bitboards[capture] ^= (1 << final_index)
+            bitboards[ennemy_color] ^= (1 << final_index)
+            bitboards[ALL_PIECES] ^= (1 << init_index) #The final square stays occupied
+        else:
+            bitboards[ALL_PIECES] ^= mask
 
-        #Leave castling info unchanged, en passant doesn't affect castling
-        self.wk_can_kingside_castle.append(self.wk_can_kingside_castle[-1])
-        self.bk_can_kingside_castle.append(self.bk_can_kingside_castle[-1]) 
-        self.wk_can_queenside_castle.append(self.wk_can_queenside_castle[-1])
-        self.bk_can_queenside_castle.append(self.bk_can_queenside_castle[-1])
+        #Replace the pawn by the chosen piece if the move is a promotion
+        if move >> 20:
+            bitboards[piece] ^= (1 << final_index)
+            piece = move >> 20
+            bitboards[piece] ^= (1 << final_index)
 
-        #Change turn
-        self.white_to_move = not self.white_to_move    
+        board[init_index] = None
+        board[final_index] = piece
 
+        return capture
 
-    def make_castling_move(self, move : Move) -> None: 
-        """Updates the game's attribute after castling. 
+
+    def make_en_passant_move(self, move : int) -> int:
+        """Moves the pieces of an en passant move.
 
         Args:
-            move (Move): The legal move to be played.
+            move (int): The legal move that was played.
+
+        Returns:
+            int: The piece index of the captured pawn.
         """
+        bitboards, board = self.bitboards, self.board
+        #Updating the bitboards of the piece that is moved
+        init_index, final_index = move & 63, (move >> 6) & 63
+        piece = (move >> 12) & 15
+        mask = (1 << init_index) | (1 << final_index)
+
+        #The captured pawn is behind the final square
         if self.white_to_move:
-            self.wk_can_kingside_castle.append(False)
-            self.wk_can_queenside_castle.append(False)
-            self.bk_can_kingside_castle.append(self.bk_can_kingside_castle[-1])
-            self.bk_can_queenside_castle.append(self.bk_can_queenside_castle[-1])
-            if move.final_square[1] == 2: #Queenside
-                rook_mask = 1 + (1<<3)
-                self.bitboards["wR"] ^= rook_mask
-                self.bitboards["wK"] = 1<<2
-            else: #Kingside
-                rook_mask = (1<<7) + (1<<5)
-                self.bitboards["wR"] ^= rook_mask
-                self.bitboards["wK"] = 1<<6
+            ally_color, ennemy_color, ennemy_piece, captured_index = WHITE_PIECES, BLACK_PIECES, BP, final_index - 8
         else:
-            self.bk_can_kingside_castle.append(False)
-            self.bk_can_queenside_castle.append(False)
-            self.wk_can_kingside_castle.append(self.wk_can_kingside_castle[-1])
-            self.wk_can_queenside_castle.append(self.wk_can_queenside_castle[-1])
-            if move.final_square[1] == 2: #Queenside
-                rook_mask = (1<<56) + (1<<59)
-                self.bitboards["bR"] ^= rook_mask
-                self.bitboards["bK"] = 1<<58
-            else:
-                rook_mask = (1<<63) + (1<<61)
-                self.bitboards["bR"] ^= rook_mask   
-                self.bitboards["bK"] = 1<<62
+            ally_color, ennemy_color, ennemy_piece, captured_index = BLACK_PIECES, WHITE_PIECES, WP, final_index + 8
 
-        self.update_color_and_game_bitboard()
+        bitboards[piece] ^= mask
+        bitboards[ally_color] ^= mask
+        bitboards[ennemy_piece] ^= (1 << captured_index)
+        bitboards[ennemy_color] ^= (1 << captured_index)
+        bitboards[ALL_PIECES] ^= mask | (1 << captured_index)
 
-        self.en_passant_square.append((0,0))
+        board[init_index] = None
+        board[final_index] = piece
+        board[captured_index] = None
 
-        self.captures.append(None)
+        return ennemy_piece
 
-        self.white_to_move = not self.white_to_move      
 
-    #TODO Promotion
-    def make_move(self, move : Move) -> None:
+    def make_castling_move(self, move : int) -> None:
+        """Moves the king and the rook of a castling move, or puts them back since the same masks undo it.
+
+        Args:
+            move (int): The castling move.
+        """
+        bitboards, board = self.bitboards, self.board
+        init_index, final_index = move & 63, (move >> 6) & 63
+        king, rook = (move >> 12) & 15, ((move >> 12) & 15) - 2 #The rook's index is two below the king's
+        if final_index & 7 == 2: #Queenside
+            rook_init_index, rook_final_index = init_index - 4, init_index - 1
+        else: #Kingside
+            rook_init_index, rook_final_index = init_index + 3, init_index + 1
+        king_mask = (1 << init_index) | (1 << final_index)
+        rook_mask = (1 << rook_init_index) | (1 << rook_final_index)
+        bitboards[king] ^= king_mask
+        bitboards[rook] ^= rook_mask
+        bitboards[WHITE_PIECES if king == WK else BLACK_PIECES] ^= king_mask | rook_mask
+        bitboards[ALL_PIECES] ^= king_mask | rook_mask
+
+        #Swap the mailbox squares (one of each pair is empty)
+        board[init_index], board[final_index] = board[final_index], board[init_index]
+        board[rook_init_index], board[rook_final_index] = board[rook_final_index], board[rook_init_index]
+
+
+    def make_move(self, move : int) -> None:
         """Makes a move.
 
         Args:
-            move (Move): A move to play.
+            move (int): An encoded move to play.
         """
-        self.moves.append(move)
-        if move.is_en_passant_move:
-            self.make_en_passant_move(move)
-        elif move.is_castling_move:
+        init_index, final_index = move & 63, (move >> 6) & 63
+        piece = (move >> 12) & 15
+        piece_keys = PIECE_SQUARE_KEYS[piece]
+        key = self.hash ^ piece_keys[init_index]
+        #The moved piece leaves its square
+        middlegame_score = self.middlegame_score - MIDDLEGAME_SCORES[piece][init_index]
+        endgame_score = self.endgame_score - ENDGAME_SCORES[piece][init_index]
+        phase = self.phase
+        pawn_key = self.pawn_hash ^ piece_keys[init_index] if piece == WP or piece == BP else self.pawn_hash
+        flags = (move >> 16) & 15
+        if flags & EN_PASSANT:
+            capture = self.make_en_passant_move(move)
+            #The captured pawn is on the initial rank, on the final file
+            captured_index = (init_index & 56) | (final_index & 7)
+            key ^= piece_keys[final_index] ^ PIECE_SQUARE_KEYS[capture][captured_index]
+            pawn_key ^= piece_keys[final_index] ^ PIECE_SQUARE_KEYS[capture][captured_index]
+            middlegame_score += MIDDLEGAME_SCORES[piece][final_index] - MIDDLEGAME_SCORES[capture][captured_index]
+            endgame_score += ENDGAME_SCORES[piece][final_index] - ENDGAME_SCORES[capture][captured_index]
+        elif flags & CASTLING:
             self.make_castling_move(move)
+            capture = None
+            rook = piece - 2
+            if final_index & 7 == 2: #Queenside
+                rook_init_index, rook_final_index = init_index - 4, init_index - 1
+            else: #Kingside
+                rook_init_index, rook_final_index = init_index + 3, init_index + 1
+            rook_keys = PIECE_SQUARE_KEYS[rook]
+            key ^= piece_keys[final_index] ^ rook_keys[rook_init_index] ^ rook_keys[rook_final_index]
+            middlegame_score += (MIDDLEGAME_SCORES[piece][final_index]
+                                 + MIDDLEGAME_SCORES[rook][rook_final_index] - MIDDLEGAME_SCORES[rook][rook_init_index])
+            endgame_score += (ENDGAME_SCORES[piece][final_index]
+                              + ENDGAME_SCORES[rook][rook_final_index] - ENDGAME_SCORES[rook][rook_init_index])
         else:
-            self.make_regular_move(move)
+            capture = self.make_regular_move(move)
+            #The piece on the final square is the promoted piece for a promotion
+            final_piece = move >> 20 or piece
+            key ^= PIECE_SQUARE_KEYS[final_piece][final_index]
+            middlegame_score += MIDDLEGAME_SCORES[final_piece][final_index]
+            endgame_score += ENDGAME_SCORES[final_piece][final_index]
+            phase += PHASE_WEIGHTS[final_piece] - PHASE_WEIGHTS[piece]
+            if final_piece == WP or final_piece == BP:
+                pawn_key ^= piece_keys[final_index]
+            if capture is not None:
+                key ^= PIECE_SQUARE_KEYS[capture][final_index]
+                middlegame_score -= MIDDLEGAME_SCORES[capture][final_index]
+                endgame_score -= ENDGAME_SCORES[capture][final_index]
+                phase -= PHASE_WEIGHTS[capture]
+                if capture == WP or capture == BP:
+                    pawn_key ^= PIECE_SQUARE_KEYS[capture][final_index]
+
+        #Save what the move can't tell to undo it
+        self.history.append((move, self.castling_rights, self.en_passant_square, capture, self.hash,
+                             self.middlegame_score, self.endgame_score, self.phase, self.pawn_hash))
+        self.middlegame_score, self.endgame_score, self.phase = middlegame_score, endgame_score, phase
+        self.pawn_hash = pawn_key
+
+        #Can't castle anymore if the king or a rook moves or if a rook is captured
+        key ^= CASTLING_KEYS[self.castling_rights] ^ EN_PASSANT_KEYS[self.en_passant_square]
+        self.castling_rights &= CASTLING_RIGHTS_MASKS[init_index] & CASTLING_RIGHTS_MASKS[final_index]
+
+        #Change en passant conditions: the square the pawn jumped over
+        self.en_passant_square = (init_index + final_index) >> 1 if flags & DOUBLE_PAWN_PUSH else 0
+
+        #Change turn
+        self.white_to_move = not self.white_to_move
+        self.hash = key ^ CASTLING_KEYS[self.castling_rights] ^ EN_PASSANT_KEYS[self.en_passant_square] ^ BLACK_TO_MOVE_KEY
+
+        if self.debug:
+            self.check_incremental_state()
 
 
-    def make_legal_move(self, init_square : tuple[int, int], final_square : tuple[int, int], legal_moves : list[Move]) -> bool:
+    def make_legal_move(self, init_square : tuple[int, int], final_square : tuple[int, int], legal_move_index : dict[tuple[int, int], list[int]]) -> bool:
         """Makes a legal move on the board.
 
         Args:
             init_square (tuple[int, int]): The first square clicked by the user (what to move).
             final_square (tuple[int, int]): The second square clicked by the user (where to move it).
-            legal_moves (list[Move]): A list of all legal moves.
+            legal_move_index (dict[tuple[int, int], list[int]]): The legal moves grouped by squares (see index_moves_by_squares).
 
         Returns:
             bool: If the move by the user was legal. Therefore, if the move was made.
         """
-        for move in legal_moves:
-            if init_square == move.init_square and final_square == move.final_square:
-                self.make_move(move)
-                return True
-        return False
+        moves = legal_move_index.get((init_square[0]*8 + init_square[1], final_square[0]*8 + final_square[1]))
+        if not moves:
+            return False
+        #A promotion has one move per piece, the queen comes first
+        self.make_move(moves[0])
+        return True
     
 
-    def undo_regular_move(self, move : Move, capture : str|None) -> None:
+    def undo_regular_move(self, move : int, capture : int|None) -> None:
         """Undoes a regular move.
 
         Args:
-            move (Move): The move to be undone.
-            capture (str | None): The piece tag of the captured piece if any.
+            move (int): The move to be undone.
+            capture (int | None): The piece index of the captured piece if any.
         """
+        bitboards, board = self.bitboards, self.board
         #Put the moved piece back where it was
-        init_index = move.init_square[0]*8 + move.init_square[1]
-        final_index = move.final_square[0]*8 + move.final_square[1]
-        mask = (1 << init_index) + (1 << final_index)
-        self.bitboards[move.piece_tag] ^= mask
+        init_index, final_index = move & 63, (move >> 6) & 63
+        piece = (move >> 12) & 15
+        mask = (1 << init_index) | (1 << final_index)
+        bitboards[piece] ^= mask
+        if self.white_to_move:
+            ally_color, ennemy_color = WHITE_PIECES, BLACK_PIECES
+        else:
+            ally_color, ennemy_color = BLACK_PIECES, WHITE_PIECES
+        bitboards[ally_color] ^= mask
+
+        #Take back the promoted piece and put the pawn back
+        if move >> 20:
+            bitboards[piece] ^= 1 << final_index
+            bitboards[move >> 20] ^= 1 << final_index
 
         #Put back a captured piece if thje move was a capture
         if capture is not None:
-            self.bitboards[capture] ^= 1 << final_index
-
-        self.update_color_and_game_bitboard()
-
-
-    def undo_castling_move(self, move : Move) -> None:
-        """Undoes a castling move.
-
-        Args:
-            move (Move): The move to be undone.
-        """
-        #Put the king and the correct rook back
-        if self.white_to_move:
-            self.bitboards["bK"] = 16 << 56
-            #Kingside
-            if move.final_square == (7,6):
-                self.bitboards["bR"] ^= (1 << 61) + (1 << 63)
-            #Queenside
-            if move.final_square == (7,2):
-                self.bitboards["bR"] ^= (1 << 59) + (1 << 56)
+            bitboards[capture] ^= 1 << final_index
+            bitboards[ennemy_color] ^= 1 << final_index
+            bitboards[ALL_PIECES] ^= 1 << init_index
         else:
-            self.bitboards["wK"] = 16
-            #Kingside
-            if move.final_square == (0,6):
-                self.bitboards["wR"] ^= (1 << 5) + (1 << 7)
-            #Queenside
-            if move.final_square == (0,2):
-                self.bitboards["wR"] ^= (1 << 3) + 1
+            bitboards[ALL_PIECES] ^= mask
 
-        self.update_color_and_game_bitboard()
+        board[init_index] = piece
+        board[final_index] = capture
 
 
-    def undo_en_passant_move(self, move : Move) -> None:
+    def undo_en_passant_move(self, move : int) -> None:
         """Undoes an en passant move.
 
         Args:
-            move (Move): The move to undo.
+            move (int): The move to undo.
         """
+        bitboards, board = self.bitboards, self.board
         #Put the pawn where it was
-        init_index = move.init_square[0]*8 + move.init_square[1]
-        final_index = move.final_square[0]*8 + move.final_square[1]
-        mask = (1 << init_index) + (1 << final_index)
-        self.bitboards[move.piece_tag] ^= mask
+        init_index, final_index = move & 63, (move >> 6) & 63
+        piece = (move >> 12) & 15
+        mask = (1 << init_index) | (1 << final_index)
 
         #Put the captured pawn back
         if self.white_to_move:
-            self.bitboards["wP"] ^= 1 << (final_index + 8)
+            ally_color, ennemy_color, ennemy_piece, captured_index = WHITE_PIECES, BLACK_PIECES, BP, final_index - 8
         else:
-            self.bitboards["bP"] ^= 1 << (final_index - 8)
+            ally_color, ennemy_color, ennemy_piece, captured_index = BLACK_PIECES, WHITE_PIECES, WP, final_index + 8
+
+        bitboards[piece] ^= mask
+        bitboards[ally_color] ^= mask
+        bitboards[ennemy_piece] ^= (1 << captured_index)
+        bitboards[ennemy_color] ^= (1 << captured_index)
+        bitboards[ALL_PIECES] ^= mask | (1 << captured_index)
+
+        board[init_index] = piece
+        board[final_index] = None
+        board[captured_index] = ennemy_piece
 
-        self.update_color_and_game_bitboard()
 
-    #TODO Promotion
     def undo_move(self) -> None:
         """Undoes the last move.
         """
-        #Retrieve last move and last capture
-        last_move = self.moves.pop()
-        last_capture = self.captures.pop()
+        #Retrieve the last move and the state before it
+        (last_move, self.castling_rights, self.en_passant_square, last_capture, self.hash,
+         self.middlegame_score, self.endgame_score, self.phase, self.pawn_hash) = self.history.pop()
+
+        #Change turn back, so it is the turn of the player who made the move
+        self.white_to_move = not self.white_to_move
 
         #Put the pieces back
-        if last_move.is_en_passant_move:
+        flags = (last_move >> 16) & 15
+        if flags & EN_PASSANT:
             self.undo_en_passant_move(last_move)
-        elif last_move.is_castling_move:
-            self.undo_castling_move(last_move)
+        elif flags & CASTLING:
+            self.make_castling_move(last_move)
         else:
             self.undo_regular_move(last_move, last_capture)
 
-        #Delete old data
-        self.en_passant_square.pop()
-        self.wk_can_kingside_castle.pop()
-        self.wk_can_queenside_castle.pop()
-        self.bk_can_kingside_castle.pop()
-        self.bk_can_queenside_castle.pop()
+        if self.debug:
+            self.check_incremental_state()
 
-        #Change turn
-        self.white_to_move = not self.white_to_move
\ No newline at end of file
@@ -0,0 +1,94 @@
+### This file implements a Lazy SMP parallel search: several processes search the same position and share one transposition table. ###
+#The processes don't talk to each other. They help the main search by filling the shared table with results it can
+#reuse, and since they start at different depths they explore the tree in a different order.
+
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+from typing import Callable
+
+from game_logic.game_state import Game
+from game_logic.move import move_to_uci
+from game_logic.search import Search, SearchInfo
+from game_logic.transposition_table import TranspositionTable
+
+
+def run_helper(game : Game, shared_memory_name : str, max_depth : int, min_depth : int) -> None:
+    """Searches in a helper process until it is terminated by the main process.
+
+    Args:
+        game (Game): The game state (pickled with its history).
+        shared_memory_name (str): The name of the shared memory holding the transposition table.
+        max_depth (int): The deepest iteration.
+        min_depth (int): The depth of the first iteration.
+    """
+    memory = shared_memory.SharedMemory(name=shared_memory_name)
+    try:
+        Search(game, transposition_table=TranspositionTable(buffer=memory.buf)).search(max_depth=max_depth, min_depth=min_depth)
+    finally:
+        memory.close()
+
+
+def lazy_smp_search(game : Game, workers : int, max_depth : int = 64, max_time : float|None = None, hash_size_mb : float = 16,
+                    on_iteration : Callable[[SearchInfo], None]|None = None) -> SearchInfo|None:
+    """Searches a position with several processes sharing one transposition table.
+    This process runs the main search, whose result is returned. The other workers - 1 helper processes search the same
+    position, every other one starting one ply deeper, and are stopped when the main search ends.
+    A helper can be stopped in the middle of writing an entry: the XOR check of the entries rejects such torn entries.
+
+    Args:
+        game (Game): The game state. It is left unchanged.
+        workers (int): The number of processes searching, this one included.
+        max_depth (int): The deepest iteration of the main search.
+        max_time (float | None): Stop after this many seconds.
+        hash_size_mb (float): The size of the shared transposition table in MB.
+        on_iteration (Callable[[SearchInfo], None] | None): Called after every completed iteration of the main search.
+
+    Returns:
+        SearchInfo | None: The last completed iteration of the main search.
+    """
+    memory = shared_memory.SharedMemory(create=True, size=max(int(hash_size_mb * 1024 * 1024), 4096))
+    helpers = []
+    try:
+        transposition_table = TranspositionTable(buffer=memory.buf)
+        for worker in range(1, workers):
+            helper = multiprocessing.Process(target=run_helper, args=(game, memory.name, max_depth + 1, 1 + worker % 2), daemon=True)
+            helper.start()
+            helpers.append(helper)
+
+        info = Search(game, transposition_table=transposition_table).search(max_depth=max_depth, max_time=max_time, on_iteration=on_iteration)
+    finally:
+        for helper in helpers:
+            helper.terminate()
+        for helper in helpers:
+            helper.join()
+        #The table's view of the memory must be released before the memory is closed
+        transposition_table = None
+        memory.close()
+        memory.unlink()
+
+    return info
+
+
+def benchmark_time_to_depth(fen : str, depth : int, worker_counts : tuple[int, ...] = (1, 2, 4, 8), hash_size_mb : float = 16) -> dict[int, float]:
+    """Times how long the main search takes to complete a depth with different numbers of workers, and prints it.
+
+    Args:
+        fen (str): The position.
+        depth (int): The depth to reach.
+        worker_counts (tuple[int, ...]): The numbers of workers tried.
+        hash_size_mb (float): The size of the shared transposition table in MB.
+
+    Returns:
+        dict[int, float]: The time to depth in seconds for each number of workers.
+    """
+    times = {}
+    print(f"{'workers':>7} {'time (s)':>9} {'speedup':>8} {'nodes':>9}  best move")
+    for workers in worker_counts:
+        game = Game(fen)
+        start = time.perf_counter()
+        info = lazy_smp_search(game, workers, max_depth=depth, hash_size_mb=hash_size_mb)
+        times[workers] = time.perf_counter() - start
+        speedup = times[worker_counts[0]] / times[workers]
+        print(f"{workers:>7} {times[workers]:>9.3f} {speedup:>8.2f} {info.nodes:>9}  {move_to_uci(info.pv[0]) if info.pv else '-'}")
+    return times
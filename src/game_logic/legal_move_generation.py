@@ -0,0 +1,343 @@
+### This file implements a second legal move generator which uses check and pin masks instead of playing every move. ###
+
+from typing import Iterator
+
+from game_logic.move import (DOUBLE_PAWN_PUSH, EN_PASSANT, CAPTURE, encode_move,
+                             WP, BP, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, BLACK_OFFSET)
+from game_logic.game_state import Game, WHITE_PIECES, BLACK_PIECES, ALL_PIECES
+from game_logic.attack_tables import (KNIGHT_ATTACKS, KING_ATTACKS, WHITE_PAWN_ATTACKS, BLACK_PAWN_ATTACKS,
+                                      SQUARES_BETWEEN, get_bishop_attacks, get_rook_attacks, get_queen_attacks)
+from game_logic.move_generation import get_squares, get_moves_to_targets, get_pawn_move, is_square_attacked, get_castling_moves
+
+
+def get_checkers(bitboards : list, king_square : int, white_to_move : bool) -> int:
+    """Finds the ennemy pieces giving check to the king.
+
+    Args:
+        bitboards (list): The bitboards for the current position.
+        king_square (int): The index of the king's square.
+        white_to_move (bool): Is it white to move? (The king is white if True.)
+
+    Returns:
+        int: Bitboard of the checking pieces.
+    """
+    if white_to_move:
+        offset, pawn_attacks = BLACK_OFFSET, WHITE_PAWN_ATTACKS
+    else:
+        offset, pawn_attacks = 0, BLACK_PAWN_ATTACKS
+
+    queens = bitboards[QUEEN + offset]
+    return ((KNIGHT_ATTACKS[king_square] & bitboards[KNIGHT + offset])
+            | (pawn_attacks[king_square] & bitboards[PAWN + offset])
+            | (get_bishop_attacks(king_square, bitboards[ALL_PIECES]) & (bitboards[BISHOP + offset] | queens))
+            | (get_rook_attacks(king_square, bitboards[ALL_PIECES]) & (bitboards[ROOK + offset] | queens)))
+
+
+def get_pin_masks(bitboards : list, king_square : int, white_to_move : bool) -> dict[int, int]:
+    """Finds the pieces pinned to the king and the squares each one can still move to.
+
+    Args:
+        bitboards (list): The bitboards for the current position.
+        king_square (int): The index of the king's square.
+        white_to_move (bool): Is it white to move? (The king is white if True.)
+
+    Returns:
+        dict[int, int]: For each pinned piece's square, the squares between the king and the pinner plus the pinner's square.
+    """
+    if white_to_move:
+        offset, ally_pieces = BLACK_OFFSET, bitboards[WHITE_PIECES]
+    else:
+        offset, ally_pieces = 0, bitboards[BLACK_PIECES]
+
+    #Ennemy sliders that would attack the king on an empty board
+    queens = bitboards[QUEEN + offset]
+    snipers = ((get_bishop_attacks(king_square, 0) & (bitboards[BISHOP + offset] | queens))
+               | (get_rook_attacks(king_square, 0) & (bitboards[ROOK + offset] | queens)))
+
+    pin_masks = {}
+    for sniper_square in get_squares(snipers):
+        between = SQUARES_BETWEEN[king_square][sniper_square]
+        blockers = between & bitboards[ALL_PIECES]
+        #Pinned if the only piece between the king and the sniper is ours
+        if blockers and not (blockers & (blockers - 1)) and (blockers & ally_pieces):
+            pin_masks[blockers.bit_length() - 1] = between | (1 << sniper_square)
+
+    return pin_masks
+
+
+def is_en_passant_legal(bitboards : list, move : int, king_square : int, white_to_move : bool) -> bool:
+    """Checks if an en passant capture leaves the king safe. Both pawns leave the rank at once,
+    which can uncover an attack that the pin masks don't see, so the position after the capture is tested directly.
+
+    Args:
+        bitboards (list): The bitboards for the current position.
+        move (int): The en passant move.
+        king_square (int): The index of the king's square.
+        white_to_move (bool): Is it white to move?
+
+    Returns:
+        bool: If the en passant capture is legal.
+    """
+    init_index, final_index = move & 63, (move >> 6) & 63
+    captured_index = final_index - 8 if white_to_move else final_index + 8
+    ennemy_pawn = BP if white_to_move else WP
+
+    bitboards_after = list(bitboards)
+    bitboards_after[ennemy_pawn] ^= 1 << captured_index
+    bitboards_after[ALL_PIECES] ^= (1 << init_index) | (1 << final_index) | (1 << captured_index)
+
+    return not is_square_attacked(bitboards_after, king_square, not white_to_move)
+
+
+def get_legal_move_masks(game : Game) -> tuple[int, int, int, dict[int, int]]:
+    """Finds what restricts the moves of the side to move, so the captures and the quiet moves can be generated separately
+    without doing it twice.
+
+    Args:
+        game (Game): The game state.
+
+    Returns:
+        tuple[int, int, int, dict[int, int]]: The king's square, the checkers, the check mask (the squares that block or
+        capture a single checker, every square if not in check) and the pin masks (see get_pin_masks).
+    """
+    bitboards = game.bitboards
+    white_to_move = game.white_to_move
+    king_square = bitboards[KING if white_to_move else KING + BLACK_OFFSET].bit_length() - 1
+    checkers = get_checkers(bitboards, king_square, white_to_move)
+    if checkers:
+        check_mask = checkers | SQUARES_BETWEEN[king_square][checkers.bit_length() - 1]
+    else:
+        check_mask = ~0
+    return king_square, checkers, check_mask, get_pin_masks(bitboards, king_square, white_to_move)
+
+
+def get_king_moves_masked(game : Game, king_square : int, targets : int) -> list[int]:
+    """Finds the legal king moves (castling excluded) to some target squares.
+    The king itself must not block the attacks on the squares behind it.
+
+    Args:
+        game (Game): The game state.
+        king_square (int): The index of the king's square.
+        targets (int): Bitboard of the allowed final squares (ennemy pieces, empty squares or both).
+
+    Returns:
+        list[int]: The legal king moves.
+    """
+    bitboards = game.bitboards
+    white_to_move = game.white_to_move
+    if white_to_move:
+        piece, ennemy_pieces = KING, bitboards[BLACK_PIECES]
+    else:
+        piece, ennemy_pieces = KING + BLACK_OFFSET, bitboards[WHITE_PIECES]
+
+    occupancy_without_king = bitboards[ALL_PIECES] ^ (1 << king_square)
+    king_targets = 0
+    for target_square in get_squares(KING_ATTACKS[king_square] & targets):
+        if not is_square_attacked(bitboards, target_square, not white_to_move, occupancy_without_king):
+            king_targets |= 1 << target_square
+    return get_moves_to_targets(king_square, king_targets, piece, ennemy_pieces)
+
+
+def iter_legal_captures(game : Game, masks : tuple[int, int, int, dict[int, int]]|None = None) -> Iterator[int]:
+    """Gives the legal captures and promotions (en passant and promotions without capture included) one piece at a time.
+
+    Args:
+        game (Game): The game state, which must not change while the moves are read.
+        masks (tuple[int, int, int, dict[int, int]] | None): The result of get_legal_move_masks, found here if None.
+
+    Yields:
+        int: The legal captures and promotions.
+    """
+    bitboards = game.bitboards
+    white_to_move = game.white_to_move
+    king_square, checkers, check_mask, pin_masks = masks if masks is not None else get_legal_move_masks(game)
+    if white_to_move:
+        offset, ennemy_pieces = 0, bitboards[BLACK_PIECES]
+        forward, last_rank, pawn_attacks, capturers_attacks = 8, 7, WHITE_PAWN_ATTACKS, BLACK_PAWN_ATTACKS
+    else:
+        offset, ennemy_pieces = BLACK_OFFSET, bitboards[WHITE_PIECES]
+        forward, last_rank, pawn_attacks, capturers_attacks = -8, 0, BLACK_PAWN_ATTACKS, WHITE_PAWN_ATTACKS
+
+    yield from get_king_moves_masked(game, king_square, ennemy_pieces)
+    #Double check: only the king can move
+    if checkers & (checkers - 1):
+        return
+
+    #Pawns: captures, and pushes to the last rank
+    piece = PAWN + offset
+    empty_squares = ~bitboards[ALL_PIECES]
+    for square in get_squares(bitboards[piece]):
+        allowed = check_mask & pin_masks.get(square, ~0)
+        for final_index in get_squares(pawn_attacks[square] & ennemy_pieces & allowed):
+            yield from get_pawn_move(square, final_index, piece, CAPTURE, final_index >> 3 == last_rank)
+        push_square = square + forward
+        if push_square >> 3 == last_rank and (1 << push_square) & empty_squares & allowed:
+            yield from get_pawn_move(square, push_square, piece, 0, True)
+
+    #En passant
+    en_passant_square = game.en_passant_square
+    if en_passant_square:
+        for square in get_squares(capturers_attacks[en_passant_square] & bitboards[piece]):
+            move = encode_move(square, en_passant_square, piece, EN_PASSANT | CAPTURE)
+            if is_en_passant_legal(bitboards, move, king_square, white_to_move):
+                yield move
+
+    yield from iter_piece_moves_masked(bitboards, offset, ennemy_pieces & check_mask, pin_masks, ennemy_pieces)
+
+
+def iter_legal_quiets(game : Game, masks : tuple[int, int, int, dict[int, int]]|None = None) -> Iterator[int]:
+    """Gives the legal moves which are neither captures, promotions nor castling one piece at a time.
+
+    Args:
+        game (Game): The game state, which must not change while the moves are read.
+        masks (tuple[int, int, int, dict[int, int]] | None): The result of get_legal_move_masks, found here if None.
+
+    Yields:
+        int: The legal quiet moves.
+    """
+    bitboards = game.bitboards
+    king_square, checkers, check_mask, pin_masks = masks if masks is not None else get_legal_move_masks(game)
+    if game.white_to_move:
+        offset, ennemy_pieces, forward, start_rank, last_rank = 0, bitboards[BLACK_PIECES], 8, 1, 7
+    else:
+        offset, ennemy_pieces, forward, start_rank, last_rank = BLACK_OFFSET, bitboards[WHITE_PIECES], -8, 6, 0
+    empty_squares = ~bitboards[ALL_PIECES]
+
+    yield from get_king_moves_masked(game, king_square, empty_squares)
+    #Double check: only the king can move
+    if checkers & (checkers - 1):
+        return
+
+    #Pawn pushes, except to the last rank
+    piece = PAWN + offset
+    for square in get_squares(bitboards[piece]):
+        push_square = square + forward
+        if push_square >> 3 == last_rank or not (1 << push_square) & empty_squares:
+            continue
+        allowed = check_mask & pin_masks.get(square, ~0)
+        if (1 << push_square) & allowed:
+            yield encode_move(square, push_square, piece)
+        double_push_square = push_square + forward
+        if square >> 3 == start_rank and ((1 << double_push_square) & empty_squares & allowed):
+            yield encode_move(square, double_push_square, piece, DOUBLE_PAWN_PUSH)
+
+    yield from iter_piece_moves_masked(bitboards, offset, empty_squares & check_mask, pin_masks, ennemy_pieces)
+
+
+def iter_legal_castling_moves(game : Game, masks : tuple[int, int, int, dict[int, int]]|None = None) -> Iterator[int]:
+    """Gives the legal castling moves.
+
+    Args:
+        game (Game): The game state.
+        masks (tuple[int, int, int, dict[int, int]] | None): The result of get_legal_move_masks, found here if None.
+
+    Yields:
+        int: The legal castling moves.
+    """
+    if not game.castling_rights:
+        return
+    checkers = masks[1] if masks is not None else get_legal_move_masks(game)[1]
+    #Can't castle out of check, the castling functions test the squares the king goes through
+    if not checkers:
+        yield from get_castling_moves(game.bitboards, game.white_to_move, game.castling_rights)
+
+
+def iter_piece_moves_masked(bitboards : list, offset : int, targets : int, pin_masks : dict[int, int], ennemy_pieces : int) -> Iterator[int]:
+    """Gives the legal knight, bishop, rook and queen moves to some target squares one piece at a time.
+
+    Args:
+        bitboards (list): The bitboards for the current position.
+        offset (int): 0 if white is to move, BLACK_OFFSET if black is.
+        targets (int): Bitboard of the allowed final squares, the check mask already applied.
+        pin_masks (dict[int, int]): The pin masks (see get_pin_masks).
+        ennemy_pieces (int): Bitboard of the ennemy pieces, to flag the captures.
+
+    Yields:
+        int: The legal moves.
+    """
+    #Knights (a pinned knight can never move)
+    piece = KNIGHT + offset
+    for square in get_squares(bitboards[piece]):
+        if square not in pin_masks:
+            yield from get_moves_to_targets(square, KNIGHT_ATTACKS[square] & targets, piece, ennemy_pieces)
+
+    #Sliders
+    occupancy = bitboards[ALL_PIECES]
+    for piece_type, get_attacks in ((BISHOP, get_bishop_attacks), (ROOK, get_rook_attacks), (QUEEN, get_queen_attacks)):
+        piece = piece_type + offset
+        for square in get_squares(bitboards[piece]):
+            piece_targets = get_attacks(square, occupancy) & targets & pin_masks.get(square, ~0)
+            yield from get_moves_to_targets(square, piece_targets, piece, ennemy_pieces)
+
+
+def generate_legal_moves(game : Game) -> Iterator[int]:
+    """Gives the legal moves one piece at a time, by category: captures and promotions, then quiet moves, then castling.
+    A consumer which stops early (a beta cutoff, a legality test) doesn't pay for the moves it doesn't read.
+
+    Args:
+        game (Game): The game state, which must not change while the moves are read.
+
+    Yields:
+        int: The legal moves.
+    """
+    masks = get_legal_move_masks(game)
+    yield from iter_legal_captures(game, masks)
+    yield from iter_legal_quiets(game, masks)
+    yield from iter_legal_castling_moves(game, masks)
+
+
+def has_legal_move(game : Game) -> bool:
+    """Checks if the side to move has at least one legal move (if not, it is checkmate or stalemate).
+
+    Args:
+        game (Game): The game state.
+
+    Returns:
+        bool: If there is a legal move.
+    """
+    for _ in generate_legal_moves(game):
+        return True
+    return False
+
+
+def get_legal_captures(game : Game, masks : tuple[int, int, int, dict[int, int]]|None = None) -> list[int]:
+    """Finds the legal captures and promotions (see iter_legal_captures).
+
+    Args:
+        game (Game): The game state.
+        masks (tuple[int, int, int, dict[int, int]] | None): The result of get_legal_move_masks, found here if None.
+
+    Returns:
+        list[int]: The legal captures and promotions.
+    """
+    return list(iter_legal_captures(game, masks))
+
+
+def get_legal_quiets(game : Game, masks : tuple[int, int, int, dict[int, int]]|None = None) -> list[int]:
+    """Finds the legal moves which are neither captures nor promotions, castling last.
+
+    Args:
+        game (Game): The game state.
+        masks (tuple[int, int, int, dict[int, int]] | None): The result of get_legal_move_masks, found here if None.
+
+    Returns:
+        list[int]: The legal quiet moves.
+    """
+    if masks is None:
+        masks = get_legal_move_masks(game)
+    return list(iter_legal_quiets(game, masks)) + list(iter_legal_castling_moves(game, masks))
+
+
+def get_all_legal_moves_masked(game : Game) -> list[int]:
+    """Finds all legal moves in a position without playing them.
+    The checkers and pinned pieces are found once. Then each piece's targets are restricted to the squares
+    that block or capture a single checker (check mask) and to its pin ray if it is pinned (pin mask).
+    Only king moves and en passant captures need their own test.
+
+    Args:
+        game (Game): The game state.
+
+    Returns:
+        list[int]: All legal moves: captures and promotions, then quiet moves, then castling.
+    """
+    return list(generate_legal_moves(game))
@@ -1,23 +1,161 @@
-### This file implements the Move class which stores info about a possible move. ###
+### This file implements the integer encoding of moves and the Move class which gives a readable view of an encoded move. ###
+
+#Piece indices, used in the encoded moves and as indices of Game.bitboards.
+PIECE_TAGS = ["wP", "wN", "wB", "wR", "wQ", "wK", "bP", "bN", "bB", "bR", "bQ", "bK"]
+PIECE_INDICES = {piece_tag: index for index, piece_tag in enumerate(PIECE_TAGS)}
+WP, WN, WB, WR, WQ, WK, BP, BN, BB, BR, BQ, BK = range(12)
+#A piece index is its type, plus BLACK_OFFSET for black pieces
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+BLACK_OFFSET = 6
+
+#A move is an int:
+#   bits 0-5:   initial square index
+#   bits 6-11:  final square index
+#   bits 12-15: index of the moved piece
+#   bits 16-19: flags
+#   bits 20-23: index of the piece a pawn is promoted to, 0 if not a promotion (0 is "wP", which can't be a promotion)
+DOUBLE_PAWN_PUSH = 1 #The move allows an en passant capture on the next move
+EN_PASSANT = 2
+CASTLING = 4
+CAPTURE = 8 #Set for every capture, en passant included
+#Bit of an encoded move that makes it a capture
+CAPTURE_MASK = CAPTURE << 16
+
+
+def encode_move(init_index : int, final_index : int, piece : int, flags : int = 0, promotion : int = 0) -> int:
+    """Packs a move into an int.
+
+    Args:
+        init_index (int): Index of the initial square.
+        final_index (int): Index of the final square.
+        piece (int): Index of the moved piece.
+        flags (int): DOUBLE_PAWN_PUSH, EN_PASSANT, CASTLING and/or CAPTURE.
+        promotion (int): Index of the piece a pawn is promoted to, 0 if not a promotion.
+
+    Returns:
+        int: The encoded move.
+    """
+    return init_index | (final_index << 6) | (piece << 12) | (flags << 16) | (promotion << 20)
+
+
+def move_to_uci(move : int) -> str:
+    """Writes an encoded move in UCI notation (e.g. "e2e4", "e7e8q").
+
+    Args:
+        move (int): The encoded move.
+
+    Returns:
+        str: The move in UCI notation.
+    """
+    init_index, final_index, promotion = move & 63, (move >> 6) & 63, move >> 20
+    uci = "abcdefgh"[init_index & 7] + str((init_index >> 3) + 1) + "abcdefgh"[final_index & 7] + str((final_index >> 3) + 1)
+    if promotion:
+        uci += PIECE_TAGS[promotion][1].lower()
+    return uci
+
+
+def index_moves_by_squares(moves : list[int]) -> dict[tuple[int, int], list[int]]:
+    """Groups moves by their (initial square, final square) indices, to find a move from two squares (clicks, UCI)
+    without scanning every move. A promotion has one move per piece on the same squares, in the order of the list.
+
+    Args:
+        moves (list[int]): The encoded moves.
+
+    Returns:
+        dict[tuple[int, int], list[int]]: The moves of each pair of squares.
+    """
+    index = {}
+    for move in moves:
+        key = (move & 63, (move >> 6) & 63)
+        if key in index:
+            index[key].append(move)
+        else:
+            index[key] = [move]
+    return index
+
+
+def index_moves_by_piece(moves : list[int]) -> dict[tuple[int, int], list[int]]:
+    """Groups moves by their (moved piece, final square), the two things a SAN move always gives (e.g. "Nf3").
+
+    Args:
+        moves (list[int]): The encoded moves.
+
+    Returns:
+        dict[tuple[int, int], list[int]]: The moves of each piece index and final square index.
+    """
+    index = {}
+    for move in moves:
+        key = ((move >> 12) & 15, (move >> 6) & 63)
+        if key in index:
+            index[key].append(move)
+        else:
+            index[key] = [move]
+    return index
+
 
 class Move:
-    def __init__(self, init_square : tuple[int, int], final_square : tuple[int, int], piece_tag : str, 
-                 en_passant_square = (0,0), is_en_passant_move = False, is_castling_move = False, 
-                 is_promotion = False):
+    """Read-only view of an encoded move, with the attributes used by the interface."""
+    __slots__ = ("value",)
+
+    def __init__(self, value : int):
+        self.value = value
+
+    @property
+    def init_square(self) -> tuple[int, int]:
         #Movements: (i,j) -> (i',j')
-        self.init_square = init_square
-        self.final_square = final_square
-        
+        return divmod(self.value & 63, 8)
+
+    @property
+    def final_square(self) -> tuple[int, int]:
+        return divmod((self.value >> 6) & 63, 8)
+
+    @property
+    def piece_tag(self) -> str:
         #What piece is moved
-        self.piece_tag = piece_tag
+        return PIECE_TAGS[(self.value >> 12) & 15]
 
+    @property
+    def en_passant_square(self) -> tuple[int, int]:
         #(0,0) if the move doesn't allow en passant on next move, else (x,y) where it's possible
-        self.en_passant_square = en_passant_square
-        #Is this move a capture en passant?  
-        self.is_en_passant_move = is_en_passant_move
-
-        #Is it a castling move?
-        self.is_castling_move = is_castling_move
-        
-        #Does this move allow a promotion?
-        self.is_promotion = is_promotion
\ No newline at end of file
+        return self.final_square if (self.value >> 16) & DOUBLE_PAWN_PUSH else (0,0)
+
+    @property
+    def is_en_passant_move(self) -> bool:
+        return bool((self.value >> 16) & EN_PASSANT)
+
+    @property
+    def is_castling_move(self) -> bool:
+        return bool((self.value >> 16) & CASTLING)
+
+    @property
+    def is_capture(self) -> bool:
+        return bool((self.value >> 16) & CAPTURE)
+
+    @property
+    def is_promotion(self) -> bool:
+        return self.value >> 20 != 0
+
+    @property
+    def promotion_piece(self) -> str|None:
+        #Piece tag of the piece the pawn becomes ("wQ", "bN", ...), None if not a promotion
+        return PIECE_TAGS[self.value >> 20] if self.value >> 20 else None
+
+    def to_uci(self) -> str:
+        """Writes the move in UCI notation (e.g. "e2e4", "e7e8q").
+
+        Returns:
+            str: The move in UCI notation.
+        """
+        return move_to_uci(self.value)
+
+    def __int__(self) -> int:
+        return self.value
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Move) and self.value == other.value
+
+    def __hash__(self) -> int:
+        return hash(self.value)
+
+    def __repr__(self) -> str:
+        return f"Move({self.to_uci()})"
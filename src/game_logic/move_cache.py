@@ -0,0 +1,96 @@
+### This file implements a bounded cache of legal move lists, keyed by the Zobrist hash of the position. ###
+
+from collections import OrderedDict
+from typing import Callable
+
+from game_logic.game_state import Game
+from game_logic.move_generation import get_all_legal_moves
+
+
+class MoveCache:
+    """Least recently used cache of the legal moves of each position.
+
+    Args:
+        legal_move_generator (Callable[[Game], list[int]]): The function that finds the legal moves on a miss.
+        max_size (int): The number of positions kept, the least recently used one is evicted first.
+    """
+    def __init__(self, legal_move_generator : Callable[[Game], list[int]] = get_all_legal_moves, max_size : int = 4096):
+        if max_size <= 0:
+            raise ValueError(f"The cache size must be positive, got {max_size}")
+        self.legal_move_generator = legal_move_generator
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_legal_moves(self, game : Game) -> list[int]:
+        """Finds the legal moves of the current position, generating them only if the position isn't cached.
+        The list is shared with the cache: don't modify it.
+
+        Args:
+            game (Game): The game state.
+
+        Returns:
+            list[int]: All legal moves.
+        """
+        legal_moves = self.lookup(game.hash)
+        if legal_moves is None:
+            legal_moves = self.legal_move_generator(game)
+            self.store(game.hash, legal_moves)
+        return legal_moves
+
+    def lookup(self, key : int) -> list[int]|None:
+        """Gives the cached legal moves of a position, without generating them.
+
+        Args:
+            key (int): The Zobrist hash of the position.
+
+        Returns:
+            list[int] | None: The legal moves, None if the position isn't cached.
+        """
+        entries = self.entries
+        legal_moves = entries.get(key)
+        if legal_moves is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        entries.move_to_end(key)
+        return legal_moves
+
+    def store(self, key : int, legal_moves : list[int]) -> None:
+        """Caches the legal moves of a position found elsewhere (by a background worker for example).
+
+        Args:
+            key (int): The Zobrist hash of the position.
+            legal_moves (list[int]): The legal moves.
+        """
+        entries = self.entries
+        entries[key] = legal_moves
+        entries.move_to_end(key)
+        if len(entries) > self.max_size:
+            entries.popitem(last=False)
+
+    @property
+    def hit_rate(self) -> float:
+        """The share of lookups found in the cache, 0 before the first lookup.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self) -> None:
+        """Empties the cache and resets the counters.
+        """
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key : int) -> bool:
+        """Checks if a position is cached, without counting a lookup or marking it as recently used.
+        """
+        return key in self.entries
+
+    def __repr__(self) -> str:
+        return f"MoveCache({len(self)}/{self.max_size} positions, {self.hits} hits, {self.misses} misses, hit rate {self.hit_rate:.1%})"
@@ -1,418 +1,446 @@
 ### This file implements the move generation algorithm. ###
 
-from game_logic.move import Move
-from game_logic.game_state import Game
+from game_logic.move import (DOUBLE_PAWN_PUSH, EN_PASSANT, CASTLING, CAPTURE, encode_move,
+                             WP, WN, WB, WR, WQ, WK, BP, BN, BB, BR, BQ, BK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, BLACK_OFFSET)
+from game_logic.game_state import (Game, WHITE_PIECES, BLACK_PIECES, ALL_PIECES,
+                                   WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE)
+from game_logic.attack_tables import (KNIGHT_ATTACKS, KING_ATTACKS, WHITE_PAWN_ATTACKS, BLACK_PAWN_ATTACKS,
+                                      get_bishop_attacks, get_rook_attacks, get_queen_attacks)
 
-def find_coordinates(bitboard : int) -> tuple[int, int, int]:
-    """Finds the square location and position (i,j) on the board of a piece type. 
+def get_squares(bitboard : int) -> list[int]:
+    """Finds the square indices of the pieces of a bitboard. 
 
     Args:
         bitboard (int): The bitboard associated with the piece type.
 
     Returns:
-        tuple[int, int, int]: The square, the i coordinate and the j coordinate.
+        list[int]: The index of each set square.
     """
-    coordinates = []
-    current_square = 0
+    squares = []
 
-    while bitboard > 0: #Checking each bit to find if the value is 1
-        if bitboard & 1 == 1:
-            i,j = divmod(int(current_square), 8)
-            coordinates.append((current_square, i, j))
-        bitboard >>= 1
-        current_square += 1
+    while bitboard: #Walking the set bits from the least significant one
+        square_bit = bitboard & -bitboard
+        squares.append(square_bit.bit_length() - 1)
+        bitboard ^= square_bit
 
-    return coordinates
+    return squares
 
 
-def get_white_pawn_moves(bitboards : dict, en_passant_square : tuple[int, int]) -> list[Move]:
+def get_moves_to_targets(init_index : int, targets : int, piece : int, ennemy_pieces : int) -> list[int]:
+    """Creates a move from a square to each square of a target bitboard.
+
+    Args:
+        init_index (int): Where the piece is.
+        targets (int): Bitboard of the squares the piece can go to.
+        piece (int): Index of the moved piece.
+        ennemy_pieces (int): Bitboard of the ennemy pieces, to flag the captures.
+
+    Returns:
+        list[int]: One move per target square.
+    """
+    moves = []
+    quiet_move = init_index | (piece << 12)
+    capture_move = quiet_move | (CAPTURE << 16)
+
+    captures = targets & ennemy_pieces
+    while captures:
+        target_bit = captures & -captures
+        moves.append(capture_move | ((target_bit.bit_length() - 1) << 6))
+        captures ^= target_bit
+
+    quiets = targets & ~ennemy_pieces
+    while quiets:
+        target_bit = quiets & -quiets
+        moves.append(quiet_move | ((target_bit.bit_length() - 1) << 6))
+        quiets ^= target_bit
+
+    return moves
+
+
+def get_pawn_move(init_index : int, final_index : int, piece : int, flags : int, is_promotion : bool) -> list[int]:
+    """Creates a pawn move. A promotion gives one move per piece the pawn can become.
+
+    Args:
+        init_index (int): Where the pawn is.
+        final_index (int): Where the pawn goes.
+        piece (int): Index of the pawn (WP or BP).
+        flags (int): CAPTURE if the pawn takes a piece, else 0.
+        is_promotion (bool): Does the pawn reach the last rank?
+
+    Returns:
+        list[int]: The pawn move, or the four promotion moves (queen first).
+    """
+    if not is_promotion:
+        return [encode_move(init_index, final_index, piece, flags)]
+    #The queen, rook, bishop and knight indices follow the pawn's index: P, N, B, R, Q
+    return [encode_move(init_index, final_index, piece, flags, piece + promoted) for promoted in (4, 3, 2, 1)]
+
+
+def get_white_pawn_moves(bitboards : list, en_passant_square : int) -> list[int]:
     """Finds the moves of the white pawns.
 
     Args:
-        bitboards (dict): The bitboards for the current position.
-        en_passant_square (tuple[int, int]): Current en passant square. (0,0) if none else (x,y).
+        bitboards (list): The bitboards for the current position.
+        en_passant_square (int): Current en passant square. 0 if none else the square behind the pawn that can be taken.
 
     Returns:
-        list[Move]: The moves of the white pawns.
+        list[int]: The moves of the white pawns.
     """
     white_pawn_moves = []
-    wP_bitboard = bitboards["wP"]
+    wP_bitboard, piece = bitboards[WP], WP
 
-    coordinates = find_coordinates(wP_bitboard)
-    for coordinate in coordinates:
-        square, i, j = coordinate
+    for square in get_squares(wP_bitboard):
         #First square in front is empty?
-        if (1 << (square + 8)) & ~bitboards["game"]:
-            white_pawn_moves.append(Move((i,j), (i+1,j), "wP", is_promotion = i+1==7))
+        if (1 << (square + 8)) & ~bitboards[ALL_PIECES]:
+            white_pawn_moves.extend(get_pawn_move(square, square + 8, piece, 0, square >= 48))
             #Second square in front empty and pawn hasn't moved before?
-            if i==1 and ((1 << (square + 16)) & ~bitboards["game"]):
-                white_pawn_moves.append(Move((i,j), (i+2,j), "wP", en_passant_square = (i+2,j)))
-        #Capture to the right
-        if j < 7 and ((1 << (square + 9)) & bitboards["black"]):
-            white_pawn_moves.append(Move((i,j), (i+1,j+1), "wP", is_promotion = i+1==7))
-        #Capture to the left
-        if j > 0 and ((1 << (square + 7)) & bitboards["black"]):
-            white_pawn_moves.append(Move((i,j), (i+1,j-1), "wP", is_promotion = i+1==7))
-        #En passant
-        if i==4 and (en_passant_square == (i, j-1) or en_passant_square == (i, j+1)):
-            white_pawn_moves.append(Move((i,j), (en_passant_square[0] + 1, en_passant_square[1]), "wP", is_en_passant_move=True))
+            if square < 16 and ((1 << (square + 16)) & ~bitboards[ALL_PIECES]):
+                white_pawn_moves.append(encode_move(square, square + 16, piece, DOUBLE_PAWN_PUSH))
+        #Captures
+        for final_index in get_squares(WHITE_PAWN_ATTACKS[square] & bitboards[BLACK_PIECES]):
+            white_pawn_moves.extend(get_pawn_move(square, final_index, piece, CAPTURE, square >= 48))
+
+    #En passant: the pawns that can take are where a black pawn on the en passant square would attack
+    if en_passant_square:
+        for square in get_squares(BLACK_PAWN_ATTACKS[en_passant_square] & wP_bitboard):
+            white_pawn_moves.append(encode_move(square, en_passant_square, piece, EN_PASSANT | CAPTURE))
 
     return white_pawn_moves
 
 
-def get_black_pawn_moves(bitboards : dict, en_passant_square : tuple[int, int]) -> list[Move]:
+def get_black_pawn_moves(bitboards : list, en_passant_square : int) -> list[int]:
     """Finds the moves of the black pawns.
 
     Args:
-        bitboards (dict): The bitboards for the current position.
-        en_passant_square (tuple[int, int]): Current en passant square. (0,0) if none else (x,y).
+        bitboards (list): The bitboards for the current position.
+        en_passant_square (int): Current en passant square. 0 if none else the square behind the pawn that can be taken.
 
     Returns:
-        list[Move]: The moves of the black pawns.
+        list[int]: The moves of the black pawns.
     """    
     black_pawn_moves = []
-    bP_bitboard = bitboards["bP"]   
+    bP_bitboard, piece = bitboards[BP], BP
 
-    coordinates = find_coordinates(bP_bitboard)
-    for coordinate in coordinates:
-        square, i,j = coordinate
+    for square in get_squares(bP_bitboard):
         #First square in front is empty?
-        if (1 << (square - 8)) & ~bitboards["game"]:
-            black_pawn_moves.append(Move((i,j), (i-1,j), "bP", is_promotion = i-1==0))
+        if (1 << (square - 8)) & ~bitboards[ALL_PIECES]:
+            black_pawn_moves.extend(get_pawn_move(square, square - 8, piece, 0, square < 16))
             #Second square in front is empty?
-            if i == 6 and ((1 << (square - 16)) & ~bitboards["game"]):
-                black_pawn_moves.append(Move((i,j), (i-2,j), "bP", en_passant_square = (i-2,j)))
-        #Capture to the right (from white's perspective)
-        if j < 7 and ((1 << (square - 7)) & bitboards["white"]):
-            black_pawn_moves.append(Move((i,j), (i-1,j+1), "bP", is_promotion = i-1==0))
-        #Capture to the left (from white's perspective)
-        if j > 0 and ((1 << (square - 9)) & bitboards["white"]):
-            black_pawn_moves.append(Move((i,j), (i-1,j-1), "bP", is_promotion = i-1==0)) 
-        #En passant 
-        if i==3 and (en_passant_square == (i, j-1) or en_passant_square == (i,j+1)):
-            black_pawn_moves.append(Move((i,j), (en_passant_square[0]-1, en_passant_square[1]), "bP", is_en_passant_move=True))
+            if square >= 48 and ((1 << (square - 16)) & ~bitboards[ALL_PIECES]):
+                black_pawn_moves.append(encode_move(square, square - 16, piece, DOUBLE_PAWN_PUSH))
+        #Captures
+        for final_index in get_squares(BLACK_PAWN_ATTACKS[square] & bitboards[WHITE_PIECES]):
+            black_pawn_moves.extend(get_pawn_move(square, final_index, piece, CAPTURE, square < 16))
+
+    #En passant: the pawns that can take are where a white pawn on the en passant square would attack
+    if en_passant_square:
+        for square in get_squares(WHITE_PAWN_ATTACKS[en_passant_square] & bP_bitboard):
+            black_pawn_moves.append(encode_move(square, en_passant_square, piece, EN_PASSANT | CAPTURE))
             
     return black_pawn_moves
 
 
-def get_pawn_moves(bitboards : dict, en_passant_square : tuple[int, int], white_to_move : bool) -> list[Move]:
+def get_pawn_moves(bitboards : list, en_passant_square : int, white_to_move : bool) -> list[int]:
     """Finds the moves of the pawns for the current turn.
 
     Args:
-        bitboards (dict): The bitboards for the current position.
-        en_passant_square (tuple[int, int]): Current en passant square. (0,0) if none else (x,y).
+        bitboards (list): The bitboards for the current position.
+        en_passant_square (int): Current en passant square. 0 if none else the square behind the pawn that can be taken.
         white_to_move (bool): Is it white to move?
 
     Returns:
-        list[Move]: The moves of the pawns for the current turn.
+        list[int]: The moves of the pawns for the current turn.
     """
     return get_white_pawn_moves(bitboards, en_passant_square) if white_to_move else get_black_pawn_moves(bitboards, en_passant_square)
 
 
-def get_knight_moves(bitboards : dict, white_to_move : bool) -> list[Move]:
+def get_knight_moves(bitboards : list, white_to_move : bool) -> list[int]:
     """Finds the moves of the knights.
 
     Args:
-        bitboards (dict): The bitboards for the current position.
+        bitboards (list): The bitboards for the current position.
         white_to_move (bool): Is it white to move?
 
     Returns:
-        list[Move]: The moves of the knights for the current position.
+        list[int]: The moves of the knights for the current position.
     """
     knight_moves = []
-    directions = ((-2,-1), (-2,1), (-1, -2), (-1, 2), (1,-2),(1,2), (2,-1), (2,1))
 
     if white_to_move:
-        N_bitboard, ally_pieces, piece_tag = bitboards["wN"], bitboards["white"], "wN"
+        N_bitboard, ally_pieces, ennemy_pieces, piece = bitboards[WN], bitboards[WHITE_PIECES], bitboards[BLACK_PIECES], WN
     else:
-        N_bitboard, ally_pieces, piece_tag = bitboards["bN"], bitboards["black"], "bN"
-
-    coordinates = find_coordinates(N_bitboard)
-    for coordinate in coordinates:
-        _, i, j = coordinate
-        for direction in directions:
-            ni, nj = i + direction[0], j + direction[1]
-            #Out of bounds?
-            if 0 <= ni <= 7 and 0 <= nj <= 7:
-                if (1 << (8*ni + nj)) & ~ally_pieces:
-                    knight_moves.append(Move((i,j), (ni,nj), piece_tag))
-                         
+        N_bitboard, ally_pieces, ennemy_pieces, piece = bitboards[BN], bitboards[BLACK_PIECES], bitboards[WHITE_PIECES], BN
+
+    for square in get_squares(N_bitboard):
+        knight_moves.extend(get_moves_to_targets(square, KNIGHT_ATTACKS[square] & ~ally_pieces, piece, ennemy_pieces))
+
     return knight_moves
 
 
-def get_bishop_moves(bitboards : dict, white_to_move : bool, is_queen_move : bool) -> list[Move]:
+def get_bishop_moves(bitboards : list, white_to_move : bool) -> list[int]:
     """Finds the moves of the bishops.
 
     Args:
-        bitboards (dict): The bitboards for the current position.
+        bitboards (list): The bitboards for the current position.
         white_to_move (bool): Is it white to move?
-        is_queen_move (bool): Is the function used to calculate the moves for the queen?
 
     Returns:
-        list[Move]: The moves for the bishops in the current position.
+        list[int]: The moves for the bishops in the current position.
     """
     bishop_moves = []
-    directions = ((-1,-1), (-1,1), (1,-1), (1,1))
 
     if white_to_move:
-        enemy_pieces = bitboards["black"]
-        if is_queen_move:
-            B_bitboard, piece_tag = bitboards["wQ"], "wQ" 
-        else:
-            B_bitboard, piece_tag = bitboards["wB"], "wB"
+        B_bitboard, ally_pieces, ennemy_pieces, piece = bitboards[WB], bitboards[WHITE_PIECES], bitboards[BLACK_PIECES], WB
     else:
-        enemy_pieces = bitboards["white"]
-        if is_queen_move:
-            B_bitboard, piece_tag = bitboards["bQ"], "bQ" 
-        else:
-            B_bitboard, piece_tag = bitboards["bB"], "bB"
-
-    coordinates = find_coordinates(B_bitboard)
-    for coordinate in coordinates:
-        _, i, j = coordinate
-        for direction in directions:
-            k=1
-            while 0 <= i + k*direction[0] <= 7 and 0 <= j + k*direction[1] <= 7:
-                #Empty square
-                if (1 << ((i+k*direction[0])*8 + (j+k*direction[1]))) & ~bitboards["game"]:
-                    bishop_moves.append(Move((i,j), (i+k*direction[0],j+k*direction[1]), piece_tag))
-                #Square with enemy piece
-                elif (1 << ((i+k*direction[0])*8 + (j+k*direction[1]))) & enemy_pieces:
-                    bishop_moves.append(Move((i,j), (i+k*direction[0],j+k*direction[1]), piece_tag))
-                    break
-                #Square with ally piece
-                else:
-                    break
-                k += 1
+        B_bitboard, ally_pieces, ennemy_pieces, piece = bitboards[BB], bitboards[BLACK_PIECES], bitboards[WHITE_PIECES], BB
+
+    for square in get_squares(B_bitboard):
+        bishop_moves.extend(get_moves_to_targets(square, get_bishop_attacks(square, bitboards[ALL_PIECES]) & ~ally_pieces, piece, ennemy_pieces))
     
     return bishop_moves
                       
 
-def get_rook_moves(bitboards : dict, white_to_move : bool, is_queen_move : bool) -> list[Move]:
+def get_rook_moves(bitboards : list, white_to_move : bool) -> list[int]:
     """Finds the moves of the rooks.
 
     Args:
-        bitboards (dict): The bitboards for the current position.
+        bitboards (list): The bitboards for the current position.
         white_to_move (bool): Is it white to move?
-        is_queen_move (bool): Is the function used to calculate the moves for the queen?
 
     Returns:
-        list[Move]: The moves of the rooks in the current position.
+        list[int]: The moves of the rooks in the current position.
     """
     rook_moves = []
-    directions = ((-1,0), (0,-1), (1,0), (0,1))
 
     if white_to_move:
-        enemy_pieces = bitboards["black"]
-        if is_queen_move:
-            R_bitboard, piece_tag = bitboards["wQ"], "wQ"
-        else:    
-            R_bitboard, piece_tag = bitboards["wR"], "wR"
+        R_bitboard, ally_pieces, ennemy_pieces, piece = bitboards[WR], bitboards[WHITE_PIECES], bitboards[BLACK_PIECES], WR
     else:
-        enemy_pieces = bitboards["white"]
-        if is_queen_move:
-            R_bitboard, piece_tag = bitboards["bQ"], "bQ" 
-        else:
-            R_bitboard, piece_tag = bitboards["bR"], "bR"
-
-    coordinates = find_coordinates(R_bitboard)
-    for coordinate in coordinates:
-        _, i, j = coordinate
-        for direction in directions:
-            k=1
-            while 0 <= i + k*direction[0] <= 7 and 0 <= j + k*direction[1] <= 7:
-                if (1 << ((i+k*direction[0])*8 + (j+k*direction[1]))) & ~bitboards["game"]:
-                    rook_moves.append(Move((i,j), (i+k*direction[0], j+k*direction[1]), piece_tag))
-                elif (1 << ((i+k*direction[0])*8 + (j+k*direction[1]))) & enemy_pieces:
-                    rook_moves.append(Move((i,j), (i+k*direction[0], j+k*direction[1]), piece_tag))
-                    break
-                else:
-                    break
-                k+=1
+        R_bitboard, ally_pieces, ennemy_pieces, piece = bitboards[BR], bitboards[BLACK_PIECES], bitboards[WHITE_PIECES], BR
+
+    for square in get_squares(R_bitboard):
+        rook_moves.extend(get_moves_to_targets(square, get_rook_attacks(square, bitboards[ALL_PIECES]) & ~ally_pieces, piece, ennemy_pieces))
 
     return rook_moves
 
 
-def get_queen_moves(bitboards : dict, white_to_move : bool) -> list[Move]:
+def get_queen_moves(bitboards : list, white_to_move : bool) -> list[int]:
     """Finds the moves of the queen.
 
     Args:
-        bitboards (dict): The bitboards for the current position.
+        bitboards (list): The bitboards for the current position.
         white_to_move (bool): Is it white to move?
 
     Returns:
-        list[Move]: The moves of the queen in the current position.
+        list[int]: The moves of the queen in the current position.
     """
     queen_moves = []
 
-    bishop_like_moves= get_bishop_moves(bitboards, white_to_move, True)
-    rook_like_moves = get_rook_moves(bitboards, white_to_move, True)
+    if white_to_move:
+        Q_bitboard, ally_pieces, ennemy_pieces, piece = bitboards[WQ], bitboards[WHITE_PIECES], bitboards[BLACK_PIECES], WQ
+    else:
+        Q_bitboard, ally_pieces, ennemy_pieces, piece = bitboards[BQ], bitboards[BLACK_PIECES], bitboards[WHITE_PIECES], BQ
 
-    queen_moves.extend(bishop_like_moves)
-    queen_moves.extend(rook_like_moves)
+    for square in get_squares(Q_bitboard):
+        queen_moves.extend(get_moves_to_targets(square, get_queen_attacks(square, bitboards[ALL_PIECES]) & ~ally_pieces, piece, ennemy_pieces))
 
     return queen_moves 
 
 
-def get_king_moves(bitboards : dict, white_to_move : bool, castling : dict) -> list[Move]:
+def get_king_moves(bitboards : list, white_to_move : bool, castling_rights : int) -> list[int]:
     """Finds the moves of the king including castling if available.
 
     Args:
-        bitboards (dict): The bitboards for the current position.
+        bitboards (list): The bitboards for the current position.
         white_to_move (bool): Is it white to move?
-        castling (dict): Castling info from the current position.
+        castling_rights (int): Castling rights bits of the current position.
 
     Returns:
-        list[Move]: The moves of the king in the current position.
+        list[int]: The moves of the king in the current position.
     """
     king_moves = []
-    directions = ((-1,1), (-1,0), (-1,-1), (0,-1), (1,-1), (1,0), (1,1), (0,1))
 
     if white_to_move:
-        K_bitboard, ally_pieces, piece_tag, original_square = bitboards["wK"], bitboards["white"], "wK", (0,4)
+        K_bitboard, ally_pieces, ennemy_pieces, piece, original_square = bitboards[WK], bitboards[WHITE_PIECES], bitboards[BLACK_PIECES], WK, 4
     else:
-        K_bitboard, ally_pieces, piece_tag, original_square = bitboards["bK"], bitboards["black"], "bK", (7,4)
+        K_bitboard, ally_pieces, ennemy_pieces, piece, original_square = bitboards[BK], bitboards[BLACK_PIECES], bitboards[WHITE_PIECES], BK, 60
 
-    coordinates = find_coordinates(K_bitboard)[0]
-    _, i, j = coordinates
+    square = K_bitboard.bit_length() - 1
     #Normal king moves
-    for direction in directions:
-        if 0 <= i + direction[0] <= 7 and 0 <= j + direction[1] <= 7:
-            if ((1 << ((i+direction[0])*8 + (j+direction[1]))) & ~ally_pieces):
-                king_moves.append(Move((i,j), (i+direction[0],j+direction[1]), piece_tag))
+    king_moves.extend(get_moves_to_targets(square, KING_ATTACKS[square] & ~ally_pieces, piece, ennemy_pieces))
 
     #Castling
-    if (i,j) == original_square:
-        if white_to_move:
-            if castling["wkk"]:
-                king_moves.extend(get_white_kingside_castle(bitboards["white"]))
-            if castling["wkq"]:
-                king_moves.extend(get_white_queenside_castle(bitboards["white"]))
-        else:
-            if castling["bkk"]:
-                king_moves.extend(get_black_kingside_castle(bitboards["black"]))
-            if castling["bkq"]:
-                king_moves.extend(get_black_queenside_castle(bitboards["black"]))
+    if square == original_square:
+        king_moves.extend(get_castling_moves(bitboards, white_to_move, castling_rights))
 
     return king_moves
 
 
-def get_white_kingside_castle(white_bitboard : dict) -> list[Move]:
-    """Checks if white can castle kingside.
+def get_castling_moves(bitboards : list, white_to_move : bool, castling_rights : int) -> list[int]:
+    """Finds the available castling moves.
 
     Args:
-        white_bitboard (dict): Bitboard for the white pieces.
+        bitboards (list): The bitboards for the current position.
+        white_to_move (bool): Is it white to move?
+        castling_rights (int): Castling rights bits of the current position.
 
     Returns:
-        list[Move]: Kingside castle move.
+        list[int]: The castling moves.
     """
-    if ((1 << 5) & ~white_bitboard) and  ((1 << 6) & ~white_bitboard):
-        return [Move((0,4), (0,6), "wK", is_castling_move=True)]
+    castling_moves = []
+    if white_to_move:
+        if castling_rights & WHITE_KINGSIDE:
+            castling_moves.extend(get_white_kingside_castle(bitboards))
+        if castling_rights & WHITE_QUEENSIDE:
+            castling_moves.extend(get_white_queenside_castle(bitboards))
+    else:
+        if castling_rights & BLACK_KINGSIDE:
+            castling_moves.extend(get_black_kingside_castle(bitboards))
+        if castling_rights & BLACK_QUEENSIDE:
+            castling_moves.extend(get_black_queenside_castle(bitboards))
+    return castling_moves
+
+
+def get_white_kingside_castle(bitboards : list) -> list[int]:
+    """Checks if white can castle kingside: f1 and g1 are empty and e1, f1 and g1 aren't attacked.
+
+    Args:
+        bitboards (list): The bitboards for the current position.
+
+    Returns:
+        list[int]: Kingside castle move.
+    """
+    if not (((1 << 5) | (1 << 6)) & bitboards[ALL_PIECES]) and not any(is_square_attacked(bitboards, square, False) for square in (4, 5, 6)):
+        return [encode_move(4, 6, WK, CASTLING)]
     return []
 
 
-def get_black_kingside_castle(black_bitboard : dict) -> list[Move]:
-    """Checks if black can castle kingside.
+def get_black_kingside_castle(bitboards : list) -> list[int]:
+    """Checks if black can castle kingside: f8 and g8 are empty and e8, f8 and g8 aren't attacked.
 
     Args:
-        black_bitboard (dict): Bitboard for the black pieces.
+        bitboards (list): The bitboards for the current position.
 
     Returns:
-        list[Move]: Kingside castle move.
+        list[int]: Kingside castle move.
     """
-    if ((1 << 61) & ~black_bitboard) and ((1 << 62) & ~black_bitboard):
-        return [Move((7,4), (7,6), "bK", is_castling_move=True)]
+    if not (((1 << 61) | (1 << 62)) & bitboards[ALL_PIECES]) and not any(is_square_attacked(bitboards, square, True) for square in (60, 61, 62)):
+        return [encode_move(60, 62, BK, CASTLING)]
     return []
 
 
-def get_white_queenside_castle(white_bitboard : dict) -> list[Move]:
-    """Checks if white can castle queenside.
+def get_white_queenside_castle(bitboards : list) -> list[int]:
+    """Checks if white can castle queenside: b1, c1 and d1 are empty and c1, d1 and e1 aren't attacked.
 
     Args:
-        white_bitboard (dict): Bitboard for the white pieces.
+        bitboards (list): The bitboards for the current position.
 
     Returns:
-        list[Move]: Queenside castle move.
+        list[int]: Queenside castle move.
     """
-    if ((1 << 1) & ~white_bitboard) and ((1 << 2) & ~white_bitboard) and ((1 << 3) & ~white_bitboard):
-        return [Move((0,4), (0,2), "wK", is_castling_move=True)]
+    if not (((1 << 1) | (1 << 2) | (1 << 3)) & bitboards[ALL_PIECES]) and not any(is_square_attacked(bitboards, square, False) for square in (2, 3, 4)):
+        return [encode_move(4, 2, WK, CASTLING)]
     return []
 
 
-def get_black_queenside_castle(black_bitboard : dict) -> list[Move]:
-    """Checks if black can castle queenside.
+def get_black_queenside_castle(bitboards : list) -> list[int]:
+    """Checks if black can castle queenside: b8, c8 and d8 are empty and c8, d8 and e8 aren't attacked.
 
     Args:
-        black_bitboard (dict): Bitboard for the black pieces.
+        bitboards (list): The bitboards for the current position.
 
     Returns:
-        list[Move]: Queenside castle move.
+        list[int]: Queenside castle move.
     """
-    if ((1 << 57) & ~black_bitboard) and ((1 << 58) & ~black_bitboard) and ((1 << 59) & ~black_bitboard):
-        return [Move((7,4), (7,2), "bK", is_castling_move=True)]
+    if not (((1 << 57) | (1 << 58) | (1 << 59)) & bitboards[ALL_PIECES]) and not any(is_square_attacked(bitboards, square, True) for square in (58, 59, 60)):
+        return [encode_move(60, 58, BK, CASTLING)]
     return []
 
 
-def get_all_possible_moves(bitboards : dict, en_passant_square : tuple[int, int], white_to_move : bool, castling : dict) -> list[Move]:
+def is_square_attacked(bitboards : list, square : int, by_white : bool, occupancy : int|None = None) -> bool:
+    """Checks if a square is attacked by one side. Instead of generating the attacker's moves, 
+    the attacks of each piece type are cast from the square itself and compared with the attacker's pieces of that type.
+
+    Args:
+        bitboards (list): The bitboards for the current position.
+        square (int): The index of the square.
+        by_white (bool): Is the attacker white?
+        occupancy (int | None): Bitboard of the pieces that block sliding attacks. bitboards[ALL_PIECES] if None.
+
+    Returns:
+        bool: If at least one piece of the attacker attacks the square.
+    """
+    if occupancy is None:
+        occupancy = bitboards[ALL_PIECES]
+
+    if by_white:
+        offset, pawn_attacks = 0, BLACK_PAWN_ATTACKS #A white pawn attacks the square if a black pawn on the square would attack it
+    else:
+        offset, pawn_attacks = BLACK_OFFSET, WHITE_PAWN_ATTACKS
+
+    queens = bitboards[QUEEN + offset]
+    return bool((KNIGHT_ATTACKS[square] & bitboards[KNIGHT + offset])
+                or (pawn_attacks[square] & bitboards[PAWN + offset])
+                or (get_bishop_attacks(square, occupancy) & (bitboards[BISHOP + offset] | queens))
+                or (get_rook_attacks(square, occupancy) & (bitboards[ROOK + offset] | queens))
+                or (KING_ATTACKS[square] & bitboards[KING + offset]))
+
+
+def is_in_check(game : Game) -> bool:
+    """Checks if the king of the side to move is attacked.
+
+    Args:
+        game (Game): The game state.
+
+    Returns:
+        bool: If the side to move is in check.
+    """
+    king_bitboard = game.bitboards[WK] if game.white_to_move else game.bitboards[BK]
+    return is_square_attacked(game.bitboards, king_bitboard.bit_length() - 1, not game.white_to_move)
+
+
+def get_all_possible_moves(bitboards : list, en_passant_square : int, white_to_move : bool, castling_rights : int) -> list[int]:
     """Finds all possible moves (not necessarily legal) in the position.
 
     Args:
-        bitboards (dict): The bitboards for the current position.
-        en_passant_square (tuple[int, int]): Current en passant square. (0,0) if none else (x,y).
+        bitboards (list): The bitboards for the current position.
+        en_passant_square (int): Current en passant square. 0 if none else the square behind the pawn that can be taken.
         white_to_move (bool): Whose turn it is.
-        castling (dict): Castling info from the current position.
+        castling_rights (int): Castling rights bits of the current position.
 
     Returns:
-        list[Move]: The possible moves.
+        list[int]: The possible moves.
     """
     pawn_moves = get_pawn_moves(bitboards, en_passant_square, white_to_move)
     knight_moves = get_knight_moves(bitboards, white_to_move)
-    bishop_moves = get_bishop_moves(bitboards, white_to_move, False)
-    rook_moves = get_rook_moves(bitboards, white_to_move, False)
+    bishop_moves = get_bishop_moves(bitboards, white_to_move)
+    rook_moves = get_rook_moves(bitboards, white_to_move)
     queen_moves = get_queen_moves(bitboards, white_to_move)
-    king_moves = get_king_moves(bitboards, white_to_move, castling)
+    king_moves = get_king_moves(bitboards, white_to_move, castling_rights)
 
     all_moves = pawn_moves + knight_moves + bishop_moves + rook_moves + queen_moves + king_moves
 
     return all_moves
 
 
-#TODO Promotion
-def get_all_legal_moves(game : Game) -> list[Move]:
+def get_all_legal_moves(game : Game) -> list[int]:
     """Finds all legal moves in a position.
 
     Args:
         game (Game): The game state.
 
     Returns:
-        list[Move]: All legal moves.
+        list[int]: All legal moves.
     """
     all_legal_moves = []
-    all_possible_moves = get_all_possible_moves(game.bitboards, game.en_passant_square[-1], game.white_to_move, 
-                                                {"wkk" : game.wk_can_kingside_castle[-1], "wkq" : game.wk_can_queenside_castle[-1], 
-                                                 "bkk" : game.bk_can_kingside_castle[-1], "bkq" : game.bk_can_queenside_castle[-1]})
+    all_possible_moves = get_all_possible_moves(game.bitboards, game.en_passant_square, game.white_to_move, game.castling_rights)
     for move in all_possible_moves:
+        #The move is legal if our king isn't attacked once it is played
         game.make_move(move)
-        ennemy_moves = get_all_possible_moves(game.bitboards, game.en_passant_square[-1], game.white_to_move, 
-                                            {"wkk" : game.wk_can_kingside_castle[-1], "wkq" : game.wk_can_queenside_castle[-1], 
-                                             "bkk" : game.bk_can_kingside_castle[-1], "bkq" : game.bk_can_queenside_castle[-1]})
-        
-        if not game.white_to_move and not move.is_castling_move:
-            _, king_i, king_j = find_coordinates(game.bitboards["wK"])[0]
-        elif game.white_to_move and not move.is_castling_move:
-            _, king_i, king_j = find_coordinates(game.bitboards["bK"])[0]
-        else:
-            king_i, king_j = move.init_square 
-
+        king_bitboard = game.bitboards[BK] if game.white_to_move else game.bitboards[WK]
+        in_check = is_square_attacked(game.bitboards, king_bitboard.bit_length() - 1, game.white_to_move)
         game.undo_move()
 
-        to_add = True
-        for ennemy_move in ennemy_moves:
-            if ennemy_move.final_square == (king_i, king_j):
-                to_add = False
-                break
-        
-        if to_add:
+        if not in_check:
             all_legal_moves.append(move)
 
     return all_legal_moves
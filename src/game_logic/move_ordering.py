@@ -0,0 +1,129 @@
+### This file implements the move ordering of the search: a staged move picker with MVV-LVA, killer moves and history scores. ###
+
+from typing import Iterator
+
+from game_logic.game_state import Game
+from game_logic.move import CAPTURE_MASK
+from game_logic.legal_move_generation import get_legal_move_masks, get_legal_captures, get_legal_quiets
+
+#Killer moves kept per ply
+KILLER_SLOTS = 2
+#History scores are halved when one reaches this, so recent cutoffs weigh more
+HISTORY_LIMIT = 1 << 20
+
+
+def get_capture_score(board : list, move : int) -> int:
+    """Scores a capture or a promotion: the most valuable victim first, then the least valuable attacker (MVV-LVA).
+    A promotion counts as capturing the piece the pawn becomes.
+
+    Args:
+        board (list): The mailbox of the position.
+        move (int): The capture or promotion.
+
+    Returns:
+        int: The score, higher is searched first.
+    """
+    #An en passant capture has no piece on the final square but takes a pawn, whose type is 0
+    victim_type = (board[(move >> 6) & 63] or 0) % 6 if move & CAPTURE_MASK else 0
+    if move >> 20:
+        victim_type += (move >> 20) % 6
+    return victim_type * 8 - ((move >> 12) & 15) % 6
+
+
+def sort_captures(board : list, captures : list[int]) -> list[int]:
+    """Sorts captures and promotions with MVV-LVA (see get_capture_score).
+
+    Args:
+        board (list): The mailbox of the position.
+        captures (list[int]): The captures and promotions.
+
+    Returns:
+        list[int]: The sorted moves.
+    """
+    return sorted(captures, key=lambda move: get_capture_score(board, move), reverse=True)
+
+
+class MoveOrdering:
+    """Killer moves and history scores learned by a search, and the staged move picker which uses them.
+
+    Args:
+        max_ply (int): The deepest ply killer moves are kept for.
+    """
+    def __init__(self, max_ply : int = 128):
+        self.max_ply = max_ply
+        #killers[ply]: the last quiet moves which caused a beta cutoff at this ply, most recent first
+        self.killers = [[0] * KILLER_SLOTS for _ in range(max_ply)]
+        #history[piece][square]: how often moving this piece to this square caused a beta cutoff, weighted by depth
+        self.history = [[0] * 64 for _ in range(12)]
+
+    def clear(self) -> None:
+        """Forgets the killer moves and ages the history scores before a new search.
+        """
+        for killers in self.killers:
+            killers[:] = [0] * KILLER_SLOTS
+        for piece_history in self.history:
+            for square in range(64):
+                piece_history[square] >>= 1
+
+    def add_cutoff(self, move : int, depth : int, ply : int) -> None:
+        """Remembers a quiet move which caused a beta cutoff.
+
+        Args:
+            move (int): The quiet move.
+            depth (int): The remaining depth of the node, deeper cutoffs count more.
+            ply (int): The distance to the root.
+        """
+        if ply < self.max_ply:
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+
+        piece_history = self.history[(move >> 12) & 15]
+        final_index = (move >> 6) & 63
+        piece_history[final_index] += depth * depth
+        if piece_history[final_index] >= HISTORY_LIMIT:
+            for piece_history in self.history:
+                for square in range(64):
+                    piece_history[square] >>= 1
+
+    def pick_moves(self, game : Game, ply : int, hash_move : int = 0) -> Iterator[int]:
+        """Gives the legal moves in the order they should be searched, generating each stage only when it is reached:
+        the hash move, the captures and promotions (MVV-LVA), the killer moves, then the quiet moves by history score.
+        A beta cutoff on the hash move skips the whole generation, one on a capture skips the quiet moves.
+
+        Args:
+            game (Game): The game state, which must not have changed when the next move is asked for.
+            ply (int): The distance to the root.
+            hash_move (int): A move to search first, 0 if none. It must come from this position (transposition table or
+                previous principal variation), only the moved piece is checked to guard against hash collisions.
+
+        Yields:
+            int: The legal moves, each one once.
+        """
+        board = game.board
+        #Hash move
+        if hash_move and board[hash_move & 63] == (hash_move >> 12) & 15:
+            yield hash_move
+        else:
+            hash_move = 0
+
+        #Captures and promotions
+        masks = get_legal_move_masks(game)
+        for move in sort_captures(board, get_legal_captures(game, masks)):
+            if move != hash_move:
+                yield move
+
+        #Killer moves, if they are legal here
+        quiets = get_legal_quiets(game, masks)
+        killers = self.killers[ply] if ply < self.max_ply else ()
+        for killer in killers:
+            if killer and killer != hash_move and killer in quiets:
+                yield killer
+
+        #Quiet moves
+        piece_histories = self.history
+        quiets.sort(key=lambda move: piece_histories[(move >> 12) & 15][(move >> 6) & 63], reverse=True)
+        for move in quiets:
+            if move != hash_move and move not in killers:
+                yield move
@@ -0,0 +1,165 @@
+### This file implements the opening book: a file of (position hash, move, weight) records sorted by hash, read through mmap. ###
+#The file is made of little-endian unsigned 64-bit words: a 2 word header (BOOK_MAGIC, then the number of records N),
+#then the N records stored as two columns of N words, so that the hashes are one contiguous sorted array:
+#   hash column: the Zobrist hash of the position
+#   data column: the move (bits 0-31) and its weight (bits 32-63), the number of games which played it
+#The records are sorted by hash, then by decreasing weight. Opening the book only maps the file: nothing is read or
+#parsed until a lookup, which binary searches the hash column with bisect (in C, straight on the mapped memory).
+#The pages are read by the OS on demand and shared by every process which maps the same file.
+
+import mmap
+import random
+import time
+from array import array
+from bisect import bisect_left
+from typing import Iterable
+
+from game_logic.game_state import Game, STARTING_FEN
+from game_logic.move import index_moves_by_piece
+from game_logic.legal_move_generation import get_all_legal_moves_masked
+from game_logic.pgn import PGNError, read_games, get_san_moves, resolve_san
+
+BOOK_MAGIC = b"CATBOOK2"
+HEADER_WORDS = 2
+
+
+class OpeningBook:
+    """Read-only opening book mapped from a file.
+
+    Args:
+        path (str): The book file, written by build_book.
+
+    Raises:
+        ValueError: If the file isn't an opening book.
+    """
+    def __init__(self, path : str):
+        with open(path, "rb") as f:
+            self.memory = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        #The words are read in the native byte order, little-endian on the x86 and ARM machines the book is built on
+        words = memoryview(self.memory).cast("B")[:len(self.memory) // 8 * 8].cast("Q")
+        if len(words) < HEADER_WORDS or self.memory[:len(BOOK_MAGIC)] != BOOK_MAGIC or len(words) != HEADER_WORDS + 2 * words[1]:
+            words.release()
+            self.memory.close()
+            raise ValueError(f"Not an opening book: {path!r}")
+        self.record_count = words[1]
+        self.words = words
+        self.keys = words[HEADER_WORDS:HEADER_WORDS + self.record_count]
+        self.data = words[HEADER_WORDS + self.record_count:]
+
+    def probe(self, key : int) -> list[tuple[int, int]]:
+        """Finds the book moves of a position.
+
+        Args:
+            key (int): The Zobrist hash of the position.
+
+        Returns:
+            list[tuple[int, int]]: (move, weight) of each book move, highest weight first. Empty if the position isn't in the book.
+        """
+        keys, data = self.keys, self.data
+        entries = []
+        index = bisect_left(keys, key)
+        while index < self.record_count and keys[index] == key:
+            entries.append((data[index] & 0xFFFFFFFF, data[index] >> 32))
+            index += 1
+        return entries
+
+    def get_move(self, game : Game, generator : random.Random|None = None) -> int|None:
+        """Chooses a book move for the current position. A move which isn't legal (a hash collision) is never chosen.
+
+        Args:
+            game (Game): The game state.
+            generator (random.Random | None): Chooses a move at random in proportion to the weights, the most
+                played move if None.
+
+        Returns:
+            int | None: The encoded move, None if the position isn't in the book.
+        """
+        entries = self.probe(game.hash)
+        if not entries:
+            return None
+        legal_moves = set(get_all_legal_moves_masked(game))
+        entries = [(move, weight) for move, weight in entries if move in legal_moves]
+        if not entries:
+            return None
+        if generator is None:
+            return entries[0][0]
+        return generator.choices([move for move, _ in entries], weights=[weight for _, weight in entries])[0]
+
+    def close(self) -> None:
+        """Unmaps the file.
+        """
+        #The views must be released before the memory is closed
+        self.keys.release()
+        self.data.release()
+        self.words.release()
+        self.memory.close()
+
+    def __len__(self) -> int:
+        return self.record_count
+
+    def __enter__(self) -> "OpeningBook":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def build_book(pgn_lines : Iterable[str], path : str, max_plies : int = 20, min_weight : int = 1) -> tuple[int, int]:
+    """Compiles an opening book from PGN games: every move of the first plies of each game is a record, weighted by
+    the number of games which played it in that position.
+
+    Args:
+        pgn_lines (Iterable[str]): The lines of the PGN file.
+        path (str): The book file to write.
+        max_plies (int): How many plies of each game are read.
+        min_weight (int): Moves played in fewer games are left out.
+
+    Returns:
+        tuple[int, int]: The number of games read (the moves of a game after an invalid one are left out) and the
+        number of records written.
+    """
+    weights = {}
+    games = 0
+    for headers, movetext in read_games(pgn_lines):
+        games += 1
+        try:
+            game = Game(headers.get("FEN", STARTING_FEN))
+        except ValueError:
+            #An invalid FEN tag: only this game is left out
+            continue
+        for san in get_san_moves(movetext)[:max_plies]:
+            try:
+                move = resolve_san(game, san, index_moves_by_piece(get_all_legal_moves_masked(game)))
+            except PGNError:
+                #The moves before the invalid one are still good opening moves
+                break
+            weights[(game.hash, move)] = weights.get((game.hash, move), 0) + 1
+            game.make_move(move)
+
+    records = sorted(((key, move, weight) for (key, move), weight in weights.items() if weight >= min_weight),
+                     key=lambda record: (record[0], -record[2], record[1]))
+    words = array("Q", BOOK_MAGIC)
+    words.append(len(records))
+    words.extend(key for key, _, _ in records)
+    words.extend(move | (min(weight, 0xFFFFFFFF) << 32) for _, move, weight in records)
+    with open(path, "wb") as f:
+        words.tofile(f)
+    return games, len(records)
+
+
+def benchmark_lookups(book : OpeningBook, keys : list[int], repeat : int = 10) -> float:
+    """Times the book lookups.
+
+    Args:
+        book (OpeningBook): The book.
+        keys (list[int]): The hashes looked up.
+        repeat (int): How many times each hash is looked up.
+
+    Returns:
+        float: The average time of a lookup in microseconds.
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for key in keys:
+            book.probe(key)
+    return (time.perf_counter() - start) / (repeat * len(keys)) * 1e6 if keys else 0.0
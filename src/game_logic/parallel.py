@@ -0,0 +1,154 @@
+### This file splits perft and fixed-depth analysis at the root over several processes, since threads can't run the generator in parallel. ###
+
+import multiprocessing
+import time
+
+from game_logic.game_state import Game
+from game_logic.move import move_to_uci
+from game_logic.perft import LEGAL_MOVE_GENERATORS, perft
+from game_logic.search import Search, score_from_table
+from game_logic.transposition_table import TranspositionTable
+
+
+def perft_root_move(task : tuple[Game, int, int, str]) -> int:
+    """Counts the leaf nodes under one root move (run in a worker process).
+
+    Args:
+        task (tuple[Game, int, int, str]): The game (pickled with its history), the root move, the depth from the root
+            and the name of the legal move generator. The game is left unchanged.
+
+    Returns:
+        int: The number of leaf nodes under the move.
+    """
+    game, move, depth, generator_name = task
+    game.make_move(move)
+    nodes = perft(game, depth - 1, LEGAL_MOVE_GENERATORS[generator_name])
+    game.undo_move()
+    return nodes
+
+
+def analyse_root_move(task : tuple[Game, int, int, float]) -> tuple[int, list[int], int]:
+    """Searches the position after one root move at a fixed depth (run in a worker process).
+    Every root move gets a new transposition table, so the result doesn't depend on which worker ran which move before.
+
+    Args:
+        task (tuple[Game, int, int, float]): The game (pickled with its history), the root move, the depth from the root
+            and the size of the transposition table in MB. The game is left unchanged.
+
+    Returns:
+        tuple[int, list[int], int]: The score of the move for the side to move at the root, the principal variation
+        starting with the move and the number of nodes searched.
+    """
+    game, move, depth, hash_size_mb = task
+    game.make_move(move)
+    search = Search(game, transposition_table=TranspositionTable(hash_size_mb))
+    info = search.search(max_depth=depth - 1)
+    game.undo_move()
+    #The score is for the opponent, and mates are one ply further from the root
+    return -score_from_table(info.score, 1), [move] + info.pv, info.nodes
+
+
+def run_root_split(function, tasks : list[tuple], workers : int) -> list:
+    """Runs one task per root move, in this process if there is one worker, else in a pool of processes.
+
+    Args:
+        function (function): The function run on each task (perft_root_move or analyse_root_move).
+        tasks (list[tuple]): The tasks.
+        workers (int): The number of worker processes.
+
+    Returns:
+        list: The result of each task, in the order of the tasks.
+    """
+    if workers <= 1:
+        return [function(task) for task in tasks]
+    with multiprocessing.Pool(workers) as pool:
+        #One root move at a time, so a worker which finishes a small subtree takes the next move
+        return pool.map(function, tasks, chunksize=1)
+
+
+def parallel_divide(game : Game, depth : int, workers : int, generator_name : str = "pin-mask") -> dict[str, int]:
+    """Counts the leaf nodes under each root move, one root move per task.
+
+    Args:
+        game (Game): The game state. It is left unchanged.
+        depth (int): How many plies to look ahead (at least 1).
+        workers (int): The number of worker processes.
+        generator_name (str): The legal move generator (a key of LEGAL_MOVE_GENERATORS).
+
+    Returns:
+        dict[str, int]: The number of leaf nodes for each root move in UCI notation, sorted by move.
+    """
+    moves = LEGAL_MOVE_GENERATORS[generator_name](game)
+    counts = run_root_split(perft_root_move, [(game, move, depth, generator_name) for move in moves], workers)
+    return dict(sorted(zip(map(move_to_uci, moves), counts)))
+
+
+def parallel_perft(game : Game, depth : int, workers : int, generator_name : str = "pin-mask") -> int:
+    """Counts the leaf nodes of the legal move tree, one root move per task.
+
+    Args:
+        game (Game): The game state. It is left unchanged.
+        depth (int): How many plies to look ahead.
+        workers (int): The number of worker processes.
+        generator_name (str): The legal move generator (a key of LEGAL_MOVE_GENERATORS).
+
+    Returns:
+        int: The number of leaf nodes at the given depth.
+    """
+    if depth == 0:
+        return 1
+    return sum(parallel_divide(game, depth, workers, generator_name).values())
+
+
+def parallel_analyse(game : Game, depth : int, workers : int, hash_size_mb : float = 4) -> list[tuple[int, int, list[int]]]:
+    """Scores every root move with a fixed-depth search, one root move per task.
+    Unlike a single search, every move gets an exact score (no alpha-beta bound shared between the root moves).
+
+    Args:
+        game (Game): The game state. It is left unchanged.
+        depth (int): The depth from the root (at least 2).
+        workers (int): The number of worker processes.
+        hash_size_mb (float): The size of each task's transposition table in MB.
+
+    Returns:
+        list[tuple[int, int, list[int]]]: (score, nodes, principal variation) of each root move, best first
+        (ties in UCI order, so the output is the same whatever the number of workers).
+    """
+    if depth < 2:
+        raise ValueError(f"The analysis depth must be at least 2, got {depth}")
+    moves = LEGAL_MOVE_GENERATORS["pin-mask"](game)
+    results = run_root_split(analyse_root_move, [(game, move, depth, hash_size_mb) for move in moves], workers)
+    analysis = [(score, nodes, pv) for score, pv, nodes in results]
+    analysis.sort(key=lambda result: (-result[0], move_to_uci(result[2][0])))
+    return analysis
+
+
+def scaling_report(fen : str, depth : int, max_workers : int, generator_name : str = "pin-mask") -> list[tuple[int, float, float]]:
+    """Times parallel perft with 1 to max_workers workers and prints the speedup over one worker.
+
+    Args:
+        fen (str): The position.
+        depth (int): How many plies to look ahead.
+        max_workers (int): The largest number of workers tried.
+        generator_name (str): The legal move generator (a key of LEGAL_MOVE_GENERATORS).
+
+    Returns:
+        list[tuple[int, float, float]]: (workers, seconds, speedup) for each number of workers.
+    """
+    game = Game(fen)
+    report = []
+    expected_nodes = None
+    print(f"{'workers':>7} {'nodes':>10} {'time (s)':>9} {'nodes/s':>9} {'speedup':>8} {'efficiency':>10}")
+    for workers in range(1, max_workers + 1):
+        start = time.perf_counter()
+        nodes = parallel_perft(game, depth, workers, generator_name)
+        seconds = time.perf_counter() - start
+        if expected_nodes is None:
+            expected_nodes = nodes
+        elif nodes != expected_nodes:
+            raise RuntimeError(f"Perft with {workers} workers gave {nodes} nodes instead of {expected_nodes}")
+
+        speedup = report[0][1] / seconds if report else 1.0
+        report.append((workers, seconds, speedup))
+        print(f"{workers:>7} {nodes:>10} {seconds:>9.3f} {nodes / seconds:>9.0f} {speedup:>8.2f} {speedup / workers:>10.1%}")
+    return report
@@ -0,0 +1,151 @@
+### This file implements the pawn structure evaluation and its cache, keyed by the pawn Zobrist hash. ###
+
+from game_logic.attack_tables import SQUARE_COORDINATES
+
+#Penalties for each doubled pawn (every pawn of a file after the first) and each isolated pawn (no friendly pawn on
+#the adjacent files), bonuses for a passed pawn by rank from its own side (no ennemy pawn in front of it on its file or
+#the adjacent files). (middlegame, endgame) in centipawns.
+DOUBLED_PAWN_PENALTY = (10, 20)
+ISOLATED_PAWN_PENALTY = (10, 15)
+PASSED_PAWN_BONUS = ((0, 0), (5, 10), (10, 20), (15, 35), (25, 60), (40, 90), (60, 130), (0, 0))
+
+FILE_MASKS = [0x0101010101010101 << j for j in range(8)]
+ADJACENT_FILES_MASKS = [(FILE_MASKS[j - 1] if j > 0 else 0) | (FILE_MASKS[j + 1] if j < 7 else 0) for j in range(8)]
+
+
+def build_front_spans() -> tuple[list[int], list[int]]:
+    """Builds the squares in front of each square on its file, for each color.
+
+    Returns:
+        tuple[list[int], list[int]]: The front span of each square index for white (towards the 8th rank)
+        and for black (towards the 1st rank).
+    """
+    white_spans, black_spans = [], []
+    for i, j in SQUARE_COORDINATES:
+        white_spans.append(sum(1 << (8*k + j) for k in range(i + 1, 8)))
+        black_spans.append(sum(1 << (8*k + j) for k in range(i)))
+    return white_spans, black_spans
+
+
+WHITE_FRONT_SPANS, BLACK_FRONT_SPANS = build_front_spans()
+#Squares a pawn can ever attack while moving forward: the front span of the adjacent files
+WHITE_ATTACK_SPANS = [sum(WHITE_FRONT_SPANS[square + dj] for dj in (-1, 1) if 0 <= j + dj <= 7) for square, (i, j) in enumerate(SQUARE_COORDINATES)]
+BLACK_ATTACK_SPANS = [sum(BLACK_FRONT_SPANS[square + dj] for dj in (-1, 1) if 0 <= j + dj <= 7) for square, (i, j) in enumerate(SQUARE_COORDINATES)]
+#A pawn is passed if there is no ennemy pawn in these squares
+WHITE_PASSED_MASKS = [WHITE_FRONT_SPANS[square] | WHITE_ATTACK_SPANS[square] for square in range(64)]
+BLACK_PASSED_MASKS = [BLACK_FRONT_SPANS[square] | BLACK_ATTACK_SPANS[square] for square in range(64)]
+
+
+class PawnEntry:
+    """Pawn structure evaluation of a position.
+
+    Args:
+        middlegame_score (int): The middlegame score of the pawn structure, from white's point of view.
+        endgame_score (int): The endgame score of the pawn structure, from white's point of view.
+        passed_pawns (tuple[int, int]): Bitboards of the white and black passed pawns.
+        attack_spans (tuple[int, int]): Bitboards of the squares the white and black pawns can ever attack.
+    """
+    __slots__ = ("middlegame_score", "endgame_score", "passed_pawns", "attack_spans")
+
+    def __init__(self, middlegame_score : int, endgame_score : int, passed_pawns : tuple[int, int], attack_spans : tuple[int, int]):
+        self.middlegame_score = middlegame_score
+        self.endgame_score = endgame_score
+        self.passed_pawns = passed_pawns
+        self.attack_spans = attack_spans
+
+
+def evaluate_pawns(white_pawns : int, black_pawns : int) -> PawnEntry:
+    """Evaluates the doubled, isolated and passed pawns.
+
+    Args:
+        white_pawns (int): Bitboard of the white pawns.
+        black_pawns (int): Bitboard of the black pawns.
+
+    Returns:
+        PawnEntry: The scores and masks of the pawn structure.
+    """
+    scores = [0, 0]
+    passed_pawns, attack_spans = [0, 0], [0, 0]
+    for color, (pawns, ennemy_pawns, passed_masks, spans, sign) in enumerate(
+            ((white_pawns, black_pawns, WHITE_PASSED_MASKS, WHITE_ATTACK_SPANS, 1),
+             (black_pawns, white_pawns, BLACK_PASSED_MASKS, BLACK_ATTACK_SPANS, -1))):
+        #Doubled pawns
+        for file_mask in FILE_MASKS:
+            file_pawns = (pawns & file_mask).bit_count()
+            if file_pawns > 1:
+                scores[0] -= sign * DOUBLED_PAWN_PENALTY[0] * (file_pawns - 1)
+                scores[1] -= sign * DOUBLED_PAWN_PENALTY[1] * (file_pawns - 1)
+
+        bitboard = pawns
+        while bitboard:
+            square_bit = bitboard & -bitboard
+            square = square_bit.bit_length() - 1
+            bitboard ^= square_bit
+            attack_spans[color] |= spans[square]
+            #Isolated pawn
+            if not pawns & ADJACENT_FILES_MASKS[square & 7]:
+                scores[0] -= sign * ISOLATED_PAWN_PENALTY[0]
+                scores[1] -= sign * ISOLATED_PAWN_PENALTY[1]
+            #Passed pawn, the bonus grows as it advances
+            if not ennemy_pawns & passed_masks[square]:
+                passed_pawns[color] |= square_bit
+                relative_rank = square >> 3 if sign == 1 else 7 - (square >> 3)
+                scores[0] += sign * PASSED_PAWN_BONUS[relative_rank][0]
+                scores[1] += sign * PASSED_PAWN_BONUS[relative_rank][1]
+
+    return PawnEntry(scores[0], scores[1], tuple(passed_pawns), tuple(attack_spans))
+
+
+class PawnHashTable:
+    """Bounded cache of pawn structure evaluations. Each key has one slot, a new entry replaces the old one.
+
+    Args:
+        size (int): The number of entries, rounded down to a power of two.
+    """
+    def __init__(self, size : int = 16384):
+        if size < 1:
+            raise ValueError(f"The pawn hash table needs at least one entry, got {size}")
+        size = 1 << (size.bit_length() - 1)
+        self.mask = size - 1
+        #(pawn hash, entry) in each slot
+        self.slots = [None] * size
+        self.probes = 0
+        self.hits = 0
+
+    def get_entry(self, pawn_hash : int, white_pawns : int, black_pawns : int) -> PawnEntry:
+        """Gives the evaluation of a pawn structure, computing it only if it isn't cached.
+
+        Args:
+            pawn_hash (int): The pawn Zobrist key of the position (Game.pawn_hash).
+            white_pawns (int): Bitboard of the white pawns.
+            black_pawns (int): Bitboard of the black pawns.
+
+        Returns:
+            PawnEntry: The scores and masks of the pawn structure.
+        """
+        self.probes += 1
+        index = pawn_hash & self.mask
+        slot = self.slots[index]
+        if slot is not None and slot[0] == pawn_hash:
+            self.hits += 1
+            return slot[1]
+
+        entry = evaluate_pawns(white_pawns, black_pawns)
+        self.slots[index] = (pawn_hash, entry)
+        return entry
+
+    @property
+    def hit_rate(self) -> float:
+        """The share of probes found in the table, 0 before the first probe.
+        """
+        return self.hits / self.probes if self.probes else 0.0
+
+    def clear(self) -> None:
+        """Empties the table and resets the counters.
+        """
+        self.slots = [None] * len(self.slots)
+        self.probes = 0
+        self.hits = 0
+
+    def __repr__(self) -> str:
+        return f"PawnHashTable({len(self.slots)} entries, {self.probes} probes, hit rate {self.hit_rate:.1%})"
@@ -0,0 +1,179 @@
+### This file implements perft (performance test), which counts the leaf nodes of the move tree to validate and time the move generation. ###
+
+import time
+from array import array
+
+from game_logic.game_state import Game
+from game_logic.move import move_to_uci
+from game_logic.move_generation import get_all_legal_moves
+from game_logic.legal_move_generation import get_all_legal_moves_masked
+
+#Legal move generators that perft can run, so they can be compared for correctness and speed
+LEGAL_MOVE_GENERATORS = {
+    "make-undo": get_all_legal_moves, #Plays every pseudo-legal move and tests if the king is attacked
+    "pin-mask": get_all_legal_moves_masked, #Restricts the moves with check and pin masks
+}
+
+#Standard test positions with their known node counts per depth (https://www.chessprogramming.org/Perft_Results).
+#"depth" is the depth used by the default suite, deeper counts are kept for longer validation runs.
+PERFT_POSITIONS = [
+    {"name": "startpos", "depth": 4,
+     "fen": "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+     "nodes": {1: 20, 2: 400, 3: 8902, 4: 197281, 5: 4865609}},
+    {"name": "kiwipete", "depth": 3,
+     "fen": "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     "nodes": {1: 48, 2: 2039, 3: 97862, 4: 4085603}},
+    {"name": "position3", "depth": 4,
+     "fen": "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     "nodes": {1: 14, 2: 191, 3: 2812, 4: 43238, 5: 674624, 6: 11030083}},
+    {"name": "position4", "depth": 3,
+     "fen": "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     "nodes": {1: 6, 2: 264, 3: 9467, 4: 422333}},
+    {"name": "position5", "depth": 3,
+     "fen": "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     "nodes": {1: 44, 2: 1486, 3: 62379, 4: 2103487}},
+    {"name": "position6", "depth": 3,
+     "fen": "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     "nodes": {1: 46, 2: 2079, 3: 89890, 4: 3894594}},
+]
+
+
+class PerftHashTable:
+    """Table of node counts keyed by (position, depth), so a subtree reached by several move orders is counted once.
+    An entry is two unsigned 64-bit words: the Zobrist hash of the position, then the node count shifted by 8 bits
+    with the depth in the low byte. An entry is always replaced by the newest count.
+
+    Args:
+        size_mb (float): The memory used by the table in MB, rounded down to a power of two number of entries.
+    """
+    def __init__(self, size_mb : float = 16):
+        entry_count = int(size_mb * 1024 * 1024) // 16
+        if entry_count < 1:
+            raise ValueError("The perft hash table needs at least 16 bytes")
+        entry_count = 1 << (entry_count.bit_length() - 1)
+        self.keys = array("Q", bytes(entry_count * 8))
+        self.counts = array("Q", bytes(entry_count * 8))
+        self.mask = entry_count - 1
+        self.probes = 0
+        self.hits = 0
+
+    def probe(self, key : int, depth : int) -> int|None:
+        """Looks for the node count of a position at a depth.
+
+        Args:
+            key (int): The Zobrist hash of the position.
+            depth (int): How many plies are looked ahead.
+
+        Returns:
+            int | None: The node count if it is stored, else None.
+        """
+        self.probes += 1
+        #The depths of one position go to neighbouring entries instead of replacing each other
+        index = (key + depth) & self.mask
+        count = self.counts[index]
+        if self.keys[index] == key and count & 255 == depth:
+            self.hits += 1
+            return count >> 8
+        return None
+
+    def store(self, key : int, depth : int, nodes : int) -> None:
+        """Stores the node count of a position at a depth.
+
+        Args:
+            key (int): The Zobrist hash of the position.
+            depth (int): How many plies are looked ahead.
+            nodes (int): The number of leaf nodes.
+        """
+        index = (key + depth) & self.mask
+        self.keys[index] = key
+        self.counts[index] = (nodes << 8) | depth
+
+    @property
+    def hit_rate(self) -> float:
+        """The share of probes which found their count, 0 before the first probe.
+        """
+        return self.hits / self.probes if self.probes else 0.0
+
+    def clear(self) -> None:
+        """Empties the table and resets the counters.
+        """
+        self.keys[:] = array("Q", bytes(len(self.keys) * 8))
+        self.counts[:] = array("Q", bytes(len(self.counts) * 8))
+        self.probes = 0
+        self.hits = 0
+
+    def __repr__(self) -> str:
+        return f"PerftHashTable({len(self.keys)} entries, {self.hits}/{self.probes} hits, hit rate {self.hit_rate:.1%})"
+
+
+def perft(game : Game, depth : int, legal_move_generator = get_all_legal_moves, hash_table : PerftHashTable|None = None) -> int:
+    """Counts the leaf nodes of the legal move tree.
+    The moves of the last ply are counted without being played (bulk counting): a legal move generator only gives
+    legal moves, so each of them is one leaf.
+
+    Args:
+        game (Game): The game state. It is left unchanged.
+        depth (int): How many plies to look ahead.
+        legal_move_generator (function): Function giving the legal moves of a game.
+        hash_table (PerftHashTable | None): Node counts of the subtrees already counted, None to count every subtree.
+
+    Returns:
+        int: The number of leaf nodes at the given depth.
+    """
+    if depth == 0:
+        return 1
+    if depth == 1:
+        return len(legal_move_generator(game))
+    if hash_table is not None:
+        nodes = hash_table.probe(game.hash, depth)
+        if nodes is not None:
+            return nodes
+
+    nodes = 0
+    for move in legal_move_generator(game):
+        game.make_move(move)
+        nodes += perft(game, depth - 1, legal_move_generator, hash_table)
+        game.undo_move()
+
+    if hash_table is not None:
+        hash_table.store(game.hash, depth, nodes)
+    return nodes
+
+
+def divide(game : Game, depth : int, legal_move_generator = get_all_legal_moves, hash_table : PerftHashTable|None = None) -> dict[str, int]:
+    """Counts the leaf nodes under each root move, which helps to find which move is wrong when a count doesn't match.
+
+    Args:
+        game (Game): The game state. It is left unchanged.
+        depth (int): How many plies to look ahead (at least 1).
+        legal_move_generator (function): Function giving the legal moves of a game.
+        hash_table (PerftHashTable | None): Node counts of the subtrees already counted, None to count every subtree.
+
+    Returns:
+        dict[str, int]: The number of leaf nodes for each root move in UCI notation.
+    """
+    root_counts = {}
+    for move in legal_move_generator(game):
+        game.make_move(move)
+        root_counts[move_to_uci(move)] = perft(game, depth - 1, legal_move_generator, hash_table)
+        game.undo_move()
+
+    return root_counts
+
+
+def timed_perft(fen : str, depth : int, legal_move_generator = get_all_legal_moves, hash_table : PerftHashTable|None = None) -> tuple[int, float]:
+    """Runs perft on a position and times it.
+
+    Args:
+        fen (str): The position.
+        depth (int): How many plies to look ahead.
+        legal_move_generator (function): Function giving the legal moves of a game.
+        hash_table (PerftHashTable | None): Node counts of the subtrees already counted, None to count every subtree.
+
+    Returns:
+        tuple[int, float]: The number of leaf nodes and the time it took in seconds.
+    """
+    game = Game(fen)
+    start = time.perf_counter()
+    nodes = perft(game, depth, legal_move_generator, hash_table)
+    return nodes, time.perf_counter() - start
@@ -0,0 +1,201 @@
+### This file implements a streaming PGN reader which replays the games into Game, resolving the SAN moves through an index. ###
+#The games are read one at a time from the lines of the file, so the memory used doesn't depend on the size of the file.
+#A SAN move always gives the moved piece and its final square: the legal moves of each position are grouped by
+#(piece, final square), and only the few moves of the SAN's group are compared with its disambiguation and promotion.
+
+import re
+from typing import Iterable, Iterator
+
+from game_logic.game_state import Game, STARTING_FEN
+from game_logic.move import PIECE_INDICES, CASTLING, BLACK_OFFSET, index_moves_by_piece, move_to_uci
+from game_logic.legal_move_generation import get_all_legal_moves_masked
+
+#Movetext tokens: comments, variations, NAGs, move numbers, and the rest (moves and results)
+TOKEN_PATTERN = re.compile(r"\{[^}]*\}?|;[^\n]*|\$\d+|\d+\.+|[()]|[^\s{};()$]+")
+SAN_PATTERN = re.compile(r"([NBRQK])?([a-h])?([1-8])?x?([a-h])([1-8])(?:=?([NBRQ]))?[+#]?[!?]*")
+CASTLING_PATTERN = re.compile(r"(O-O-O|0-0-0|O-O|0-0)[+#]?[!?]*")
+HEADER_PATTERN = re.compile(r'\[(\w+)\s+"(.*)"\]')
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+
+
+class PGNError(ValueError):
+    """A move of a PGN game can't be played: it isn't valid SAN, or no legal move or several legal moves match it."""
+
+
+def is_comment_open(line : str, comment_open : bool) -> bool:
+    """Checks if a "{...}" comment is still open at the end of a movetext line, so the next line is part of it.
+
+    Args:
+        line (str): The movetext line.
+        comment_open (bool): Is a comment open at the start of the line?
+
+    Returns:
+        bool: If a comment is open at the end of the line.
+    """
+    for char in line:
+        if comment_open:
+            comment_open = char != "}"
+        elif char == "{":
+            comment_open = True
+        elif char == ";": #The rest of the line is a comment, braces included
+            break
+    return comment_open
+
+
+def read_games(lines : Iterable[str]) -> Iterator[tuple[dict[str, str], str]]:
+    """Splits the lines of a PGN file into games, reading only one game ahead.
+    A line inside a "{...}" comment is movetext even if it starts with "[" (e.g. a wrapped "[%clk 0:03:00]").
+
+    Args:
+        lines (Iterable[str]): The lines, e.g. an open file.
+
+    Yields:
+        tuple[dict[str, str], str]: The tag pairs and the movetext of each game.
+    """
+    headers, movetext = {}, []
+    comment_open = False
+    for line in lines:
+        line = line.strip()
+        if comment_open:
+            movetext.append(line)
+            comment_open = is_comment_open(line, True)
+        elif line.startswith("["):
+            #A tag pair after some movetext starts the next game
+            if movetext:
+                yield headers, "\n".join(movetext)
+                headers, movetext = {}, []
+            match = HEADER_PATTERN.match(line)
+            if match:
+                headers[match.group(1)] = match.group(2)
+        elif line and not line.startswith("%"): #"%" lines are escaped (ignored) lines
+            movetext.append(line)
+            comment_open = is_comment_open(line, False)
+    if headers or movetext:
+        yield headers, "\n".join(movetext)
+
+
+def get_san_moves(movetext : str) -> list[str]:
+    """Finds the SAN moves of the main line of a movetext, without the comments, variations, NAGs, move numbers and result.
+
+    Args:
+        movetext (str): The movetext of a game.
+
+    Returns:
+        list[str]: The SAN moves, in the order they are played.
+    """
+    san_moves = []
+    variation_depth = 0
+    for token in TOKEN_PATTERN.findall(movetext):
+        if token == "(":
+            variation_depth += 1
+        elif token == ")":
+            variation_depth = max(variation_depth - 1, 0)
+        elif variation_depth or token[0] in "{;$" or token.endswith(".") or token in RESULTS:
+            continue
+        else:
+            san_moves.append(token)
+    return san_moves
+
+
+def resolve_san(game : Game, san : str, piece_index : dict[tuple[int, int], list[int]]) -> int:
+    """Finds the legal move written by a SAN move.
+
+    Args:
+        game (Game): The game state.
+        san (str): The move in Standard Algebraic Notation (e.g. "Nbd7", "exd5", "e8=Q+", "O-O").
+        piece_index (dict[tuple[int, int], list[int]]): The legal moves grouped by (piece, final square) (see index_moves_by_piece).
+
+    Returns:
+        int: The encoded move.
+
+    Raises:
+        PGNError: If the SAN move isn't valid, or doesn't match exactly one legal move.
+    """
+    offset = 0 if game.white_to_move else BLACK_OFFSET
+    match = CASTLING_PATTERN.fullmatch(san)
+    if match:
+        rank = 0 if game.white_to_move else 56
+        final_index = rank + (2 if len(match.group(1)) == 5 else 6)
+        candidates = [move for move in piece_index.get((PIECE_INDICES["wK"] + offset, final_index), ()) if (move >> 16) & CASTLING]
+    else:
+        match = SAN_PATTERN.fullmatch(san)
+        if match is None:
+            raise PGNError(f"Invalid SAN move {san!r}")
+        piece, from_file, from_rank, to_file, to_rank, promotion = match.groups()
+        final_index = (int(to_rank) - 1)*8 + ord(to_file) - ord("a")
+        candidates = []
+        for move in piece_index.get((PIECE_INDICES["w" + (piece or "P")] + offset, final_index), ()):
+            if (move >> 16) & CASTLING:
+                continue
+            if from_file is not None and (move & 7) != ord(from_file) - ord("a"):
+                continue
+            if from_rank is not None and ((move & 63) >> 3) != int(from_rank) - 1:
+                continue
+            if (move >> 20) != (PIECE_INDICES["w" + promotion] + offset if promotion else 0):
+                continue
+            candidates.append(move)
+
+    if len(candidates) != 1:
+        raise PGNError(f"{'Ambiguous' if candidates else 'Illegal'} move {san!r}")
+    return candidates[0]
+
+
+def replay_game(headers : dict[str, str], san_moves : list[str], legal_move_generator = get_all_legal_moves_masked) -> Game:
+    """Plays the moves of a game from its starting position (the FEN tag if there is one).
+
+    Args:
+        headers (dict[str, str]): The tag pairs of the game.
+        san_moves (list[str]): The SAN moves of the main line.
+        legal_move_generator (function): Function giving the legal moves of a game.
+
+    Returns:
+        Game: The game after its last move.
+
+    Raises:
+        PGNError: If a move can't be played, or the FEN tag is invalid (see Game.load_fen), so one bad game doesn't
+            stop the replay of an archive.
+    """
+    try:
+        game = Game(headers.get("FEN", STARTING_FEN))
+    except ValueError as error:
+        raise PGNError(str(error)) from error
+    for ply, san in enumerate(san_moves):
+        try:
+            move = resolve_san(game, san, index_moves_by_piece(legal_move_generator(game)))
+        except PGNError as error:
+            raise PGNError(f"Ply {ply + 1}: {error}") from None
+        game.make_move(move)
+    return game
+
+
+def replay_pgn(lines : Iterable[str]) -> Iterator[tuple[dict[str, str], Game|None, str|None]]:
+    """Replays every game of a PGN file, one at a time.
+
+    Args:
+        lines (Iterable[str]): The lines of the file.
+
+    Yields:
+        tuple[dict[str, str], Game | None, str | None]: The tag pairs of each game, the game after its last move
+        (None if a move couldn't be played) and the error (None if the whole game was played).
+    """
+    for headers, movetext in read_games(lines):
+        try:
+            game, error = replay_game(headers, get_san_moves(movetext)), None
+        except PGNError as exception:
+            game, error = None, str(exception)
+        yield headers, game, error
+
+
+def game_to_uci(headers : dict[str, str], game : Game) -> str:
+    """Writes a replayed game as the arguments of a UCI "position" command: "startpos moves e2e4 ..." or
+    "fen <fen> moves ..." for a game with a FEN tag.
+
+    Args:
+        headers (dict[str, str]): The tag pairs of the game.
+        game (Game): The game after its last move.
+
+    Returns:
+        str: The starting position and the moves in UCI notation.
+    """
+    start = f"fen {headers['FEN']}" if "FEN" in headers else "startpos"
+    return f"{start} moves {' '.join(move_to_uci(move) for move in game.moves)}"
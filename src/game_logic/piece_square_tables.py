@@ -0,0 +1,127 @@
+### This file holds the material and piece-square values of the evaluation, which Game keeps as running totals. ###
+
+#Piece values in centipawns for the middlegame and the endgame, by piece type (the kings are never captured)
+MIDDLEGAME_VALUES = (100, 320, 330, 500, 900, 0)
+ENDGAME_VALUES = (120, 300, 320, 530, 950, 0)
+#Weight of each piece type in the game phase: 24 with all the pieces on the board (middlegame), 0 with only pawns and kings
+PHASE_WEIGHTS = (0, 1, 1, 2, 4, 0) * 2
+MAX_PHASE = 24
+
+#Bonus of a white piece on each square, written as seen from white: the first line is the 8th rank, a8 to h8.
+#Black pieces use the same tables mirrored vertically.
+PAWN_MIDDLEGAME = (
+      0,   0,   0,   0,   0,   0,   0,   0,
+     50,  50,  50,  50,  50,  50,  50,  50,
+     10,  10,  20,  30,  30,  20,  10,  10,
+      5,   5,  10,  25,  25,  10,   5,   5,
+      0,   0,   0,  20,  20,   0,   0,   0,
+      5,  -5, -10,   0,   0, -10,  -5,   5,
+      5,  10,  10, -20, -20,  10,  10,   5,
+      0,   0,   0,   0,   0,   0,   0,   0)
+PAWN_ENDGAME = (
+      0,   0,   0,   0,   0,   0,   0,   0,
+     80,  80,  80,  80,  80,  80,  80,  80,
+     50,  50,  50,  50,  50,  50,  50,  50,
+     30,  30,  30,  30,  30,  30,  30,  30,
+     15,  15,  15,  15,  15,  15,  15,  15,
+      5,   5,   5,   5,   5,   5,   5,   5,
+      0,   0,   0,   0,   0,   0,   0,   0,
+      0,   0,   0,   0,   0,   0,   0,   0)
+KNIGHT_TABLE = (
+    -50, -40, -30, -30, -30, -30, -40, -50,
+    -40, -20,   0,   0,   0,   0, -20, -40,
+    -30,   0,  10,  15,  15,  10,   0, -30,
+    -30,   5,  15,  20,  20,  15,   5, -30,
+    -30,   0,  15,  20,  20,  15,   0, -30,
+    -30,   5,  10,  15,  15,  10,   5, -30,
+    -40, -20,   0,   5,   5,   0, -20, -40,
+    -50, -40, -30, -30, -30, -30, -40, -50)
+BISHOP_TABLE = (
+    -20, -10, -10, -10, -10, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,  10,  10,   5,   0, -10,
+    -10,   5,   5,  10,  10,   5,   5, -10,
+    -10,   0,  10,  10,  10,  10,   0, -10,
+    -10,  10,  10,  10,  10,  10,  10, -10,
+    -10,   5,   0,   0,   0,   0,   5, -10,
+    -20, -10, -10, -10, -10, -10, -10, -20)
+ROOK_MIDDLEGAME = (
+      0,   0,   0,   0,   0,   0,   0,   0,
+      5,  10,  10,  10,  10,  10,  10,   5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+      0,   0,   0,   5,   5,   0,   0,   0)
+ROOK_ENDGAME = (0,) * 64
+QUEEN_TABLE = (
+    -20, -10, -10,  -5,  -5, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,   5,   5,   5,   0, -10,
+     -5,   0,   5,   5,   5,   5,   0,  -5,
+      0,   0,   5,   5,   5,   5,   0,  -5,
+    -10,   5,   5,   5,   5,   5,   0, -10,
+    -10,   0,   5,   0,   0,   0,   0, -10,
+    -20, -10, -10,  -5,  -5, -10, -10, -20)
+#The king hides behind its pawns in the middlegame and goes to the center in the endgame
+KING_MIDDLEGAME = (
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -20, -30, -30, -40, -40, -30, -30, -20,
+    -10, -20, -20, -20, -20, -20, -20, -10,
+     20,  20,   0,   0,   0,   0,  20,  20,
+     20,  30,  10,   0,   0,  10,  30,  20)
+KING_ENDGAME = (
+    -50, -40, -30, -20, -20, -30, -40, -50,
+    -30, -20, -10,   0,   0, -10, -20, -30,
+    -30, -10,  20,  30,  30,  20, -10, -30,
+    -30, -10,  30,  40,  40,  30, -10, -30,
+    -30, -10,  30,  40,  40,  30, -10, -30,
+    -30, -10,  20,  30,  30,  20, -10, -30,
+    -30, -30,   0,   0,   0,   0, -30, -30,
+    -50, -30, -30, -30, -30, -30, -30, -50)
+
+
+def build_score_tables(values : tuple[int, ...], tables : tuple[tuple[int, ...], ...]) -> list[list[int]]:
+    """Adds the piece values to the piece-square tables, for every piece index and square index.
+
+    Args:
+        values (tuple[int, ...]): The value of each piece type.
+        tables (tuple[tuple[int, ...], ...]): The piece-square table of each piece type, as seen from white.
+
+    Returns:
+        list[list[int]]: The score of each piece index on each square, positive for white and negative for black.
+    """
+    #Square index 0 is a1, which is the first square of the last line of a table (index 56): flip the rank with ^ 56
+    white_scores = [[value + table[square ^ 56] for square in range(64)] for value, table in zip(values, tables)]
+    black_scores = [[-(value + table[square]) for square in range(64)] for value, table in zip(values, tables)]
+    return white_scores + black_scores
+
+
+MIDDLEGAME_SCORES = build_score_tables(MIDDLEGAME_VALUES, (PAWN_MIDDLEGAME, KNIGHT_TABLE, BISHOP_TABLE, ROOK_MIDDLEGAME, QUEEN_TABLE, KING_MIDDLEGAME))
+ENDGAME_SCORES = build_score_tables(ENDGAME_VALUES, (PAWN_ENDGAME, KNIGHT_TABLE, BISHOP_TABLE, ROOK_ENDGAME, QUEEN_TABLE, KING_ENDGAME))
+
+
+def compute_scores(bitboards : list) -> tuple[int, int, int]:
+    """Computes the running totals of a position from scratch.
+
+    Args:
+        bitboards (list): The bitboards of the position.
+
+    Returns:
+        tuple[int, int, int]: The middlegame score, the endgame score (both from white's point of view) and the phase.
+    """
+    middlegame_score, endgame_score, phase = 0, 0, 0
+    for piece in range(12):
+        bitboard = bitboards[piece]
+        while bitboard:
+            square_bit = bitboard & -bitboard
+            square = square_bit.bit_length() - 1
+            middlegame_score += MIDDLEGAME_SCORES[piece][square]
+            endgame_score += ENDGAME_SCORES[piece][square]
+            phase += PHASE_WEIGHTS[piece]
+            bitboard ^= square_bit
+    return middlegame_score, endgame_score, phase
@@ -0,0 +1,327 @@
+### This file implements the engine: a negamax alpha-beta search with iterative deepening and a quiescence search. ###
+
+import time
+from typing import Callable
+
+from game_logic.game_state import Game
+from game_logic.move import CAPTURE_MASK, WP, BP, move_to_uci
+from game_logic.move_generation import is_in_check
+from game_logic.legal_move_generation import get_legal_captures
+from game_logic.move_ordering import MoveOrdering, sort_captures
+from game_logic.evaluation import evaluate
+from game_logic.transposition_table import TranspositionTable, BOUND_EXACT, BOUND_LOWER, BOUND_UPPER
+
+#Score of being checkmated at the root, a mate found n plies deeper scores MATE_SCORE - n
+MATE_SCORE = 100000
+#Scores beyond this are mates
+MATE_THRESHOLD = MATE_SCORE - 1000
+INFINITY = MATE_SCORE + 1
+#The clock is read once every CHECK_INTERVAL nodes
+CHECK_INTERVAL = 1024
+
+
+def score_to_table(score : int, ply : int) -> int:
+    """Converts a score to store it in the transposition table: mates are counted from the position, not from the root.
+
+    Args:
+        score (int): The score, mates counted from the root.
+        ply (int): The distance to the root.
+
+    Returns:
+        int: The score to store.
+    """
+    if score >= MATE_THRESHOLD:
+        return score + ply
+    if score <= -MATE_THRESHOLD:
+        return score - ply
+    return score
+
+
+def score_from_table(score : int, ply : int) -> int:
+    """Converts a score read from the transposition table back to a score with mates counted from the root.
+
+    Args:
+        score (int): The stored score.
+        ply (int): The distance to the root.
+
+    Returns:
+        int: The score, mates counted from the root.
+    """
+    if score >= MATE_THRESHOLD:
+        return score - ply
+    if score <= -MATE_THRESHOLD:
+        return score + ply
+    return score
+
+
+class SearchStopped(Exception):
+    """Raised inside the search when a limit is reached, to leave the tree at once.
+    """
+
+
+class SearchInfo:
+    """Result of one completed iteration of the iterative deepening.
+
+    Args:
+        depth (int): The depth of the iteration.
+        score (int): The score in centipawns for the side to move (see MATE_SCORE for mates).
+        pv (list[int]): The principal variation, the best line found.
+        nodes (int): The nodes searched since the start of the search.
+        seconds (float): The time since the start of the search.
+        branching_factor (float): Nodes of this iteration divided by nodes of the previous one (0 for depth 1).
+        hash_fill_rate (float): The share of the transposition table used by this search.
+    """
+    def __init__(self, depth : int, score : int, pv : list[int], nodes : int, seconds : float, branching_factor : float,
+                 hash_fill_rate : float = 0.0):
+        self.depth = depth
+        self.score = score
+        self.pv = pv
+        self.nodes = nodes
+        self.seconds = seconds
+        self.branching_factor = branching_factor
+        self.hash_fill_rate = hash_fill_rate
+
+    @property
+    def best_move(self) -> int|None:
+        #First move of the principal variation, None if there is no legal move
+        return self.pv[0] if self.pv else None
+
+    @property
+    def nps(self) -> float:
+        #Nodes per second
+        return self.nodes / self.seconds if self.seconds > 0 else 0.0
+
+    def __repr__(self) -> str:
+        return (f"depth {self.depth} score {self.score} nodes {self.nodes} time {self.seconds:.3f}s nps {self.nps:.0f} "
+                f"ebf {self.branching_factor:.2f} hashfull {self.hash_fill_rate:.1%} pv {' '.join(move_to_uci(move) for move in self.pv)}")
+
+
+class Search:
+    """Searches the best move of a game's current position.
+
+    Args:
+        game (Game): The game state. It is searched in place and left unchanged.
+        evaluate (Callable[[Game], int]): Static evaluation, from the side to move's point of view.
+        transposition_table (TranspositionTable | None): The table of search results, kept between searches.
+            A new 16 MB table is made if None.
+    """
+    def __init__(self, game : Game, evaluate : Callable[[Game], int] = evaluate, transposition_table : TranspositionTable|None = None):
+        self.game = game
+        self.evaluate = evaluate
+        self.transposition_table = transposition_table if transposition_table is not None else TranspositionTable()
+        self.move_ordering = MoveOrdering()
+
+        #Can be set from another thread to stop the search, the last completed iteration is kept
+        self.stopped = False
+
+        self.nodes = 0
+        self.node_limit = None
+        self.deadline = None
+        self.next_check = CHECK_INTERVAL
+        self.start_time = 0.0
+        self.limits_active = False
+        #pv_table[ply]: best line found from the node currently searched at this ply
+        self.pv_table = []
+        #Principal variation of the last iteration, searched first by the next one
+        self.previous_pv = []
+        #True while the search is still on the previous principal variation (the leftmost line of the tree)
+        self.follow_pv = False
+
+    def search(self, max_depth : int = 64, max_nodes : int|None = None, max_time : float|None = None,
+               on_iteration : Callable[[SearchInfo], None]|None = None, min_depth : int = 1) -> SearchInfo|None:
+        """Searches deeper and deeper until a limit is reached.
+        The limits only apply once the first iteration is complete, so there is always a move to play (unless stopped).
+
+        Args:
+            max_depth (int): The deepest iteration.
+            max_nodes (int | None): Stop after this many nodes.
+            max_time (float | None): Stop after this many seconds.
+            on_iteration (Callable[[SearchInfo], None] | None): Called after every completed iteration.
+            min_depth (int): The depth of the first iteration (the helpers of a parallel search start deeper).
+
+        Returns:
+            SearchInfo | None: The last completed iteration, None if the search was stopped before the first one was complete.
+        """
+        game = self.game
+        history_length = len(game.history)
+        self.nodes = 0
+        self.node_limit = max_nodes
+        self.start_time = time.perf_counter()
+        self.deadline = self.start_time + max_time if max_time is not None else None
+        self.previous_pv = []
+        self.pv_table = [[] for _ in range(max_depth + 1)]
+        self.transposition_table.new_search()
+        self.move_ordering.clear()
+
+        info = None
+        previous_nodes, previous_iteration_nodes = 0, 0
+        for depth in range(min_depth, max_depth + 1):
+            self.limits_active = depth > min_depth
+            self.follow_pv = True
+            self.next_check = self.nodes + CHECK_INTERVAL if self.node_limit is None else min(self.nodes + CHECK_INTERVAL, self.node_limit)
+            try:
+                score = self.negamax(depth, -INFINITY, INFINITY, 0)
+            except SearchStopped:
+                #Take back the moves of the interrupted line
+                while len(game.history) > history_length:
+                    game.undo_move()
+                break
+
+            #Effective branching factor: how many times more nodes this iteration needed than the previous one
+            iteration_nodes = self.nodes - previous_nodes
+            branching_factor = iteration_nodes / previous_iteration_nodes if previous_iteration_nodes else 0.0
+            info = SearchInfo(depth, score, self.pv_table[0], self.nodes, time.perf_counter() - self.start_time, branching_factor,
+                              self.transposition_table.fill_rate())
+            previous_nodes, previous_iteration_nodes = self.nodes, iteration_nodes
+            self.previous_pv = info.pv
+            if on_iteration is not None:
+                on_iteration(info)
+
+            #No legal move, or a forced mate was found: searching deeper won't change anything
+            if not info.pv or abs(score) >= MATE_THRESHOLD:
+                break
+
+        return info
+
+    def count_node(self) -> None:
+        """Counts a node and checks the limits when it is time to.
+
+        Raises:
+            SearchStopped: If a limit is reached.
+        """
+        self.nodes += 1
+        if self.nodes >= self.next_check:
+            self.next_check = self.nodes + CHECK_INTERVAL
+            if self.stopped:
+                raise SearchStopped
+            if self.limits_active:
+                if self.node_limit is not None:
+                    if self.nodes >= self.node_limit:
+                        raise SearchStopped
+                    self.next_check = min(self.next_check, self.node_limit)
+                if self.deadline is not None and time.perf_counter() >= self.deadline:
+                    raise SearchStopped
+
+    def is_repetition(self) -> bool:
+        """Checks if the current position already happened, in the game or in the searched line.
+        A capture or a pawn move can't be undone, so the positions before it are not looked at.
+
+        Returns:
+            bool: If the position is a repetition (scored as a draw).
+        """
+        key = self.game.hash
+        for record in reversed(self.game.history):
+            if record[4] == key:
+                return True
+            move = record[0]
+            if move & CAPTURE_MASK or (move >> 12) & 15 in (WP, BP):
+                return False
+        return False
+
+    def negamax(self, depth : int, alpha : int, beta : int, ply : int) -> int:
+        """Finds the score of the current position with an alpha-beta search.
+
+        Args:
+            depth (int): The remaining depth, the quiescence search starts at 0.
+            alpha (int): The score the side to move is already sure to get.
+            beta (int): The score the opponent is already sure to get (as a bound for the side to move).
+            ply (int): The distance to the root.
+
+        Returns:
+            int: The score for the side to move.
+        """
+        self.pv_table[ply] = []
+        if ply and self.is_repetition():
+            return 0
+        if depth <= 0:
+            return self.quiescence(alpha, beta, ply)
+        self.count_node()
+        game = self.game
+
+        #A result stored for this position at least as deep can be used instead of searching it again
+        hash_move = 0
+        entry = self.transposition_table.probe(game.hash)
+        if entry is not None:
+            hash_move, hash_score, hash_depth, bound = entry
+            if ply and hash_depth >= depth:
+                hash_score = score_from_table(hash_score, ply)
+                if (bound == BOUND_EXACT or (bound == BOUND_LOWER and hash_score >= beta)
+                        or (bound == BOUND_UPPER and hash_score <= alpha)):
+                    return hash_score
+
+        #The previous principal variation is searched first
+        if self.follow_pv:
+            if ply < len(self.previous_pv):
+                hash_move = self.previous_pv[ply]
+            else:
+                self.follow_pv = False
+
+        original_alpha = alpha
+        best_score, best_move = -INFINITY, 0
+        for move in self.move_ordering.pick_moves(game, ply, hash_move):
+            game.make_move(move)
+            score = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+            game.undo_move()
+            #Only the first move searched can continue the previous principal variation
+            self.follow_pv = False
+
+            if score > best_score:
+                best_score, best_move = score, move
+                if score > alpha:
+                    alpha = score
+                    self.pv_table[ply] = [move] + self.pv_table[ply + 1]
+                    if score >= beta:
+                        if not move & CAPTURE_MASK and not move >> 20:
+                            self.move_ordering.add_cutoff(move, depth, ply)
+                        break
+
+        #No legal move: checkmate or stalemate
+        if best_score == -INFINITY:
+            return -(MATE_SCORE - ply) if is_in_check(game) else 0
+
+        if best_score >= beta:
+            bound = BOUND_LOWER
+        elif best_score > original_alpha:
+            bound = BOUND_EXACT
+        else:
+            #No move beat alpha, the best move is only a guess
+            bound, best_move = BOUND_UPPER, 0
+        self.transposition_table.store(game.hash, best_move, score_to_table(best_score, ply), depth, bound)
+
+        return best_score
+
+    def quiescence(self, alpha : int, beta : int, ply : int) -> int:
+        """Searches the captures and promotions only, until the position is quiet, so the evaluation isn't made in
+        the middle of an exchange.
+
+        Args:
+            alpha (int): The score the side to move is already sure to get.
+            beta (int): The score the opponent is already sure to get.
+            ply (int): The distance to the root.
+
+        Returns:
+            int: The score for the side to move.
+        """
+        self.count_node()
+        game = self.game
+
+        #The side to move can usually do at least as well as the static evaluation by playing a quiet move
+        best_score = self.evaluate(game)
+        if best_score >= beta:
+            return best_score
+        if best_score > alpha:
+            alpha = best_score
+
+        for move in sort_captures(game.board, get_legal_captures(game)):
+            game.make_move(move)
+            score = -self.quiescence(-beta, -alpha, ply + 1)
+            game.undo_move()
+
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if score >= beta:
+                        break
+
+        return best_score
@@ -0,0 +1,134 @@
+### This file implements the transposition table: a fixed-size store of search results keyed by the Zobrist hash. ###
+
+from array import array
+
+#Bound of a stored score: exact, at least (the search failed high) or at most (the search failed low)
+BOUND_EXACT, BOUND_LOWER, BOUND_UPPER = 1, 2, 3
+
+#An entry is two unsigned 64-bit words: the key XOR the data, then the data. When several processes share the table,
+#an entry half written by one and half by another then fails the key test instead of giving another position's data.
+#Data word:
+#   bits 0-23:  best move (0 if none)
+#   bits 24-43: score + SCORE_OFFSET
+#   bits 44-51: depth
+#   bits 52-53: bound (0 for an empty entry)
+#   bits 54-61: generation of the search that stored it
+SCORE_OFFSET = 1 << 19
+#A bucket is two entries: one kept for the deepest result, one always replaced
+ENTRY_WORDS = 2
+BUCKET_WORDS = 2 * ENTRY_WORDS
+BUCKET_BYTES = BUCKET_WORDS * 8
+
+
+class TranspositionTable:
+    """Table of search results with a bounded memory.
+
+    Args:
+        size_mb (float): The memory used by the table in MB, rounded down to a power of two number of buckets.
+        buffer (memoryview | None): Memory to store the table in (e.g. shared memory), instead of a new array.
+            size_mb is then ignored and the table uses the largest power of two number of buckets that fits.
+    """
+    def __init__(self, size_mb : float = 16, buffer : memoryview|None = None):
+        if buffer is not None:
+            bucket_count = len(buffer) // BUCKET_BYTES
+        else:
+            bucket_count = int(size_mb * 1024 * 1024) // BUCKET_BYTES
+        if bucket_count < 1:
+            raise ValueError(f"The transposition table needs at least {BUCKET_BYTES} bytes")
+        bucket_count = 1 << (bucket_count.bit_length() - 1)
+
+        if buffer is not None:
+            self.words = memoryview(buffer).cast("B")[:bucket_count * BUCKET_BYTES].cast("Q")
+        else:
+            self.words = array("Q", bytes(bucket_count * BUCKET_BYTES))
+
+        self.bucket_mask = bucket_count - 1
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+
+    @property
+    def size_mb(self) -> float:
+        #Memory actually used by the entries
+        return len(self.words) * 8 / (1024 * 1024)
+
+    def new_search(self) -> None:
+        """Marks the entries stored from now on as newer, so the old ones are replaced first.
+        """
+        self.generation = (self.generation + 1) & 255
+
+    def clear(self) -> None:
+        """Empties the table and resets the counters.
+        """
+        self.words[:] = array("Q", bytes(len(self.words) * 8))
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+
+    def probe(self, key : int) -> tuple[int, int, int, int]|None:
+        """Looks for the stored result of a position.
+
+        Args:
+            key (int): The Zobrist hash of the position.
+
+        Returns:
+            tuple[int, int, int, int] | None: (best move, score, depth, bound) if the position is stored, else None.
+        """
+        self.probes += 1
+        words = self.words
+        index = (key & self.bucket_mask) * BUCKET_WORDS
+        for entry_index in (index, index + ENTRY_WORDS):
+            data = words[entry_index + 1]
+            if words[entry_index] ^ data == key and data:
+                self.hits += 1
+                return data & 0xFFFFFF, ((data >> 24) & 0xFFFFF) - SCORE_OFFSET, (data >> 44) & 255, (data >> 52) & 3
+        return None
+
+    def store(self, key : int, move : int, score : int, depth : int, bound : int) -> None:
+        """Stores the result of a search.
+        The first entry of the bucket keeps the deepest result of the current search, the second one takes the rest.
+
+        Args:
+            key (int): The Zobrist hash of the position.
+            move (int): The best move found, 0 if none.
+            score (int): The score found.
+            depth (int): The depth of the search.
+            bound (int): BOUND_EXACT, BOUND_LOWER or BOUND_UPPER.
+        """
+        words = self.words
+        index = (key & self.bucket_mask) * BUCKET_WORDS
+        data = move | ((score + SCORE_OFFSET) << 24) | (depth << 44) | (bound << 52) | (self.generation << 54)
+
+        #Depth-preferred entry: replaced by the same position, a deeper result or any result of a newer search
+        stored = words[index + 1]
+        if (not stored or words[index] ^ stored == key or depth >= (stored >> 44) & 255
+                or (stored >> 54) & 255 != self.generation):
+            #Keep the best move of the same position if the new result has none
+            if not move and words[index] ^ stored == key:
+                data |= stored & 0xFFFFFF
+            words[index], words[index + 1] = key ^ data, data
+        else:
+            words[index + ENTRY_WORDS], words[index + ENTRY_WORDS + 1] = key ^ data, data
+
+    @property
+    def hit_rate(self) -> float:
+        """The share of probes which found their position, 0 before the first probe.
+        """
+        return self.hits / self.probes if self.probes else 0.0
+
+    def fill_rate(self, sample_buckets : int = 1000) -> float:
+        """Estimates the share of used entries from the first buckets (like the UCI "hashfull").
+
+        Args:
+            sample_buckets (int): The number of buckets looked at.
+
+        Returns:
+            float: The share of entries which hold a result of the current search.
+        """
+        words = self.words
+        sample_words = min(sample_buckets * BUCKET_WORDS, len(words))
+        used = sum(1 for index in range(1, sample_words, ENTRY_WORDS) if words[index] and (words[index] >> 54) & 255 == self.generation)
+        return used / (sample_words // ENTRY_WORDS)
+
+    def __repr__(self) -> str:
+        return f"TranspositionTable({self.size_mb:g} MB, fill rate {self.fill_rate():.1%}, hit rate {self.hit_rate:.1%})"
@@ -0,0 +1,67 @@
+### This file implements Zobrist hashing: a 64-bit key identifying a position, which moves update with a few XORs. ###
+
+import random
+
+#The keys are drawn from a fixed seed so a position has the same key in every process (workers, opening book, ...)
+_generator = random.Random(20240607)
+
+#Key of each piece index on each square
+PIECE_SQUARE_KEYS = [[_generator.getrandbits(64) for _ in range(64)] for _ in range(12)]
+#Key of each combination of castling rights (XOR of the key of each right)
+_CASTLING_RIGHT_KEYS = [_generator.getrandbits(64) for _ in range(4)]
+CASTLING_KEYS = [0] * 16
+for _rights in range(16):
+    for _bit in range(4):
+        if _rights & (1 << _bit):
+            CASTLING_KEYS[_rights] ^= _CASTLING_RIGHT_KEYS[_bit]
+#Key of the en passant square, one per file. Square 0 means no en passant square and has no key.
+_EN_PASSANT_FILE_KEYS = [_generator.getrandbits(64) for _ in range(8)]
+EN_PASSANT_KEYS = [_EN_PASSANT_FILE_KEYS[square & 7] if square else 0 for square in range(64)]
+#XORed in when it is black to move
+BLACK_TO_MOVE_KEY = _generator.getrandbits(64)
+
+
+def compute_hash(bitboards : list, white_to_move : bool, castling_rights : int, en_passant_square : int) -> int:
+    """Computes the key of a position from scratch.
+
+    Args:
+        bitboards (list): The bitboards of the position.
+        white_to_move (bool): Whose turn it is.
+        castling_rights (int): Castling rights bits.
+        en_passant_square (int): The en passant square, 0 if none.
+
+    Returns:
+        int: The 64-bit Zobrist key.
+    """
+    key = 0
+    for piece in range(12):
+        bitboard = bitboards[piece]
+        while bitboard:
+            square_bit = bitboard & -bitboard
+            key ^= PIECE_SQUARE_KEYS[piece][square_bit.bit_length() - 1]
+            bitboard ^= square_bit
+
+    key ^= CASTLING_KEYS[castling_rights] ^ EN_PASSANT_KEYS[en_passant_square]
+    if not white_to_move:
+        key ^= BLACK_TO_MOVE_KEY
+
+    return key
+
+
+def compute_pawn_hash(bitboards : list) -> int:
+    """Computes the key of the pawn structure from scratch: the keys of the pawns only.
+
+    Args:
+        bitboards (list): The bitboards of the position.
+
+    Returns:
+        int: The 64-bit Zobrist key of the pawns.
+    """
+    key = 0
+    for piece in (0, 6): #White and black pawns
+        bitboard = bitboards[piece]
+        while bitboard:
+            square_bit = bitboard & -bitboard
+            key ^= PIECE_SQUARE_KEYS[piece][square_bit.bit_length() - 1]
+            bitboard ^= square_bit
+    return key
@@ -1,9 +1,18 @@
 from game_design.game_design import * 
+from game_design.background_worker import BackgroundWorker, BACKGROUND_RESULT, LEGAL_MOVES
 from game_logic.game_state import Game
-from game_logic.move_generation import get_all_legal_moves
+from game_logic.move import Move, index_moves_by_squares
+from game_logic.move_cache import MoveCache
+from game_logic.move_generation import is_in_check
+from game_logic.legal_move_generation import has_legal_move
+
+FPS = 60
+#Thinking time of the engine for one move, in seconds
+ENGINE_TIME = 3
 
 p.init()
 screen = p.display.set_mode((WIDTH, HEIGHT))
+clock = p.time.Clock()
 x = Game()
 load_images()
 screen.fill(p.Color("white"))
@@ -11,18 +20,34 @@ running = True
 sqSelected = ()
 playerClicks = []
 legal_moves = []
+legal_move_index = {}
+#Positions seen again after an undo don't need a new generation
+move_cache = MoveCache()
+#Legal moves and engine moves are found in the background, the results come back as BACKGROUND_RESULT events
+worker = BackgroundWorker(move_cache.legal_move_generator)
+worker.request_legal_moves(x)
 
 while running:
+    position_changed = False
     for e in p.event.get():
         if e.type == p.QUIT: #Quit the game
             running = False
 
-        elif e.type == p.KEYDOWN: #To undo a move
-            if e.key == p.K_z and len(x.moves) != 0:
+        elif e.type == p.KEYDOWN:
+            if e.key == p.K_z and len(x.history) != 0: #To undo a move
+                worker.cancel_search()
                 x.undo_move()
-                sqSelected = ()
-                playerClicks = []
-                legal_moves = []
+                position_changed = True
+            elif e.key == p.K_e and not worker.searching: #To let the engine play the side to move
+                worker.request_engine_move(x, ENGINE_TIME)
+
+        elif e.type == BACKGROUND_RESULT:
+            if e.kind == LEGAL_MOVES:
+                move_cache.store(e.key, e.legal_moves)
+            #The result of a cancelled search, or of a position which is no longer on the board, is dropped
+            elif worker.is_current(e) and e.key == x.hash and e.info is not None and e.info.pv:
+                x.make_move(e.info.pv[0])
+                position_changed = True
         
         elif e.type == p.MOUSEBUTTONDOWN:
             location = p.mouse.get_pos() #(x,y) move click location
@@ -41,27 +66,39 @@ while running:
                 sqSelected = (row, col)
                 playerClicks.append(sqSelected)
                 if len(playerClicks) != 2 and len(legal_moves) == 0:
-                    legal_moves = get_all_legal_moves(x)
+                    #Usually precomputed by the worker, generated here only if it isn't done yet
+                    encoded_moves = move_cache.get_legal_moves(x)
+                    legal_moves = [Move(move) for move in encoded_moves]
+                    legal_move_index = index_moves_by_squares(encoded_moves)
 
             if len(playerClicks) == 2: #A move made by the user
-                move_made = x.make_legal_move(playerClicks[0], playerClicks[1], legal_moves)
+                move_made = x.make_legal_move(playerClicks[0], playerClicks[1], legal_move_index)
                 if move_made:
-                    sqSelected = ()
-                    playerClicks = []
-                    legal_moves = []
+                    worker.cancel_search()
+                    position_changed = True
                 else:
                     playerClicks = [sqSelected]
 
-            elif len(legal_moves) == 0: #If the game is over (Checkmate)
-                print("Checkmate. Game Over!")
-                running = False
+    if position_changed:
+        sqSelected = ()
+        playerClicks = []
+        legal_moves = []
+        legal_move_index = {}
+        if not has_legal_move(x): #If the game is over
+            print("Checkmate. Game Over!" if is_in_check(x) else "Stalemate. Game Over!")
+            running = False
+        elif x.hash not in move_cache: #Positions seen before (after an undo for example) are already cached
+            worker.request_legal_moves(x)
 
     #Draw the chessboard on the screen
     drawBoard(screen)
-    draw_pieces(screen, x.bitboards, x.white_to_move)
+    draw_pieces(screen, x.board, x.white_to_move)
 
     #Highlight squares and possible moves
     highlightSquares(screen, x.white_to_move, sqSelected, legal_moves)
     
     #Update the display
-    p.display.flip()
\ No newline at end of file
+    p.display.flip()
+    clock.tick(FPS)
+
+worker.shutdown()
@@ -0,0 +1,196 @@
+### Headless perft runner: validates the move generator against known node counts and reports its speed. ###
+#Usage:
+#   python src/perft.py                         Run the standard suite and compare the speed with the stored baseline.
+#   python src/perft.py --save-baseline         Run the standard suite and store the speed as the new baseline.
+#   python src/perft.py --generator all         Run the standard suite with every legal move generator.
+#   python src/perft.py --fen "<fen>" --depth 3 --divide
+#                                               Count the nodes under each root move of a position.
+#   python src/perft.py --fen "<fen>" --depth 5 --workers 4
+#                                               Split the root moves of a position over 4 processes.
+#   python src/perft.py --depth 4 --scaling 8   Time perft with 1 to 8 processes and report the speedup.
+#   python src/perft.py --fen "<fen>" --depth 6 --hash 64
+#                                               Count the transposed subtrees once with a 64 MB hash table.
+#   python src/perft.py --fen "<fen>" --analyse 4 --workers 4
+#                                               Score every root move with a depth 4 search, over 4 processes.
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from game_logic.game_state import Game, STARTING_FEN
+from game_logic.move import move_to_uci
+from game_logic.search import MATE_SCORE, MATE_THRESHOLD
+from game_logic.perft import PERFT_POSITIONS, LEGAL_MOVE_GENERATORS, PerftHashTable, divide, timed_perft
+from game_logic.parallel import parallel_analyse, parallel_divide, parallel_perft, scaling_report
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "perft_baseline.json")
+
+
+def load_baseline(path : str) -> dict:
+    """Loads the stored baseline.
+
+    Args:
+        path (str): Path of the baseline file.
+
+    Returns:
+        dict: Nodes per second for each generator, position name and depth, empty if there is no baseline yet.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def run_suite(args) -> bool:
+    """Runs perft on the standard positions, checks the node counts and compares the speed with the baseline.
+
+    Args:
+        args (argparse.Namespace): The command line arguments.
+
+    Returns:
+        bool: If every node count matched.
+    """
+    baseline = load_baseline(args.baseline)
+    new_baseline = dict(baseline)
+    all_correct = True
+    generator_names = list(LEGAL_MOVE_GENERATORS) if args.generator == "all" else [args.generator]
+
+    for generator_name in generator_names:
+        legal_move_generator = LEGAL_MOVE_GENERATORS[generator_name]
+        total_nodes, total_time = 0, 0.0
+
+        print(f"generator: {generator_name}")
+        print(f"{'position':<10} {'depth':>5} {'nodes':>10} {'expected':>10} {'time (s)':>9} {'nodes/s':>9}  status")
+        for position in PERFT_POSITIONS:
+            depth = args.depth if args.depth is not None else position["depth"]
+            expected = position["nodes"].get(depth)
+            hash_table = PerftHashTable(args.hash) if args.hash else None
+            nodes, seconds = timed_perft(position["fen"], depth, legal_move_generator, hash_table)
+            nps = nodes / seconds if seconds > 0 else 0.0
+            total_nodes += nodes
+            total_time += seconds
+
+            status = "ok" if expected is None or nodes == expected else "WRONG"
+            all_correct = all_correct and status == "ok"
+
+            #Compare with the baseline measured with the same generator at the same depth (and with a hash table or not)
+            key = f"{generator_name}/{position['name']}/{depth}" + ("/hash" if hash_table is not None else "")
+            new_baseline[key] = nps
+            if key in baseline and baseline[key] > 0:
+                change = nps / baseline[key] - 1
+                status += f" {change:+.1%}"
+                if change < -args.tolerance:
+                    status += " REGRESSION"
+
+            print(f"{position['name']:<10} {depth:>5} {nodes:>10} {str(expected or '?'):>10} {seconds:>9.3f} {nps:>9.0f}  {status}")
+
+        print(f"total: {total_nodes} nodes in {total_time:.3f} s ({total_nodes / total_time if total_time > 0 else 0:.0f} nodes/s)\n")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(new_baseline, f, indent=4, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+
+    return all_correct
+
+
+def run_divide(args) -> None:
+    """Prints the node count under each root move of a position.
+
+    Args:
+        args (argparse.Namespace): The command line arguments.
+    """
+    game = Game(args.fen)
+    hash_table = None
+    if args.workers > 1:
+        root_counts = parallel_divide(game, args.depth or 1, args.workers, args.generator)
+    else:
+        hash_table = PerftHashTable(args.hash) if args.hash else None
+        root_counts = divide(game, args.depth or 1, LEGAL_MOVE_GENERATORS[args.generator], hash_table)
+    for uci, nodes in sorted(root_counts.items()):
+        print(f"{uci}: {nodes}")
+    print(f"\nmoves: {len(root_counts)}")
+    print(f"nodes: {sum(root_counts.values())}")
+    if hash_table is not None:
+        print(hash_table)
+
+
+def run_analyse(args) -> None:
+    """Prints the score, node count and principal variation of every root move of a position, best first.
+
+    Args:
+        args (argparse.Namespace): The command line arguments.
+    """
+    game = Game(args.fen or STARTING_FEN)
+    start = time.perf_counter()
+    analysis = parallel_analyse(game, args.analyse, args.workers)
+    seconds = time.perf_counter() - start
+    for score, nodes, pv in analysis:
+        if abs(score) >= MATE_THRESHOLD:
+            #Mate in moves, negative if the side to move is getting mated
+            plies = MATE_SCORE - abs(score)
+            score_text = f"mate {(plies + 1) // 2 if score > 0 else -((plies + 1) // 2)}"
+        else:
+            score_text = f"cp {score}"
+        print(f"{move_to_uci(pv[0])}: {score_text}, nodes {nodes}, pv {' '.join(move_to_uci(move) for move in pv)}")
+    nodes = sum(nodes for _, nodes, _ in analysis)
+    print(f"\nmoves: {len(analysis)}, nodes: {nodes}, time: {seconds:.3f} s, nodes/s: {nodes / seconds if seconds > 0 else 0:.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Perft validation and benchmark for the Catfish move generator.")
+    parser.add_argument("--depth", type=int, default=None, help="depth to use instead of the default depth of each position")
+    parser.add_argument("--fen", default=None, help="run on this position only")
+    parser.add_argument("--generator", default="make-undo", choices=list(LEGAL_MOVE_GENERATORS) + ["all"],
+                        help="legal move generator to run, \"all\" runs the suite with each of them (default: %(default)s)")
+    parser.add_argument("--divide", action="store_true", help="print the node count of each root move (needs --fen)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline file (default: %(default)s)")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run's speed as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.05, help="slowdown reported as a regression (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=1, help="processes the root moves are split over, with --fen (default: %(default)s)")
+    parser.add_argument("--scaling", type=int, default=None, metavar="N",
+                        help="time perft with 1 to N processes on --fen (default: kiwipete) and report the speedup")
+    parser.add_argument("--hash", type=float, default=0, metavar="MB",
+                        help="size of the perft hash table in MB, 0 to count every subtree, in one process only (default: %(default)s)")
+    parser.add_argument("--analyse", type=int, default=None, metavar="DEPTH",
+                        help="score every root move of --fen (default: the starting position) with a search of this depth, at least 2")
+    args = parser.parse_args()
+
+    if args.analyse is not None:
+        if args.analyse < 2:
+            parser.error("--analyse needs a depth of at least 2")
+        run_analyse(args)
+        return
+
+    if args.scaling is not None:
+        if args.generator == "all":
+            parser.error("--scaling needs a single --generator")
+        scaling_report(args.fen or PERFT_POSITIONS[1]["fen"], args.depth or 4, args.scaling, args.generator)
+        return
+
+    if args.fen is not None:
+        if args.generator == "all":
+            parser.error("--fen needs a single --generator")
+        if args.divide:
+            run_divide(args)
+        else:
+            if args.workers > 1:
+                start = time.perf_counter()
+                nodes = parallel_perft(Game(args.fen), args.depth or 1, args.workers, args.generator)
+                seconds = time.perf_counter() - start
+            else:
+                hash_table = PerftHashTable(args.hash) if args.hash else None
+                nodes, seconds = timed_perft(args.fen, args.depth or 1, LEGAL_MOVE_GENERATORS[args.generator], hash_table)
+                if hash_table is not None:
+                    print(hash_table)
+            print(f"nodes: {nodes}, time: {seconds:.3f} s, nodes/s: {nodes / seconds if seconds > 0 else 0:.0f}")
+        return
+
+    if not run_suite(args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+### Headless PGN replay: plays every game of a PGN file to validate it, and reports the games and plies per second. ###
+#Usage:
+#   python src/pgn_replay.py games.pgn                  Validate every game, print the errors.
+#   python src/pgn_replay.py games.pgn --uci moves.txt  Also write each valid game as UCI "position" arguments.
+#   zcat games.pgn.gz | python src/pgn_replay.py -      Read the games from stdin.
+#The progress is written to stderr.
+
+import argparse
+import sys
+import time
+
+from game_logic.pgn import replay_pgn, game_to_uci
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Streaming PGN validation and replay with Catfish.")
+    parser.add_argument("input", help="PGN file, \"-\" for stdin")
+    parser.add_argument("--uci", default=None, help="file to write each valid game to as UCI \"position\" arguments, one game per line")
+    parser.add_argument("--progress", type=float, default=1.0, help="seconds between two progress reports (default: %(default)s)")
+    args = parser.parse_args()
+
+    #Some archives aren't valid UTF-8 in their comments: the moves are ASCII anyway
+    input_file = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8", errors="replace")
+    uci_file = open(args.uci, "w") if args.uci is not None else None
+    games = plies = errors = 0
+    start = last_report = time.perf_counter()
+    try:
+        for headers, game, error in replay_pgn(input_file):
+            games += 1
+            if error is not None:
+                errors += 1
+                print(f"game {games} ({headers.get('White', '?')} - {headers.get('Black', '?')}): {error}", file=sys.stderr)
+            else:
+                plies += len(game.history)
+                if uci_file is not None:
+                    uci_file.write(game_to_uci(headers, game) + "\n")
+
+            now = time.perf_counter()
+            if now - last_report >= args.progress:
+                last_report = now
+                print(f"{games} games, {plies} plies, {games / (now - start):.0f} games/s, {plies / (now - start):.0f} plies/s", file=sys.stderr)
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if uci_file is not None:
+            uci_file.close()
+
+    seconds = time.perf_counter() - start
+    print(f"done: {games} games ({errors} invalid), {plies} plies in {seconds:.3f} s "
+          f"({games / seconds if seconds > 0 else 0:.0f} games/s, {plies / seconds if seconds > 0 else 0:.0f} plies/s)", file=sys.stderr)
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
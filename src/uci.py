@@ -0,0 +1,308 @@
+### Headless engine entry point speaking the UCI protocol over stdin/stdout, so Catfish can be driven without a display. ###
+#Usage:
+#   python src/uci.py
+#Commands: uci, isready, ucinewgame, setoption name Hash value <MB>, setoption name Book value <file>, position [startpos | fen <fen>] [moves <m1> <m2> ...],
+#go [depth <n>] [nodes <n>] [movetime <ms>] [wtime <ms> btime <ms> winc <ms> binc <ms> movestogo <n>] [infinite],
+#go perft <n> (or perft <n>), stop, quit.
+#
+#The game logic is only imported when a command needs it: building the attack tables takes most of the startup time,
+#and "uci"/"isready" can be answered without them.
+
+import random
+import sys
+import threading
+
+ENGINE_NAME = "Catfish"
+ENGINE_AUTHOR = "the Catfish authors"
+DEFAULT_HASH_MB = 16
+MAX_HASH_MB = 1024
+#Share of the remaining clock time used for one move when the number of moves to go is unknown
+DEFAULT_MOVES_TO_GO = 30
+
+
+class UCIEngine:
+    """State of the engine between UCI commands.
+    """
+    def __init__(self):
+        self.hash_size_mb = DEFAULT_HASH_MB
+        self.book = None
+        #Book moves are picked in proportion to how often they were played, so the engine doesn't always open the same way
+        self.book_random = random.Random()
+        self.game = None
+        self.search = None
+        self.transposition_table = None
+        self.search_thread = None
+        #Set by "stop": a "go infinite" search waits for it before printing its best move
+        self.stop_event = threading.Event()
+        self.output_lock = threading.Lock()
+
+    def send(self, line : str) -> None:
+        """Writes a line to the GUI. The search thread writes too, so the lines are written one at a time.
+
+        Args:
+            line (str): The line to write.
+        """
+        with self.output_lock:
+            sys.stdout.write(line + "\n")
+            sys.stdout.flush()
+
+    def handle(self, line : str) -> bool:
+        """Runs one UCI command.
+
+        Args:
+            line (str): The command line sent by the GUI.
+
+        Returns:
+            bool: False if the engine must quit.
+        """
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, arguments = tokens[0], tokens[1:]
+
+        if command == "uci":
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            self.send(f"option name Hash type spin default {DEFAULT_HASH_MB} min 1 max {MAX_HASH_MB}")
+            self.send("option name Book type string default <empty>")
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "setoption":
+            self.set_option(arguments)
+        elif command == "ucinewgame":
+            self.stop()
+            self.game = None
+            self.transposition_table = None
+        elif command == "position":
+            self.stop()
+            self.set_position(arguments)
+        elif command == "go":
+            self.stop()
+            if arguments[:1] == ["perft"]:
+                self.perft(arguments[1:])
+            else:
+                self.go(arguments)
+        elif command == "perft":
+            self.stop()
+            self.perft(arguments)
+        elif command == "stop":
+            self.stop()
+        elif command == "quit":
+            self.stop()
+            return False
+        else:
+            self.send(f"info string unknown command {line.strip()}")
+        return True
+
+    def set_option(self, arguments : list[str]) -> None:
+        """Handles "setoption name <name> value <value>".
+
+        Args:
+            arguments (list[str]): The words after "setoption".
+        """
+        if "name" not in arguments or "value" not in arguments:
+            return
+        name = " ".join(arguments[arguments.index("name") + 1:arguments.index("value")]).lower()
+        value = " ".join(arguments[arguments.index("value") + 1:])
+        if name == "hash":
+            try:
+                self.hash_size_mb = min(max(int(value), 1), MAX_HASH_MB)
+            except ValueError:
+                self.send(f"info string invalid Hash value {value}")
+                return
+            self.transposition_table = None
+        elif name == "book":
+            from game_logic.opening_book import OpeningBook
+
+            if self.book is not None:
+                self.book.close()
+                self.book = None
+            if value and value != "<empty>":
+                try:
+                    self.book = OpeningBook(value)
+                except (OSError, ValueError) as error:
+                    self.send(f"info string cannot open book {value}: {error}")
+        else:
+            self.send(f"info string unknown option {name}")
+
+    def get_game(self):
+        """Gives the current game, the starting position if none was set.
+
+        Returns:
+            Game: The game state.
+        """
+        if self.game is None:
+            from game_logic.game_state import Game
+            self.game = Game()
+        return self.game
+
+    def set_position(self, arguments : list[str]) -> None:
+        """Handles "position [startpos | fen <fen>] [moves <m1> <m2> ...]".
+
+        Args:
+            arguments (list[str]): The words after "position".
+        """
+        from game_logic.game_state import Game, STARTING_FEN
+        from game_logic.move import move_to_uci
+        from game_logic.legal_move_generation import get_all_legal_moves_masked
+
+        moves_index = arguments.index("moves") if "moves" in arguments else len(arguments)
+        if arguments[:1] == ["fen"]:
+            fen = " ".join(arguments[1:moves_index])
+        else:
+            fen = STARTING_FEN
+        #An invalid position is rejected and the current one kept: Game only accepts positions the move generators can play
+        try:
+            game = Game(fen)
+        except ValueError as error:
+            self.send(f"info string {error}")
+            return
+
+        for uci in arguments[moves_index + 1:]:
+            for move in get_all_legal_moves_masked(game):
+                if move_to_uci(move) == uci:
+                    game.make_move(move)
+                    break
+            else:
+                self.send(f"info string illegal move {uci}")
+                break
+        self.game = game
+
+    def go(self, arguments : list[str]) -> None:
+        """Handles "go": starts a search in a background thread, which prints "bestmove" when it ends
+        (with "go infinite", only once "stop" is received, even if the search ends before).
+
+        Args:
+            arguments (list[str]): The words after "go".
+        """
+        from game_logic.search import Search
+        from game_logic.transposition_table import TranspositionTable
+
+        limits = {}
+        for name, value in zip(arguments, arguments[1:]):
+            if name in ("depth", "nodes", "movetime", "wtime", "btime", "winc", "binc", "movestogo"):
+                try:
+                    limits[name] = int(value)
+                except ValueError:
+                    self.send(f"info string invalid {name} value {value}")
+                    return
+
+        game = self.get_game()
+        #Known opening positions are played from the book without searching (but analysed with "go infinite")
+        if self.book is not None and "infinite" not in arguments:
+            from game_logic.move import move_to_uci
+
+            book_move = self.book.get_move(game, self.book_random)
+            if book_move is not None:
+                self.send("info string book move")
+                self.send(f"bestmove {move_to_uci(book_move)}")
+                return
+
+        max_time = limits["movetime"] / 1000 if "movetime" in limits else None
+        #Clock: a share of the remaining time plus most of the increment, never more than the remaining time
+        clock, increment = ("wtime", "winc") if game.white_to_move else ("btime", "binc")
+        if max_time is None and clock in limits:
+            time_left = limits[clock] / 1000
+            max_time = min(time_left / limits.get("movestogo", DEFAULT_MOVES_TO_GO) + limits.get(increment, 0) / 1000 * 0.8,
+                           time_left * 0.5)
+
+        if self.transposition_table is None:
+            self.transposition_table = TranspositionTable(self.hash_size_mb)
+        self.search = Search(game, transposition_table=self.transposition_table)
+        self.stop_event = threading.Event()
+        self.search_thread = threading.Thread(target=self.run_search, args=(limits.get("depth", 64), limits.get("nodes"), max_time,
+                                                                            "infinite" in arguments, self.stop_event), daemon=True)
+        self.search_thread.start()
+
+    def run_search(self, max_depth : int, max_nodes : int|None, max_time : float|None, infinite : bool = False,
+                   stop_event : threading.Event|None = None) -> None:
+        """Runs the search and prints its result (in the search thread).
+
+        Args:
+            max_depth (int): The deepest iteration.
+            max_nodes (int | None): Stop after this many nodes.
+            max_time (float | None): Stop after this many seconds.
+            infinite (bool): Wait for stop_event before printing the best move: UCI forbids "bestmove" before "stop"
+                during "go infinite", even when the search ends by itself (a forced mate, or the deepest iteration).
+            stop_event (threading.Event | None): Set by "stop".
+        """
+        from game_logic.move import move_to_uci
+        from game_logic.legal_move_generation import get_all_legal_moves_masked
+
+        #"bestmove" is always sent, even if the search fails, so the GUI never waits for it forever
+        best_move = "0000"
+        try:
+            info = self.search.search(max_depth=max_depth, max_nodes=max_nodes, max_time=max_time, on_iteration=self.send_info)
+            if info is not None and info.pv:
+                best_move = move_to_uci(info.pv[0])
+            else:
+                #Stopped before depth 1 was complete (or no legal move): any legal move, "0000" if there is none
+                moves = get_all_legal_moves_masked(self.search.game)
+                if moves:
+                    best_move = move_to_uci(moves[0])
+        finally:
+            if infinite and stop_event is not None:
+                stop_event.wait()
+            self.send(f"bestmove {best_move}")
+
+    def send_info(self, info) -> None:
+        """Prints an "info" line for a completed iteration.
+
+        Args:
+            info (SearchInfo): The result of the iteration.
+        """
+        from game_logic.move import move_to_uci
+        from game_logic.search import MATE_SCORE, MATE_THRESHOLD
+
+        if abs(info.score) >= MATE_THRESHOLD:
+            #Mate in moves, negative if the engine is getting mated
+            plies = MATE_SCORE - abs(info.score)
+            score = f"mate {(plies + 1) // 2 if info.score > 0 else -((plies + 1) // 2)}"
+        else:
+            score = f"cp {info.score}"
+        self.send(f"info depth {info.depth} score {score} nodes {info.nodes} nps {info.nps:.0f} time {info.seconds * 1000:.0f} "
+                  f"hashfull {info.hash_fill_rate * 1000:.0f} pv {' '.join(move_to_uci(move) for move in info.pv)}")
+
+    def perft(self, arguments : list[str]) -> None:
+        """Handles "perft <depth>": prints the node count under each root move and the total.
+
+        Args:
+            arguments (list[str]): The words after "perft".
+        """
+        from game_logic.perft import divide, LEGAL_MOVE_GENERATORS
+
+        try:
+            depth = int(arguments[0]) if arguments else 1
+        except ValueError:
+            self.send(f"info string invalid perft depth {arguments[0]}")
+            return
+        if depth < 1:
+            self.send("info string the perft depth must be at least 1")
+            return
+        root_counts = divide(self.get_game(), depth, LEGAL_MOVE_GENERATORS["pin-mask"])
+        for uci, nodes in sorted(root_counts.items()):
+            self.send(f"{uci}: {nodes}")
+        self.send("")
+        self.send(f"Nodes searched: {sum(root_counts.values())}")
+
+    def stop(self) -> None:
+        """Stops the running search, if any, and waits for it to print its best move.
+        """
+        if self.search_thread is not None:
+            self.search.stopped = True
+            self.stop_event.set()
+            self.search_thread.join()
+            self.search_thread = None
+
+
+def main() -> None:
+    engine = UCIEngine()
+    for line in sys.stdin:
+        if not engine.handle(line):
+            break
+    engine.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+### Makes the modules of src importable the way the entry points import them (from game_logic... import ...). ###
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
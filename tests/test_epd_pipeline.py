@@ -0,0 +1,29 @@
+### Tests of the FEN/EPD analysis pipeline. ###
+
+from game_logic.epd_pipeline import analyse_position, run_pipeline, NORMAL, CHECK, CHECKMATE, INVALID
+
+
+def test_pawn_on_last_rank_is_invalid():
+    assert analyse_position("KP6/8/8/8/8/8/8/7k w - - 0 1", 0, 1) == ("KP6/8/8/8/8/8/8/7k w - - 0 1", 0, INVALID, "", None)
+
+
+def test_pawn_on_first_rank_is_invalid():
+    assert analyse_position("K7/8/8/8/8/8/8/p6k b - - 0 1", 0, 1)[2] == INVALID
+
+
+def test_side_not_to_move_in_check_is_invalid():
+    #White to move and the black king is attacked by the rook
+    assert analyse_position("7k/8/8/8/8/8/8/K6R w - - 0 1", 0, 1)[2] == INVALID
+
+
+def test_valid_positions():
+    results = list(run_pipeline(["rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+                                 "7k/8/8/8/8/8/8/K6R b - - 0 1",
+                                 "R5k1/5ppp/8/8/8/8/8/6K1 b - - 0 1"]))
+    assert [(legal_moves, status) for _, legal_moves, status, _, _ in results] == [(20, NORMAL), (2, CHECK), (0, CHECKMATE)]
+
+
+def test_bad_en_passant_square_is_invalid():
+    placement = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR"
+    for en_passant in ("z3", "e3", "e9"):
+        assert analyse_position(f"{placement} w KQkq {en_passant} 0 1", 0, 1)[2] == INVALID
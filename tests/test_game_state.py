@@ -0,0 +1,34 @@
+### Tests of the FEN validation of Game. ###
+
+import pytest
+
+from game_logic.game_state import Game, STARTING_FEN
+from game_logic.move_generation import get_all_legal_moves
+
+START_PLACEMENT = STARTING_FEN.split()[0]
+
+
+@pytest.mark.parametrize("fen", [
+    "8/8/8/8/8/8/8/K6k w - e9 0 1",
+    f"{START_PLACEMENT} w KQkq z3 0 1",
+    f"{START_PLACEMENT} w KQkq 33 0 1",
+    f"{START_PLACEMENT} w KQkq a0 0 1",
+    #Right file and rank, but no black pawn just moved two squares
+    f"{START_PLACEMENT} w KQkq e3 0 1",
+    f"{START_PLACEMENT} b KQkq e3 0 1",
+    "8/8/8/8/8/8/8/K7 w - - 0 1",
+    "K1k5/8/8/8/8/8/8/7k w - - 0 1",
+    "KP6/8/8/8/8/8/8/7k w - - 0 1",
+    "K7/8/8/8/8/8/8/p6k b - - 0 1",
+    "7k/8/8/8/8/8/8/K6R w - - 0 1",
+])
+def test_invalid_positions_raise_value_error(fen):
+    with pytest.raises(ValueError):
+        Game(fen)
+
+
+def test_en_passant_square():
+    game = Game("rnbqkbnr/ppp1pppp/8/3pP3/8/8/PPPP1PPP/RNBQKBNR w KQkq d6 0 3")
+    assert game.en_passant_square == 43
+    assert len(get_all_legal_moves(game)) == 31
+    assert Game("rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1").en_passant_square == 20
@@ -0,0 +1,13 @@
+### Tests of the legal move cache. ###
+
+from game_logic.game_state import Game
+from game_logic.move_cache import MoveCache
+
+
+def test_contains_doesnt_count_a_lookup():
+    cache = MoveCache()
+    game = Game()
+    assert game.hash not in cache
+    cache.get_legal_moves(game)
+    assert game.hash in cache
+    assert (cache.hits, cache.misses) == (0, 1)
@@ -0,0 +1,64 @@
+### Tests of the streaming PGN reader. ###
+
+from game_logic.pgn import read_games, replay_pgn
+
+WRAPPED_COMMENT_PGN = """[Event "wrapped"]
+[White "a"]
+[Black "b"]
+
+1. e4 e5 2. Nf3 Nc6 3. Bb5 a6 { a long comment wrapped at 80 columns, the next line
+[not a header] starts with a bracket [%clk 0:03:00] } 4. Ba4 Nf6 5. O-O Be7 { another
+[%eval 0.3] wrapped comment } 6. Re1 b5 1-0
+
+[Event "next"]
+
+1. d4 d5 *
+"""
+
+
+def test_multi_line_comment_starting_with_bracket():
+    games = list(replay_pgn(WRAPPED_COMMENT_PGN.splitlines()))
+    assert len(games) == 2
+    headers, game, error = games[0]
+    assert error is None
+    assert headers["Event"] == "wrapped"
+    assert len(game.history) == 12
+    assert games[1][0] == {"Event": "next"}
+    assert len(games[1][1].history) == 2
+
+
+def test_semicolon_comment_brace_doesnt_open_a_comment():
+    pgn = '[Event "a"]\n\n1. e4 ; a brace { here\n1... e5 *\n\n[Event "b"]\n\n1. d4 *\n'
+    games = list(read_games(pgn.splitlines()))
+    assert [headers["Event"] for headers, _ in games] == ["a", "b"]
+
+
+INVALID_FEN_PGN = """[Event "bad en passant square"]
+[FEN "8/8/8/8/8/8/8/K6k w - e9 0 1"]
+
+1. Kb2 *
+
+[Event "no white king"]
+[FEN "8/8/8/8/8/8/8/7k w - - 0 1"]
+
+1. Kb2 *
+
+[Event "good"]
+
+1. e4 e5 *
+"""
+
+
+def test_invalid_fen_tag_doesnt_stop_the_replay():
+    games = list(replay_pgn(INVALID_FEN_PGN.splitlines()))
+    assert [(headers["Event"], game is None, error is None) for headers, game, error in games] == [
+        ("bad en passant square", True, False), ("no white king", True, False), ("good", False, True)]
+
+
+def test_invalid_fen_tag_doesnt_stop_the_book(tmp_path):
+    from game_logic.opening_book import OpeningBook, build_book
+
+    path = str(tmp_path / "book.bin")
+    assert build_book(INVALID_FEN_PGN.splitlines(), path) == (3, 2)
+    with OpeningBook(path) as book:
+        assert len(book) == 2
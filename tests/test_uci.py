@@ -0,0 +1,71 @@
+### Tests of the UCI entry point. ###
+
+import threading
+import time
+
+import pytest
+
+from uci import UCIEngine
+
+
+class RecordingEngine(UCIEngine):
+    """UCIEngine keeping the lines it writes instead of printing them."""
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def send(self, line : str) -> None:
+        with self.output_lock:
+            self.lines.append(line)
+
+
+def test_go_infinite_waits_for_stop():
+    engine = RecordingEngine()
+    #Mate in one: the search ends by itself at once
+    engine.handle("position fen 6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+    engine.handle("go infinite")
+    engine.search_thread.join(timeout=2)
+    assert engine.search_thread.is_alive()
+    assert not any(line.startswith("bestmove") for line in engine.lines)
+
+    engine.handle("stop")
+    assert engine.lines[-1] == "bestmove a1a8"
+
+
+def test_go_depth_prints_bestmove_without_stop():
+    engine = RecordingEngine()
+    engine.handle("position fen 6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+    engine.handle("go depth 2")
+    deadline = time.monotonic() + 30
+    while not any(line.startswith("bestmove") for line in engine.lines) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert engine.lines[-1] == "bestmove a1a8"
+    engine.handle("quit")
+
+
+def test_invalid_positions_are_rejected():
+    engine = RecordingEngine()
+    for fen in ("8/8/8/8/8/8/8/K6k w - e9 0 1", "8/8/8/8/8/8/8/K7 w - - 0 1", "KP6/8/8/8/8/8/8/7k w - - 0 1"):
+        engine.handle(f"position fen {fen}")
+        assert engine.lines[-1].startswith("info string Invalid FEN")
+    #The starting position is kept
+    engine.handle("go perft 1")
+    assert engine.lines[-1] == "Nodes searched: 20"
+
+
+#The exception still reaches the thread, after bestmove is sent
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_bestmove_is_sent_when_the_search_fails():
+    engine = RecordingEngine()
+    engine.handle("position startpos")
+    engine.handle("go depth 1")
+    engine.stop()
+    engine.lines.clear()
+
+    def failing_search(**limits):
+        raise RuntimeError("search failed")
+    engine.search.search = failing_search
+    thread = threading.Thread(target=engine.run_search, args=(1, None, None))
+    thread.start()
+    thread.join()
+    assert engine.lines == ["bestmove 0000"]